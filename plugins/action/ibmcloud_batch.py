@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+from importlib import import_module
+
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+from ansible.module_utils.common.parameters import remove_values
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.parsing.mod_args import ModuleArgsParser
+from ansible.plugins.action.normal import ActionModule as NormalActionModule
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    Terraform, argument_checks, ibmcloud_terraform_batch)
+
+from ansible.utils.display import Display
+display = Display()
+
+# Task variable enabling loop batching
+BATCH_VAR = 'ibmcloud_batch_loop'
+
+# Parameters that configure the provider; loop items can only share a
+# Terraform working directory if these are equal
+PROVIDER_PARAMETERS = (
+    'region',
+    'zone',
+    'generation',
+    'function_namespace',
+    'ibmcloud_api_key',
+    'iaas_classic_username',
+    'iaas_classic_api_key',
+)
+
+MODULES_PACKAGE = 'ansible_collections.ibm.cloudcollection.plugins.modules'
+
+# Batched loop results per (task, host). All items of a loop run
+# sequentially in the same worker process, so the first item computes
+# the results and the following items pick up theirs. The entry is
+# removed once every item ran.
+_BATCHES = {}
+
+
+class ActionModule(NormalActionModule):
+    """
+    Action plugin for the IBM Cloud resource modules.
+
+    Without the 'ibmcloud_batch_loop' task variable it behaves like the
+    'normal' action plugin. When the variable is true and the task loops
+    over items, all items creating a new resource are applied in a
+    single Terraform working directory with one 'terraform apply' on the
+    controller, when the first item runs. Every item still reports its
+    own 'changed'/'failed' result. Terraform runs with the task's
+    'environment' templated for each item, so only items with equal
+    environments share a run. Items that cannot be batched (e.g. with
+    'id', 'state: absent', or a data source lookup that may find an
+    existing resource) run the module as usual.
+    """
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = None
+        if self._batching_enabled(task_vars):
+            result = self._batched_result(task_vars)
+        if result is None:
+            return super(ActionModule, self).run(tmp, task_vars)
+        return result
+
+    def _batching_enabled(self, task_vars):
+        if 'ansible_loop_var' not in task_vars or BATCH_VAR not in task_vars:
+            return False
+        if not boolean(self._templar.template(task_vars[BATCH_VAR]), strict=False):
+            return False
+        # Only plain 'loop' without per item conditionals or retries, and
+        # only where the module would run on the controller anyway
+        return (
+            self._task.loop is not None and
+            not self._task.loop_with and
+            not self._task.when and
+            not self._task.until and
+            not self._task.async_val and
+            not self._play_context.check_mode and
+            getattr(self._connection, 'transport', None) in (
+                'local', 'ansible.builtin.local'))
+
+    def _batched_result(self, task_vars):
+        key = (self._task._uuid, task_vars.get('inventory_hostname'))
+        if key not in _BATCHES:
+            items = self._templar.template(self._task.loop)
+            try:
+                _BATCHES[key] = self._run_batch(task_vars, items)
+            except Exception as err:
+                display.warning(
+                    "Loop batching disabled for task '%s': %s" %
+                    (self._task.get_name(), err))
+                _BATCHES[key] = {
+                    'items': items, 'results': [None] * len(items),
+                    'used': set(), 'runs': 0}
+        batch = _BATCHES[key]
+
+        batch['runs'] += 1
+        if batch['runs'] >= len(batch['items']):
+            del _BATCHES[key]
+
+        item = task_vars[task_vars['ansible_loop_var']]
+        for index, batch_item in enumerate(batch['items']):
+            if index not in batch['used'] and batch_item == item:
+                batch['used'].add(index)
+                return batch['results'][index]
+        return None
+
+    def _run_batch(self, task_vars, items):
+        loop_var = task_vars['ansible_loop_var']
+        index_var = task_vars.get('ansible_index_var')
+        batch = {
+            'items': items, 'results': [None] * len(items),
+            'used': set(), 'runs': 0}
+
+        _, args, _ = ModuleArgsParser(
+            self._task.get_ds(), collection_list=self._task.collections).parse()
+        if '_variable_params' in args or '_raw_params' in args:
+            return batch
+
+        module_name = self._task.action.split('.')[-1]
+        module = import_module('{}.{}'.format(MODULES_PACKAGE, module_name))
+        if getattr(module, 'TF_TYPE', None) != 'resource':
+            return batch
+        resource_type = module.RESOURCE_TYPE
+        ibm_provider_version = module.IBM_PROVIDER_VERSION
+        lookup = getattr(module, 'DATA_SOURCE_LOOKUP', False)
+
+        # Template and validate the module arguments of every item, and
+        # group the batchable items by provider configuration
+        groups = {}
+        for index, item in enumerate(items):
+            item_vars = dict(task_vars)
+            item_vars[loop_var] = item
+            if index_var:
+                item_vars[index_var] = index
+            templar = self._templar.copy_with_new_env(available_variables=item_vars)
+            item_args = templar.template(args)
+            omit = task_vars.get('omit')
+            item_args = dict(
+                (k, v) for k, v in item_args.items()
+                if omit is None or v != omit)
+
+            validation = ArgumentSpecValidator(module.module_args).validate(item_args)
+            if validation.error_messages:
+                continue
+            params = validation.validated_parameters
+            if not self._batchable(module, params, lookup):
+                continue
+            # The modules would run with the task's 'environment'
+            environment = self._task_environment(templar)
+            group = (
+                tuple(params.get(name) for name in PROVIDER_PARAMETERS) +
+                (tuple(sorted(environment.items())),))
+            groups.setdefault(group, []).append(
+                (index, params, validation._no_log_values))
+
+        for group, members in groups.items():
+            env = dict(os.environ)
+            env.update(group[-1])
+            results = ibmcloud_terraform_batch(
+                resource_type=resource_type,
+                parameters_list=[params for _, params, _ in members],
+                ibm_provider_version=ibm_provider_version,
+                tl_required_params=module.TL_REQUIRED_PARAMETERS,
+                tl_all_params=module.TL_ALL_PARAMETERS,
+                env=env)
+            for (index, _, no_log_values), result in zip(members, results):
+                if result['rc'] > 0:
+                    result['failed'] = True
+                    result['msg'] = Terraform.parse_stderr(result['stderr'])
+                batch['results'][index] = remove_values(result, no_log_values)
+            display.vvv(
+                "Applied %d loop items of '%s' in one Terraform run" %
+                (len(members), self._task.get_name()))
+
+        return batch
+
+    def _task_environment(self, templar):
+        """
+        The 'environment' keyword of the task and its parents templated
+        for a loop item. The task itself was already templated for the
+        current item only, so start from the untemplated values.
+        """
+        environments = []
+        if self._task._parent is not None:
+            environments.extend(self._task._parent.environment or [])
+        own = self._task.get_ds().get('environment')
+        if isinstance(own, list):
+            environments.extend(own)
+        elif own:
+            environments.append(own)
+        environment = self._task._post_validate_environment(
+            'environment', environments, templar)
+        return dict((str(k), str(v)) for k, v in environment.items())
+
+    @staticmethod
+    def _batchable(module, params, lookup):
+        """
+        Whether the module would create a new resource for these
+        parameters without any other Terraform run before.
+        """
+        if params.get('state') != 'available' or params.get('id') is not None:
+            return False
+
+        # Same argument checks as the module, failures are reported by
+        # the module itself
+        checks = argument_checks(
+            module.RESOURCE_TYPE, module.TL_REQUIRED_PARAMETERS,
+            module.TL_CONFLICTS_MAP)
+        if checks.missing(params) or checks.conflicts(params):
+            return False
+        if params.get('generation') == 1:
+            return False
+        if params.get('generation') == 2 and params.get('ibmcloud_api_key') is None:
+            return False
+
+        # The module first looks up an existing resource with the data
+        # source; the lookup can only fail if a required argument of
+        # the data source is missing
+        if lookup:
+            return any(
+                params.get(arg) is None
+                for arg, _ in module.TL_REQUIRED_PARAMETERS_DS)
+        return True
@@ -28,10 +28,37 @@ options:
     regions:
         description: List of IBM Cloud regions to query.
         default: []
+    concurrency:
+        description:
+            - Maximum number of regions queried at the same time.
+            - Hosts are added to the inventory in the order of I(regions), regardless of which region
+              query finishes first. A failing region is reported as a warning and does not stop the
+              other regions from being added.
+        type: int
+        default: 4
+    region_cache_timeout:
+        description:
+            - With C(cache) enabled, the hosts of each region are cached separately. This is the age in seconds
+              after which the cached hosts of a region are refreshed.
+            - A region whose entry is older is still taken from the cache, so the inventory loads without waiting,
+              and refreshed for the next runs by a detached C(ansible-inventory) process with the same inventory
+              source. Only one process at a time refreshes a region. Regions the cache plugin has expired after
+              C(cache_timeout) are queried right away.
+            - The default of 0 disables the background refresh, cached regions are then used until
+              C(cache_timeout) expires them.
+        type: int
+        default: 0
     filters:
         description:
             - A key value pair for filtering by various VSI attributes.
               Only results matching the filter will be included in the inventory.
+            - Keys are attribute paths, nested attributes are separated by dots and list elements are selected with
+              C([<index>]), e.g. C(primary_network_interface[0].subnet). A key applied to a list selects it from
+              every element, and the filter matches if any of them does.
+            - A value matches an equal attribute, and a list of values matches a list attribute containing all of
+              them. A dictionary of operators matches if all of them do; the operators are C(in) (list of values),
+              C(regex), C(not) (any filter value) and the numeric C(eq), C(ne), C(gt), C(ge), C(lt) and C(le).
+              C(in), C(regex) and the numeric operators match any element of a list attribute.
         default: {}
     groups:
         description: Add VSI hosts to group based on Jinja2 conditionals.
@@ -66,8 +93,17 @@ options:
             - Indicates whether or not to use Floating IP addresses instead of the private IP addresses
               for a VSI. If this value is True, all instances that do not have a Floating IP address will
               be filtered out when building the inventory.
-            - Since the correlation between Floating IP and VSI belongs to the Floating IP, additional queries need
-              to be done which may increase the time to generate the inventory.
+            - Since the correlation between Floating IP and VSI belongs to the Floating IP, the floating IPs and
+              virtual network interfaces of the region are read as well, which may increase the time to generate
+              the inventory.
+        type: bool
+        default: False
+    include_bare_metal_servers:
+        description:
+            - Indicates whether or not to add the bare metal servers of the regions to the inventory, in addition
+              to the VSIs. Bare metal servers are read in the same Terraform run as the VSIs.
+            - The C(host_type) variable of a host is C(instance) for VSIs and C(bare_metal_server) for bare metal
+              servers, and can be used in filters and groups.
         type: bool
         default: False
     fail_on_duplicate:
@@ -135,6 +171,23 @@ compose:
   vpc: vpc
   tags: tags
 
+# Generate an inventory of running VSIs with at least 16 GB memory outside of zone us-south-3,
+# whose primary network interface is attached to one of two subnets.
+plugin: ibm.cloudcollection.vpc_inventory
+regions:
+  - us-south
+filters:
+  status: 'running'
+  memory:
+    ge: 16
+  zone:
+    not:
+      regex: '-3$'
+  primary_network_interface[0].subnet:
+    in:
+      - 0717-xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxx1
+      - 0717-xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxx2
+
 # Generate an inventory of running systems that excludes VSI by IP, name, and ID.
 plugin: ibm.cloudcollection.vpc_inventory
 regions:
@@ -164,12 +217,24 @@ compose:
   memory: memory
 '''
 
+import hashlib
+import operator
+import os
+import re
+import sys
+import time
+from collections.abc import Hashable
+from concurrent.futures import ThreadPoolExecutor
+
 from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
-from ansible.module_utils.six import string_types, viewitems
+from ansible.module_utils.six import string_types
 from ansible.errors import AnsibleParserError
-from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import ibmcloud_terraform
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    DEFAULT_TF_DIR, FileLock, ibmcloud_terraform_data, makedirs_shared, parse_return_fields,
+    project_attributes)
 from ansible.config.manager import ensure_type
 from ansible.template import Templar
+from jinja2 import Environment, TemplateSyntaxError, nodes
 
 from ansible.utils.display import Display
 display = Display()
@@ -196,6 +261,33 @@ TL_ALL_PARAMETERS = [
     'placement_group',
 ]
 
+TL_ALL_PARAMETERS_BARE_METAL_SERVERS = [
+    'vpc',
+    'vpc_name',
+    'vpc_crn',
+    'resource_group',
+    'network_interfaces_subnet',
+    'network_interfaces_subnet_crn',
+    'network_interfaces_subnet_name',
+]
+
+TL_ALL_PARAMETERS_FLOATING_IPS = [
+    'name',
+    'resource_group',
+]
+
+TL_ALL_PARAMETERS_VIRTUAL_NETWORK_INTERFACES = [
+]
+
+# IBM Cloud Terraform provider version of the data sources
+IBM_PROVIDER_VERSION = '1.71.2'
+
+# Data sources a region is added without if they fail
+OPTIONAL_DATA_SOURCES = ('ibm_is_floating_ips', 'ibm_is_virtual_network_interfaces')
+
+# Regions queried by a cache refresh process, comma separated
+REFRESH_ENV = 'IBMCLOUD_ANSIBLE_INVENTORY_REFRESH'
+
 
 def init_logger():
     logging.basicConfig(
@@ -204,6 +296,134 @@ def init_logger():
         level=logging.DEBUG)
 
 
+class HostFilter:
+    """
+    Filter on a host attribute, compiled once from an entry of the
+    'filters' option and then tested against every host.
+
+    Attribute paths are dot separated keys, '[<index>]' selects a list
+    element, e.g.: 'primary_network_interface[0].subnet'. A key applied
+    to a list selects it from every element, and the filter matches if
+    any of the selected values does.
+
+    The filter value is compared for equality, a list must be a subset
+    of a list attribute, and a dictionary of operators tests all of them:
+    'in' (list of values), 'regex', 'not' (nested filter value) and the
+    numeric 'eq', 'ne', 'gt', 'ge', 'lt' and 'le'. 'in', 'regex' and the
+    numeric operators test the elements of list attributes.
+
+    Args:
+        path (str): Attribute path
+        value: Filter value
+    """
+    NUMERIC_OPERATORS = {
+        'eq': operator.eq,
+        'ne': operator.ne,
+        'gt': operator.gt,
+        'ge': operator.ge,
+        'lt': operator.lt,
+        'le': operator.le,
+    }
+    OPERATORS = ('in', 'regex', 'not') + tuple(NUMERIC_OPERATORS)
+
+    def __init__(self, path, value):
+        self.path = path
+        self.keys = []
+        for part in str(path).split('.'):
+            match = re.match(r'^([^\[\]]*)((?:\[(?:\*|\d+)\])*)$', part)
+            if match is None or not (match.group(1) or match.group(2)):
+                raise AnsibleParserError("Invalid filter attribute path '%s'" % path)
+            if match.group(1):
+                self.keys.append(match.group(1))
+            self.keys.extend(int(index) for index in re.findall(r'\[(\d+)\]', match.group(2)))
+        if not isinstance(self.keys[0], string_types):
+            raise AnsibleParserError("Invalid filter attribute path '%s'" % path)
+        self.test = self._compile(value)
+
+    def __call__(self, host):
+        return self.test(self.resolve(host))
+
+    def resolve(self, host):
+        """
+        Returns:
+            list: Values selected by the attribute path, empty if the
+                  host does not have the attribute
+        """
+        if len(self.keys) == 1:
+            return [host[self.keys[0]]] if self.keys[0] in host else []
+
+        values = [host]
+        for key in self.keys:
+            selected = []
+            for value in values:
+                if isinstance(key, int):
+                    if isinstance(value, list) and key < len(value):
+                        selected.append(value[key])
+                elif isinstance(value, dict):
+                    if key in value:
+                        selected.append(value[key])
+                elif isinstance(value, list):
+                    selected.extend(e[key] for e in value if isinstance(e, dict) and key in e)
+            values = selected
+        return values
+
+    @staticmethod
+    def _elements(values):
+        # Values with the elements of list values in place of the lists
+        for value in values:
+            if isinstance(value, list):
+                for element in value:
+                    yield element
+            else:
+                yield value
+
+    def _compile(self, value):
+        if isinstance(value, dict) and value and all(k in self.OPERATORS for k in value):
+            tests = [self._compile_operator(name, operand) for name, operand in value.items()]
+            return lambda values: all(test(values) for test in tests)
+
+        if isinstance(value, list):
+            try:
+                subset = frozenset(value)
+            except TypeError:
+                raise AnsibleParserError("Filter values of '%s' must be strings or numbers" % self.path)
+            return lambda values: any(isinstance(v, list) and subset.issubset(v) for v in values)
+
+        return lambda values: any(v == value for v in values)
+
+    def _compile_operator(self, name, operand):
+        elements = self._elements
+
+        if name == 'not':
+            test = self._compile(operand)
+            return lambda values: not test(values)
+
+        if name == 'in':
+            if not isinstance(operand, list):
+                raise AnsibleParserError("The 'in' filter of '%s' needs a list" % self.path)
+            try:
+                choices = frozenset(operand)
+            except TypeError:
+                raise AnsibleParserError("Filter values of '%s' must be strings or numbers" % self.path)
+            return lambda values: any(isinstance(v, Hashable) and v in choices for v in elements(values))
+
+        if name == 'regex':
+            try:
+                pattern = re.compile(operand)
+            except (re.error, TypeError) as err:
+                raise AnsibleParserError("Invalid 'regex' filter of '%s': %s" % (self.path, err))
+            return lambda values: any(
+                isinstance(v, (string_types, int, float)) and pattern.search(str(v)) is not None
+                for v in elements(values))
+
+        if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+            raise AnsibleParserError("The '%s' filter of '%s' needs a number" % (name, self.path))
+        compare = self.NUMERIC_OPERATORS[name]
+        return lambda values: any(
+            isinstance(v, (int, float)) and not isinstance(v, bool) and compare(v, operand)
+            for v in elements(values))
+
+
 class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
     NAME = 'ibm.cloudcollection.vpc_inventory'
@@ -242,32 +462,15 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         # get the user's cache option too to see if we should save the cache if it is changing
         user_cache_setting = self.get_option('cache')
 
-        # read if the user has caching enabled and the cache isn't being refreshed
-        attempt_to_read_cache = user_cache_setting and cache
-
-        # update if the user has caching enabled and the cache is being refreshed;
-        # update this value to True if the cache has expired below
-        cache_needs_update = user_cache_setting and not cache
-
-        # attempt to read the cache if inventory isn't being refreshed and the user has caching enabled
-        if attempt_to_read_cache:
-            try:
-                vsis = self._cache[cache_key]
-            except KeyError:
-                # This occurs if the cache_key is not in the cache or if the cache_key expired,
-                # so the cache needs to be updated
-                logger.debug("Cache needs to be updated: %s", cache_key)
-                cache_needs_update = True
-
-        if not attempt_to_read_cache or cache_needs_update:
-            # parse the provided inventory source
-            # submit the parsed data to the inventory object (add_host, set_variable, etc)
-            self.template_handle = Templar(loader=loader)
+        # parse the provided inventory source
+        # submit the parsed data to the inventory object (add_host, set_variable, etc)
+        self.template_handle = Templar(loader=loader)
+        if user_cache_setting:
+            # read the cache unless the inventory is being refreshed
+            vsis = self._get_cached_virtual_server_instances(path, cache_key, read_cache=cache)
+        else:
             vsis = self.get_virtual_server_instances()
 
-        if cache_needs_update:
-            self._cache[cache_key] = vsis
-
         self._populate_from_vsis(vsis)
 
     def _populate_from_vsis(self, vsis):
@@ -314,54 +517,12 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
                     continue
 
     def get_virtual_server_instances(self):
-        vsis = []
-        for region in self.regions:
-            result = ibmcloud_terraform(
-                resource_type='ibm_is_instances',
-                tf_type='data',
-                parameters={"region": region},
-                ibm_provider_version='1.49.0',
-                tl_required_params=TL_REQUIRED_PARAMETERS,
-                tl_all_params=TL_ALL_PARAMETERS
-            )
-
-            if result['rc'] > 0:
-                logging.error(result['stderr'])
-                instances = {}
-            else:
-                instances = result.get("resource").get("instances")
-                for i in instances:
-                    # Add the region to the VSI dictionary to be filtered on
-                    i['region'] = region
-
-                vsis.extend(instances)
-
-            if instances and self.use_floating_ips:
-                result = ibmcloud_terraform(
-                    resource_type='ibm_is_floating_ips',
-                    tf_type='data',
-                    parameters={"region": region},
-                    ibm_provider_version='1.49.0',
-                    tl_required_params=TL_REQUIRED_PARAMETERS,
-                    tl_all_params=TL_ALL_PARAMETERS
-                )
+        return self._select_vsis(self._query_regions(self.regions))
 
-                if result['rc'] > 0:
-                    logging.error(result['stderr'])
-
-                fips = result.get("resource").get("floating_ips")
-                bound_fips = [f for f in fips if len(f.get("target")) > 0]
-                for fip in bound_fips:
-                    # Assumption #1: Floating IPs can only target one VSI
-                    fip_addr = fip.get("address")
-                    target_id = fip.get("target")[0].get("id")
-
-                    for instance in instances:
-                        # Assumption #2: VSIs may only have one Floating IP
-                        instance_interfaces = [i.get("id") for i in instance.get("primary_network_interface")]
-                        
-                        if target_id in instance_interfaces:
-                            instance['floating_ip'] = fip_addr
+    def _select_vsis(self, region_hosts):
+        # Add the hosts in the order of the regions, which keeps the
+        # inventory deterministic whatever region answers first
+        vsis = [v for region in self.regions for v in region_hosts.get(region, [])]
 
         # If using Floating IPs, remove VSIs that don't have one
         if self.use_floating_ips:
@@ -369,11 +530,231 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
         return vsis
 
+    def _query_regions(self, regions, warn=True):
+        """
+        Query the hosts of the regions in parallel. Returns a dictionary
+        with the list of hosts per region; failed regions are left out.
+        """
+        region_hosts = {}
+        if not regions:
+            return region_hosts
+
+        max_workers = max(1, min(self.concurrency, len(regions)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for region, hosts, error, warnings in executor.map(
+                    self._get_region_instances, regions):
+                for warning in warnings:
+                    logger.warning("Region %s: %s", region, warning)
+                    if warn:
+                        display.warning("Region %s: %s" % (region, warning))
+                if error:
+                    logger.error("Region %s: %s", region, error)
+                    if warn:
+                        display.warning("Skipping region %s: %s" % (region, error))
+                    continue
+                region_hosts[region] = hosts
+
+        return region_hosts
+
+    def _get_cached_virtual_server_instances(self, path, cache_key, read_cache):
+        """
+        Get the hosts from the cache, which holds one entry per region.
+        Regions that are not cached are queried right away. Regions
+        cached for longer than region_cache_timeout are used as they
+        are, and refreshed by another process for the next runs.
+        """
+        # Regions to query again in a refresh process, see '_start_refresh()'
+        refresh = [r for r in os.environ.get(REFRESH_ENV, '').split(',') if r]
+
+        region_hosts = {}
+        stale = []
+        now = time.time()
+        for region in self.regions:
+            if region in refresh:
+                continue
+            entry = self._cache.get(self._region_cache_key(cache_key, region)) if read_cache else None
+            if not isinstance(entry, dict) or "hosts" not in entry:
+                logger.debug("Cache needs to be updated: %s", region)
+                continue
+            region_hosts[region] = entry["hosts"]
+            if self.region_cache_timeout and now - entry.get("timestamp", 0) >= self.region_cache_timeout:
+                stale.append(region)
+
+        missing = [r for r in self.regions if r not in region_hosts]
+        for region, hosts in self._query_regions(missing, warn=not refresh).items():
+            region_hosts[region] = hosts
+            self._cache[self._region_cache_key(cache_key, region)] = {"timestamp": now, "hosts": hosts}
+
+        if stale and not refresh:
+            self._start_refresh(path, cache_key, stale)
+
+        return self._select_vsis(region_hosts)
+
+    def _region_cache_key(self, cache_key, region):
+        # The hosts of a region also depend on the options selecting them
+        # and on the attributes they keep
+        options = "%s_%s_%s" % (self.use_floating_ips, self.include_bare_metal_servers, self.host_fields)
+        return "%s_%s_%s" % (cache_key, region, hashlib.sha256(options.encode()).hexdigest()[:6])
+
+    def _start_refresh(self, path, cache_key, regions):
+        """
+        Refresh the cache entries of the regions in a detached
+        'ansible-inventory' process for the same inventory source, which
+        queries the regions named in REFRESH_ENV and writes the cache.
+        Neither does the controller wait for it, nor do its forks share
+        any of its state. A region is only refreshed by one process at a
+        time; the others keep using the stale entry.
+        """
+        import subprocess
+
+        lock_dir = os.path.join(
+            os.environ.get('IBMCLOUD_ANSIBLE_TERRAFORM_DIR', DEFAULT_TF_DIR), 'inventory_refresh')
+        makedirs_shared(lock_dir)
+
+        locks = []
+        for region in regions:
+            key = self._region_cache_key(cache_key, region)
+            lock = FileLock(os.path.join(lock_dir, hashlib.sha256(key.encode()).hexdigest() + '.lock'))
+            if lock.acquire(blocking=False):
+                locks.append((region, lock))
+            else:
+                logger.debug("Region %s is refreshed by another process", region)
+        if not locks:
+            return
+
+        env = dict(os.environ)
+        env[REFRESH_ENV] = ','.join(region for region, _ in locks)
+        try:
+            # The refresh process inherits the locks and holds them until
+            # it exits
+            subprocess.Popen(
+                [sys.executable, '-m', 'ansible', 'inventory', '-i', path, '--list', '--output', os.devnull],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=[lock.fd for _, lock in locks],
+                start_new_session=True)
+            logger.debug("Refreshing regions: %s", env[REFRESH_ENV])
+        except OSError as err:
+            logger.error("Refreshing the cache failed: %s", err)
+        finally:
+            for _, lock in locks:
+                os.close(lock.fd)
+                lock.fd = None
+
+    def _get_region_instances(self, region):
+        """
+        Query the hosts of one region. Runs in a worker thread, so any
+        error is returned instead of raised to only skip this region.
+        The data sources correlating Floating IPs are optional; if they
+        cannot be read (e.g.: missing permissions), a warning is
+        returned and the hosts are added without them.
+        """
+        # All data sources of the region are read in one Terraform run
+        data_sources = [
+            ('ibm_is_instances', TL_REQUIRED_PARAMETERS, TL_ALL_PARAMETERS)]
+        if self.include_bare_metal_servers:
+            data_sources.append((
+                'ibm_is_bare_metal_servers',
+                TL_REQUIRED_PARAMETERS,
+                TL_ALL_PARAMETERS_BARE_METAL_SERVERS))
+        if self.use_floating_ips:
+            data_sources.append((
+                'ibm_is_floating_ips',
+                TL_REQUIRED_PARAMETERS,
+                TL_ALL_PARAMETERS_FLOATING_IPS))
+            data_sources.append((
+                'ibm_is_virtual_network_interfaces',
+                TL_REQUIRED_PARAMETERS,
+                TL_ALL_PARAMETERS_VIRTUAL_NETWORK_INTERFACES))
+
+        try:
+            results = ibmcloud_terraform_data(
+                data_sources=data_sources,
+                parameters={"region": region},
+                ibm_provider_version=IBM_PROVIDER_VERSION
+            )
+
+            resources = {}
+            warnings = []
+            for data_source, result in zip(data_sources, results):
+                if result['rc'] > 0:
+                    if data_source[0] not in OPTIONAL_DATA_SOURCES:
+                        return region, [], result['stderr'], warnings
+                    warnings.append("%s not read, Floating IPs may be missing: %s" % (
+                        data_source[0], result['stderr'].strip()))
+                    continue
+                resources[data_source[0]] = result.get("resource")
+
+            hosts = []
+            for resource_type, key, host_type in (
+                    ('ibm_is_instances', 'instances', 'instance'),
+                    ('ibm_is_bare_metal_servers', 'servers', 'bare_metal_server')):
+                for host in (resources.get(resource_type) or {}).get(key) or []:
+                    # Add the region and the kind of host to the dictionary
+                    # to be filtered on
+                    host['region'] = region
+                    host['host_type'] = host_type
+                    hosts.append(host)
+
+            if hosts and self.use_floating_ips:
+                fips = (resources.get('ibm_is_floating_ips') or {}).get("floating_ips") or []
+                vnis = (resources.get('ibm_is_virtual_network_interfaces') or {}).get(
+                    "virtual_network_interfaces") or []
+                interfaces = self.index_instance_interfaces(hosts)
+                # Floating IPs of VNIs are matched with the VNI's target,
+                # the network attachment of the host
+                vni_targets = dict(
+                    (vni.get("id"), vni.get("target")[0].get("id"))
+                    for vni in vnis if vni.get("target"))
+                for fip in fips:
+                    # Assumption #1: Floating IPs can only target one host
+                    if not fip.get("target"):
+                        continue
+                    target_id = fip.get("target")[0].get("id")
+                    host = interfaces.get(target_id)
+                    if host is None:
+                        host = interfaces.get(vni_targets.get(target_id))
+
+                    # Assumption #2: Hosts may only have one Floating IP
+                    if host is not None:
+                        host['floating_ip'] = fip.get("address")
+            if self.host_fields_tree is not None:
+                # Only keep the attributes used to build the inventory
+                hosts = [project_attributes(host, self.host_fields_tree) for host in hosts]
+        except Exception as err:
+            return region, [], str(err), []
+
+        return region, hosts, None, warnings
+
+    @staticmethod
+    def index_instance_interfaces(instances):
+        """
+        Map the IDs of all network interfaces of the instances or bare
+        metal servers to their host. Floating IPs target a network interface, or with the
+        network attachment model, a virtual network interface (VNI).
+        """
+        interfaces = {}
+        for instance in instances:
+            for key in ("primary_network_interface", "network_interfaces"):
+                for nic in instance.get(key) or []:
+                    interfaces[nic.get("id")] = instance
+            for key in ("primary_network_attachment", "network_attachments"):
+                for attachment in instance.get(key) or []:
+                    interfaces[attachment.get("id")] = instance
+                    for vni in attachment.get("virtual_network_interface") or []:
+                        interfaces[vni.get("id")] = instance
+        interfaces.pop(None, None)
+        return interfaces
+
     def _configure(self, path):
         config = self._read_config_data(path)
 
         args = dict(
             regions=dict(type="list", value=config.get("regions", []), required=True),
+            concurrency=dict(type="int", value=config.get("concurrency", 4)),
+            region_cache_timeout=dict(type="int", value=config.get("region_cache_timeout", 0), minimum=0),
             filters=dict(type="dict", value=config.get("filters", {})),
             groups=dict(type="dict", value=config.get("groups", {})),
             keyed_groups=dict(type="list", value=config.get("keyed_groups", [])),
@@ -383,6 +764,7 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
             exclude_id=dict(type="list", value=config.get("exclude_id", [])),
             exclude_tag=dict(type="list", value=config.get("exclude_tag", [])),
             use_floating_ips=dict(type="bool", value=config.get("use_floating_ips", False)),
+            include_bare_metal_servers=dict(type="bool", value=config.get("include_bare_metal_servers", False)),
             fail_on_duplicate=dict(type="bool", value=config.get("fail_on_duplicate", True)),
             ansible_display_name=dict(type="str", choices=["name", "ip", "id"], value=config.get("ansible_display_name", "name")),
             ansible_host_type=dict(type="str", choices=["name", "ip"], value=config.get("ansible_host_type", "ip")),
@@ -390,6 +772,62 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
         self.validate_and_set_args(args)
 
+        # Compile the filters and exclusions once for all hosts
+        self.host_filters = [HostFilter(path, value) for path, value in self.filters.items()]
+        self.excluded_ips = frozenset(self.exclude_ip)
+        self.excluded_names = frozenset(self.exclude_name)
+        self.excluded_ids = frozenset(self.exclude_id)
+        self.excluded_tags = frozenset(self.exclude_tag)
+
+        self.host_fields = self.get_host_fields()
+        self.host_fields_tree = None
+        if self.host_fields is not None:
+            self.host_fields_tree = parse_return_fields(self.host_fields)
+
+    def get_host_fields(self):
+        """
+        Attribute paths of the hosts that are used to build the inventory:
+        the variables referenced by compose, groups and keyed_groups, the
+        filtered attributes, and the ones read for names, IP addresses and
+        exclusions. Hosts only keep these attributes, in memory and in the
+        cache. Returns None if all attributes have to be kept.
+        """
+        templates = ["{{ %s }}" % e for e in list(self.compose.values()) + list(self.groups.values())
+                     if isinstance(e, string_types)]
+        for keyed_group in self.keyed_groups:
+            if not isinstance(keyed_group, dict):
+                continue
+            if isinstance(keyed_group.get("key"), string_types):
+                templates.append("{{ %s }}" % keyed_group.get("key"))
+            if isinstance(keyed_group.get("parent_group"), string_types):
+                templates.append(keyed_group.get("parent_group"))
+
+        # Variable names loaded by the Jinja2 templates. Names assigned
+        # within a template, e.g. loop variables, are included as well,
+        # which only keeps attributes that are not used.
+        environment = Environment()
+        fields = set()
+        for template in templates:
+            try:
+                ast = environment.parse(template)
+            except TemplateSyntaxError:
+                return None
+            fields.update(node.name for node in ast.find_all(nodes.Name) if node.ctx == "load")
+        if "vars" in fields:
+            # All host variables may be used by name
+            return None
+
+        # Filtered attributes are kept as a whole, their paths may select
+        # other list elements than the ones kept below
+        fields.update(host_filter.keys[0] for host_filter in self.host_filters if host_filter.keys)
+        fields.update(["id", "name", "floating_ip", self.ansible_display_name])
+        if self.exclude_tag:
+            fields.add("tags")
+        paths = sorted(fields)
+        for key in ("primary_network_interface", "primary_network_attachment"):
+            paths.append("%s[0].primary_ip[0].address" % key)
+        return paths
+
     def validate_and_set_args(self, args):
         for arg in args:
             if args[arg].get("required") and args[arg].get("value") is None:
@@ -413,6 +851,12 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
                     setattr(self, arg, args[arg].get("value"))
                 else:
                     raise AnsibleParserError("%s must be a boolean value. Current value is: %s" % (arg, args[arg].get("value")))
+            elif args[arg]["type"] == 'int':
+                value = args[arg].get("value")
+                minimum = args[arg].get("minimum", 1)
+                if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+                    raise AnsibleParserError("%s must be an integer of at least %d. Current value is: %s" % (arg, minimum, value))
+                setattr(self, arg, value)
             elif args[arg]["type"] == 'list':
                 if not isinstance(args[arg].get("value"), list):
                     raise AnsibleParserError("%s is currently %s and needs to be defined as a %s." % (arg, args[arg].get("value"), 'list'))
@@ -435,13 +879,14 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
                 return vsi.get("floating_ip")
             raise Exception("VSI has no value for 'floating_ip'")
         else:
-            if ("primary_network_interface" in vsi
-                and len(vsi.get("primary_network_interface")) > 0
-                and "primary_ip" in vsi.get("primary_network_interface")[0]
-                and len(vsi.get("primary_network_interface")[0].get("primary_ip")) > 0
-                and "address" in vsi.get("primary_network_interface")[0].get("primary_ip")[0]
-            ):
-                return vsi.get("primary_network_interface")[0].get("primary_ip")[0].get("address")
+            # VSIs use either network interfaces or, with the newer network
+            # attachment model, network attachments
+            for key in ("primary_network_interface", "primary_network_attachment"):
+                if (vsi.get(key)
+                    and vsi.get(key)[0].get("primary_ip")
+                    and vsi.get(key)[0].get("primary_ip")[0].get("address")
+                ):
+                    return vsi.get(key)[0].get("primary_ip")[0].get("address")
             raise Exception("VSI has no value for 'primary_ip'")
 
     def get_vsi_name(self, vsi):
@@ -461,53 +906,28 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
     def is_vsi_excluded(self, vsi):
         # VSI excluded due to IP address
-        try:
-            vsi_ip = self.get_vsi_ip(vsi)
-            if vsi_ip in self.exclude_ip:
-                return True
-        except Exception:
-            pass
-
-        # VSI excluded due to name
-        try:
-            vsi_name = self.get_vsi_name(vsi)
-            if vsi_name in self.exclude_name:
-                return True
-        except Exception:
-            pass
+        if self.excluded_ips:
+            try:
+                if self.get_vsi_ip(vsi) in self.excluded_ips:
+                    return True
+            except Exception:
+                pass
 
-        # VSI excluded due to ID
-        try:
-            vsi_id = self.get_vsi_id(vsi)
-            if vsi_id in self.exclude_id:
-                return True
-        except Exception:
-            pass
+        # VSI excluded due to name, ID or a tag
+        if self.excluded_names and vsi.get("name") in self.excluded_names:
+            return True
+        if self.excluded_ids and vsi.get("id") in self.excluded_ids:
+            return True
+        if self.excluded_tags and isinstance(vsi.get("tags"), list) and not self.excluded_tags.isdisjoint(vsi.get("tags")):
+            return True
 
-        # VSI excluded due to a tag
-        try:
-            vsi_tags = self.get_vsi_tags(vsi)
-            if any(t in vsi_tags for t in self.exclude_tag):
-                return True
-        except Exception:
-            pass
-        
         return False
 
     def matches_filters(self, vsi):
-        # Our filter should be a subset of our VSI if the VSI matches the filter items
-        non_list_filters = {k: v for k, v in self.filters.items() if not isinstance(v, list)}
-        list_filters = {k: v for k, v in self.filters.items() if isinstance(v, list)}
-
-        if viewitems(non_list_filters) <= viewitems(vsi):
-            # For filters that are lists, check to see if each item in the filter
-            # is present in the VSI's properties.
-            for k, v in list_filters.items():
-                if not set(v).issubset(vsi.get(k)):
-                    return False
-            return True
-
-        return False
+        for host_filter in self.host_filters:
+            if not host_filter(vsi):
+                return False
+        return True
 
     def vsi_should_be_included(self, vsi):
         if self.matches_filters(vsi) and not self.is_vsi_excluded(vsi):
@@ -2,381 +2,223 @@
 """
 Mozilla Public License, version 2.0
 
-1. Definitions
-
-1.1. “Contributor”
-
-     means each individual or legal entity that creates, contributes to the
-     creation of, or owns Covered Software.
-
-1.2. “Contributor Version”
-
-     means the combination of the Contributions of others (if any) used by a
-     Contributor and that particular Contributor’s Contribution.
-
-1.3. “Contribution”
-
-     means Covered Software of a particular Contributor.
-
-1.4. “Covered Software”
-
-     means Source Code Form to which the initial Contributor has attached the
-     notice in Exhibit A, the Executable Form of such Source Code Form, and
-     Modifications of such Source Code Form, in each case including portions
-     thereof.
-
-1.5. “Incompatible With Secondary Licenses”
-     means
-
-     a. that the initial Contributor has attached the notice described in
-        Exhibit B to the Covered Software; or
-
-     b. that the Covered Software was made available under the terms of version
-        1.1 or earlier of the License, but not also under the terms of a
-        Secondary License.
-
-1.6. “Executable Form”
-
-     means any form of the work other than Source Code Form.
-
-1.7. “Larger Work”
-
-     means a work that combines Covered Software with other material, in a separate
-     file or files, that is not Covered Software.
-
-1.8. “License”
-
-     means this document.
-
-1.9. “Licensable”
-
-     means having the right to grant, to the maximum extent possible, whether at the
-     time of the initial grant or subsequently, any and all of the rights conveyed by
-     this License.
-
-1.10. “Modifications”
-
-     means any of the following:
-
-     a. any file in Source Code Form that results from an addition to, deletion
-        from, or modification of the contents of Covered Software; or
-
-     b. any new file in Source Code Form that contains any Covered Software.
-
-1.11. “Patent Claims” of a Contributor
-
-      means any patent claim(s), including without limitation, method, process,
-      and apparatus claims, in any patent Licensable by such Contributor that
-      would be infringed, but for the grant of the License, by the making,
-      using, selling, offering for sale, having made, import, or transfer of
-      either its Contributions or its Contributor Version.
-
-1.12. “Secondary License”
-
-      means either the GNU General Public License, Version 2.0, the GNU Lesser
-      General Public License, Version 2.1, the GNU Affero General Public
-      License, Version 3.0, or any later versions of those licenses.
-
-1.13. “Source Code Form”
-
-      means the form of the work preferred for making modifications.
-
-1.14. “You” (or “Your”)
-
-      means an individual or a legal entity exercising rights under this
-      License. For legal entities, “You” includes any entity that controls, is
-      controlled by, or is under common control with You. For purposes of this
-      definition, “control” means (a) the power, direct or indirect, to cause
-      the direction or management of such entity, whether by contract or
-      otherwise, or (b) ownership of more than fifty percent (50%) of the
-      outstanding shares or beneficial ownership of such entity.
-
-
-2. License Grants and Conditions
-
-2.1. Grants
-
-     Each Contributor hereby grants You a world-wide, royalty-free,
-     non-exclusive license:
-
-     a. under intellectual property rights (other than patent or trademark)
-        Licensable by such Contributor to use, reproduce, make available,
-        modify, display, perform, distribute, and otherwise exploit its
-        Contributions, either on an unmodified basis, with Modifications, or as
-        part of a Larger Work; and
-
-     b. under Patent Claims of such Contributor to make, use, sell, offer for
-        sale, have made, import, and otherwise transfer either its Contributions
-        or its Contributor Version.
-
-2.2. Effective Date
-
-     The licenses granted in Section 2.1 with respect to any Contribution become
-     effective for each Contribution on the date the Contributor first distributes
-     such Contribution.
-
-2.3. Limitations on Grant Scope
-
-     The licenses granted in this Section 2 are the only rights granted under this
-     License. No additional rights or licenses will be implied from the distribution
-     or licensing of Covered Software under this License. Notwithstanding Section
-     2.1(b) above, no patent license is granted by a Contributor:
-
-     a. for any code that a Contributor has removed from Covered Software; or
-
-     b. for infringements caused by: (i) Your and any other third party’s
-        modifications of Covered Software, or (ii) the combination of its
-        Contributions with other software (except as part of its Contributor
-        Version); or
-
-     c. under Patent Claims infringed by Covered Software in the absence of its
-        Contributions.
-
-     This License does not grant any rights in the trademarks, service marks, or
-     logos of any Contributor (except as may be necessary to comply with the
-     notice requirements in Section 3.4).
-
-2.4. Subsequent Licenses
-
-     No Contributor makes additional grants as a result of Your choice to
-     distribute the Covered Software under a subsequent version of this License
-     (see Section 10.2) or under the terms of a Secondary License (if permitted
-     under the terms of Section 3.3).
-
-2.5. Representation
-
-     Each Contributor represents that the Contributor believes its Contributions
-     are its original creation(s) or it has sufficient rights to grant the
-     rights to its Contributions conveyed by this License.
-
-2.6. Fair Use
-
-     This License is not intended to limit any rights You have under applicable
-     copyright doctrines of fair use, fair dealing, or other equivalents.
-
-2.7. Conditions
-
-     Sections 3.1, 3.2, 3.3, and 3.4 are conditions of the licenses granted in
-     Section 2.1.
-
-
-3. Responsibilities
-
-3.1. Distribution of Source Form
-
-     All distribution of Covered Software in Source Code Form, including any
-     Modifications that You create or to which You contribute, must be under the
-     terms of this License. You must inform recipients that the Source Code Form
-     of the Covered Software is governed by the terms of this License, and how
-     they can obtain a copy of this License. You may not attempt to alter or
-     restrict the recipients’ rights in the Source Code Form.
-
-3.2. Distribution of Executable Form
-
-     If You distribute Covered Software in Executable Form then:
-
-     a. such Covered Software must also be made available in Source Code Form,
-        as described in Section 3.1, and You must inform recipients of the
-        Executable Form how they can obtain a copy of such Source Code Form by
-        reasonable means in a timely manner, at a charge no more than the cost
-        of distribution to the recipient; and
-
-     b. You may distribute such Executable Form under the terms of this License,
-        or sublicense it under different terms, provided that the license for
-        the Executable Form does not attempt to limit or alter the recipients’
-        rights in the Source Code Form under this License.
-
-3.3. Distribution of a Larger Work
-
-     You may create and distribute a Larger Work under terms of Your choice,
-     provided that You also comply with the requirements of this License for the
-     Covered Software. If the Larger Work is a combination of Covered Software
-     with a work governed by one or more Secondary Licenses, and the Covered
-     Software is not Incompatible With Secondary Licenses, this License permits
-     You to additionally distribute such Covered Software under the terms of
-     such Secondary License(s), so that the recipient of the Larger Work may, at
-     their option, further distribute the Covered Software under the terms of
-     either this License or such Secondary License(s).
-
-3.4. Notices
-
-     You may not remove or alter the substance of any license notices (including
-     copyright notices, patent notices, disclaimers of warranty, or limitations
-     of liability) contained within the Source Code Form of the Covered
-     Software, except that You may alter any license notices to the extent
-     required to remedy known factual inaccuracies.
-
-3.5. Application of Additional Terms
-
-     You may choose to offer, and to charge a fee for, warranty, support,
-     indemnity or liability obligations to one or more recipients of Covered
-     Software. However, You may do so only on Your own behalf, and not on behalf
-     of any Contributor. You must make it absolutely clear that any such
-     warranty, support, indemnity, or liability obligation is offered by You
-     alone, and You hereby agree to indemnify every Contributor for any
-     liability incurred by such Contributor as a result of warranty, support,
-     indemnity or liability terms You offer. You may include additional
-     disclaimers of warranty and limitations of liability specific to any
-     jurisdiction.
-
-4. Inability to Comply Due to Statute or Regulation
-
-   If it is impossible for You to comply with any of the terms of this License
-   with respect to some or all of the Covered Software due to statute, judicial
-   order, or regulation then You must: (a) comply with the terms of this License
-   to the maximum extent possible; and (b) describe the limitations and the code
-   they affect. Such description must be placed in a text file included with all
-   distributions of the Covered Software under this License. Except to the
-   extent prohibited by statute or regulation, such description must be
-   sufficiently detailed for a recipient of ordinary skill to be able to
-   understand it.
-
-5. Termination
-
-5.1. The rights granted under this License will terminate automatically if You
-     fail to comply with any of its terms. However, if You become compliant,
-     then the rights granted under this License from a particular Contributor
-     are reinstated (a) provisionally, unless and until such Contributor
-     explicitly and finally terminates Your grants, and (b) on an ongoing basis,
-     if such Contributor fails to notify You of the non-compliance by some
-     reasonable means prior to 60 days after You have come back into compliance.
-     Moreover, Your grants from a particular Contributor are reinstated on an
-     ongoing basis if such Contributor notifies You of the non-compliance by
-     some reasonable means, this is the first time You have received notice of
-     non-compliance with this License from such Contributor, and You become
-     compliant prior to 30 days after Your receipt of the notice.
-
-5.2. If You initiate litigation against any entity by asserting a patent
-     infringement claim (excluding declaratory judgment actions, counter-claims,
-     and cross-claims) alleging that a Contributor Version directly or
-     indirectly infringes any patent, then the rights granted to You by any and
-     all Contributors for the Covered Software under Section 2.1 of this License
-     shall terminate.
-
-5.3. In the event of termination under Sections 5.1 or 5.2 above, all end user
-     license agreements (excluding distributors and resellers) which have been
-     validly granted by You or Your distributors under this License prior to
-     termination shall survive termination.
-
-6. Disclaimer of Warranty
-
-   Covered Software is provided under this License on an “as is” basis, without
-   warranty of any kind, either expressed, implied, or statutory, including,
-   without limitation, warranties that the Covered Software is free of defects,
-   merchantable, fit for a particular purpose or non-infringing. The entire
-   risk as to the quality and performance of the Covered Software is with You.
-   Should any Covered Software prove defective in any respect, You (not any
-   Contributor) assume the cost of any necessary servicing, repair, or
-   correction. This disclaimer of warranty constitutes an essential part of this
-   License. No use of  any Covered Software is authorized under this License
-   except under this disclaimer.
-
-7. Limitation of Liability
-
-   Under no circumstances and under no legal theory, whether tort (including
-   negligence), contract, or otherwise, shall any Contributor, or anyone who
-   distributes Covered Software as permitted above, be liable to You for any
-   direct, indirect, special, incidental, or consequential damages of any
-   character including, without limitation, damages for lost profits, loss of
-   goodwill, work stoppage, computer failure or malfunction, or any and all
-   other commercial damages or losses, even if such party shall have been
-   informed of the possibility of such damages. This limitation of liability
-   shall not apply to liability for death or personal injury resulting from such
-   party’s negligence to the extent applicable law prohibits such limitation.
-   Some jurisdictions do not allow the exclusion or limitation of incidental or
-   consequential damages, so this exclusion and limitation may not apply to You.
-
-8. Litigation
-
-   Any litigation relating to this License may be brought only in the courts of
-   a jurisdiction where the defendant maintains its principal place of business
-   and such litigation shall be governed by laws of that jurisdiction, without
-   reference to its conflict-of-law provisions. Nothing in this Section shall
-   prevent a party’s ability to bring cross-claims or counter-claims.
-
-9. Miscellaneous
-
-   This License represents the complete agreement concerning the subject matter
-   hereof. If any provision of this License is held to be unenforceable, such
-   provision shall be reformed only to the extent necessary to make it
-   enforceable. Any law or regulation which provides that the language of a
-   contract shall be construed against the drafter shall not be used to construe
-   this License against a Contributor.
-
-
-10. Versions of the License
-
-10.1. New Versions
-
-      Mozilla Foundation is the license steward. Except as provided in Section
-      10.3, no one other than the license steward has the right to modify or
-      publish new versions of this License. Each version will be given a
-      distinguishing version number.
-
-10.2. Effect of New Versions
-
-      You may distribute the Covered Software under the terms of the version of
-      the License under which You originally received the Covered Software, or
-      under the terms of any subsequent version published by the license
-      steward.
-
-10.3. Modified Versions
-
-      If you create software not governed by this License, and you want to
-      create a new license for such software, you may create and use a modified
-      version of this License if you rename the license and remove any
-      references to the name of the license steward (except to note that such
-      modified license differs from this License).
-
-10.4. Distributing Source Code Form that is Incompatible With Secondary Licenses
-      If You choose to distribute Source Code Form that is Incompatible With
-      Secondary Licenses under the terms of this version of the License, the
-      notice described in Exhibit B of this License must be attached.
-
-Exhibit A - Source Code Form License Notice
-
-      This Source Code Form is subject to the
-      terms of the Mozilla Public License, v.
-      2.0. If a copy of the MPL was not
-      distributed with this file, You can
-      obtain one at
-      http://mozilla.org/MPL/2.0/.
-
-If it is not possible or desirable to put the notice in a particular file, then
-You may include the notice in a location (such as a LICENSE file in a relevant
-directory) where a recipient would be likely to look for such a notice.
-
-You may add additional accurate notices of copyright ownership.
-
-Exhibit B - “Incompatible With Secondary Licenses” Notice
-
-      This Source Code Form is “Incompatible
-      With Secondary Licenses”, as defined by
-      the Mozilla Public License, v. 2.0.
+Run Terraform with the IBM Cloud provider for the modules and plugins
+of this collection. See the LICENSE file of the collection for the
+full license text.
 
+This file is shipped with every module task. Modules that are only
+needed on some code paths are imported where they are used.
 """
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
-import jinja2
 from textwrap import dedent
 import os
-import platform
 import sys
-import shutil
 import re
 import json
+import codecs
 import time
+import hashlib
+import fcntl
+from stat import S_ISDIR
 from datetime import datetime
-from uuid import uuid4
 from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_native
 from ansible.module_utils.six import iteritems
 from ansible.module_utils.six import ensure_str
 from ansible.module_utils.six import string_types
-from ansible.errors import AnsibleError
 
 DEFAULT_TF_DIR = '/var/tmp/ansible/ibmcloud/'
 RM_OBJECT_SUBDIRS = True
+# Maximum number of idle, initialized workspaces kept for re-use. A
+# value of 0 disables the pool. Can also be set using the
+# 'IBMCLOUD_ANSIBLE_WORKSPACE_POOL_SIZE' environment variable.
+WORKSPACE_POOL_SIZE = 0
+# Maximum number of idle workspaces kept for a single provider
+# configuration. Can also be set using the
+# 'IBMCLOUD_ANSIBLE_WORKSPACE_POOL_KEY_SIZE' environment variable.
+WORKSPACE_POOL_KEY_SIZE = 8
+# Seconds a resident provider process is kept running without use.
+# Can also be set using the 'IBMCLOUD_ANSIBLE_RESIDENT_PROVIDER_TTL'
+# environment variable.
+RESIDENT_PROVIDER_TTL = 300
+# Seconds a cached resource state is used instead of an import. Can
+# also be set using the 'IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE_TTL'
+# environment variable.
+RESOURCE_STATE_CACHE_TTL = 3600
+# State files of at least this size are scanned for the projected
+# 'return_fields' instead of decoded as a whole, which is slower but
+# keeps the memory use low
+TFSTATE_SCAN_SIZE = 64 * 1024 * 1024
+# Bytes of output per stream that 'run_process()' keeps in memory
+RUN_PROCESS_BUFFER_SIZE = 1024 * 1024
+RUN_PROCESS_CHUNK_SIZE = 64 * 1024
+# Seconds between interrupting and killing a timed out process
+RUN_PROCESS_KILL_GRACE = 30
+# Installed Terraform and provider directories are marked with this
+# file once their release archive passed checksum verification
+VERIFIED_MARKER = '.ansible_verified'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+TERRAFORM_VERSION = '1.5.5'
+# IBM Cloud Terraform provider versions pinned by the modules and the
+# inventory plugin, included by default in offline bundles
+BUNDLE_PROVIDER_VERSIONS = ('1.14.0', '1.65.1', '1.71.2')
+
+# Argument checks of the resource modules, by resource type
+_ARGUMENT_CHECKS = {}
+
+
+def run_ibmcloud_module(
+        module_args,
+        resource_type,
+        tf_type,
+        ibm_provider_version,
+        tl_required_params,
+        tl_all_params,
+        tl_conflicts_map=None,
+        tl_required_params_ds=None,
+        tl_all_params_ds=None):
+    """
+    Run an Ansible Module of this collection. The modules only declare
+    their argument spec and Terraform parameter tables, this function
+    validates the arguments, runs Terraform and exits the module.
+
+    Args:
+        module_args (dict): Ansible Module argument spec
+        resource_type (str): Resource type (e.g.: 'ibm_is_vpc')
+        tf_type (str): Terraform block type ('resource' or 'data')
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        tl_required_params (list of tuple): Top Level Parameters
+            required by TF. Each tuple consists of two strings:
+            (<name>, <type>)
+        tl_all_params (list): Top Level Parameters supported by TF.
+        tl_conflicts_map (dict, optional): Parameters mapped to the
+            parameters they conflict with
+        tl_required_params_ds (list of tuple, optional): Top Level
+            Parameters required by the TF data source. If given, an
+            existing resource is looked up with the data source first
+            (see 'ibmcloud_terraform_lookup()').
+        tl_all_params_ds (list, optional): Top Level Parameters
+            supported by the TF data source
+    """
+    from ansible.module_utils.basic import AnsibleModule
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False
+    )
+    params = module.params
+
+    if tf_type == 'resource':
+        checks = argument_checks(
+            resource_type, tl_required_params, tl_conflicts_map)
+
+        # New resource required arguments checks
+        if params['id'] is None:
+            missing_args = checks.missing(params)
+            if missing_args:
+                module.fail_json(msg=(
+                    "missing required arguments: " + ", ".join(missing_args)))
+
+        conflicts = checks.conflicts(params)
+        if conflicts:
+            module.fail_json(msg=("conflicts exist: {}".format(conflicts)))
+
+    # VPC required arguments checks
+    if params.get('generation') == 1:
+        missing_args = [
+            arg for arg in ('iaas_classic_username', 'iaas_classic_api_key')
+            if params[arg] is None]
+        if missing_args:
+            module.fail_json(msg=(
+                "VPC generation=1 missing required arguments: " +
+                ", ".join(missing_args)))
+    elif params.get('generation') == 2:
+        if params['ibmcloud_api_key'] is None:
+            module.fail_json(
+                msg=("VPC generation=2 missing required argument: "
+                     "ibmcloud_api_key"))
+
+    if tl_required_params_ds is not None:
+        result = ibmcloud_terraform_lookup(
+            resource_type=resource_type,
+            parameters=params,
+            ibm_provider_version=ibm_provider_version,
+            tl_required_params=tl_required_params,
+            tl_all_params=tl_all_params,
+            tl_required_params_ds=tl_required_params_ds,
+            tl_all_params_ds=tl_all_params_ds)
+    else:
+        result = ibmcloud_terraform(
+            resource_type=resource_type,
+            tf_type=tf_type,
+            parameters=params,
+            ibm_provider_version=ibm_provider_version,
+            tl_required_params=tl_required_params,
+            tl_all_params=tl_all_params)
+
+    if result['rc'] > 0:
+        module.fail_json(
+            msg=Terraform.parse_stderr(result['stderr']), **result)
+
+    module.exit_json(**result)
+
+
+def argument_checks(resource_type, tl_required_params, tl_conflicts_map=None):
+    """
+    Argument checks of a resource module, computed from its parameter
+    tables on first use and kept for the process.
+
+    Args:
+        resource_type (str): Resource type (e.g.: 'ibm_is_vpc')
+        tl_required_params (list of tuple): Top Level Parameters
+            required by TF, (<name>, <type>) tuples
+        tl_conflicts_map (dict, optional): Parameters mapped to the
+            parameters they conflict with
+
+    Returns:
+        ArgumentChecks: Checks of the module
+    """
+    checks = _ARGUMENT_CHECKS.get(resource_type)
+    if checks is None:
+        checks = ArgumentChecks(tl_required_params, tl_conflicts_map)
+        _ARGUMENT_CHECKS[resource_type] = checks
+    return checks
+
+
+class ArgumentChecks:
+    """
+    Required and conflicting arguments of a resource module. The
+    parameter tables are reduced once to the names that are checked.
+    """
+    def __init__(self, tl_required_params, tl_conflicts_map=None):
+        self.required = tuple(arg for arg, _ in tl_required_params)
+        self.conflicting = tuple(
+            (arg, tuple(arg_conflicts))
+            for arg, arg_conflicts in iteritems(tl_conflicts_map or {})
+            if arg_conflicts)
+
+    def missing(self, params):
+        """
+        Returns:
+            list: Required arguments without a value
+        """
+        return [arg for arg in self.required if params.get(arg) is None]
+
+    def conflicts(self, params):
+        """
+        Returns:
+            dict: Set arguments mapped to a set argument they conflict
+                  with
+        """
+        conflicts = {}
+        for arg, arg_conflicts in self.conflicting:
+            if params.get(arg):
+                for conflict in arg_conflicts:
+                    if params.get(conflict):
+                        conflicts[arg] = conflict
+        return conflicts
 
 
 def ibmcloud_terraform(
@@ -417,21 +259,6 @@ def ibmcloud_terraform(
                   'warnings': <list of str>
               }
     """
-    # Initialize environment variable mapping
-    # Import any env vars set within ansible
-    env = dict(os.environ)
-    # Set 'no_log' provider parameters via env vars to prevent
-    # exposing key in plaintext provider file
-    if ('ibmcloud_api_key' in parameters and
-            parameters['ibmcloud_api_key'] is not None):
-        env['IC_API_KEY'] = parameters['ibmcloud_api_key']
-    if ('iaas_classic_username' in parameters and
-            parameters['iaas_classic_username'] is not None):
-        env['IAAS_CLASSIC_USERNAME'] = parameters['iaas_classic_username']
-    if ('iaas_classic_api_key' in parameters and
-            parameters['iaas_classic_api_key'] is not None):
-        env['IAAS_CLASSIC_API_KEY'] = parameters['iaas_classic_api_key']
-
     # Initialize result dictionary
     result = {
         'changed': False,
@@ -442,19 +269,27 @@ def ibmcloud_terraform(
         'warnings': []
     }
 
-    # Set terraform directory
-    if terraform_dir is None:
-        if 'IBMCLOUD_ANSIBLE_TERRAFORM_DIR' in env:
-            terraform_dir = env['IBMCLOUD_ANSIBLE_TERRAFORM_DIR']
-        else:
-            terraform_dir = DEFAULT_TF_DIR
+    # Validate the attribute paths before running anything
+    if parameters.get('return_fields'):
+        try:
+            parse_return_fields(parameters['return_fields'])
+        except ValueError as err:
+            result['rc'] = 1
+            result['stderr'] = 'Error: {}'.format(err)
+            return result
+
+    # Read common data sources with the REST APIs, if enabled. Anything
+    # the native read cannot handle falls back to Terraform.
+    if tf_type == 'data':
+        attributes = _read_native_data_source(
+            resource_type, parameters, terraform_dir)
+        if attributes is not None:
+            result['resource'] = attributes
+            return result
 
     # Initialize Terraform object
-    terraform = Terraform(
-        parameters,
-        terraform_dir,
-        ibm_provider_version,
-        env=env)
+    terraform, env = _init_terraform(
+        parameters, ibm_provider_version, terraform_dir)
 
     resource = Resource(
         resource_type,
@@ -468,45 +303,555 @@ def ibmcloud_terraform(
     if tf_type == 'data':
         result['rc'], result['stdout'], result['stderr'] = (
             terraform.apply())
-        result['resource'] = terraform.get_tfstate_attributes(resource.target)
+        result['resource'] = terraform.get_tfstate_attributes(
+            resource.target, parameters.get('return_fields'), mode='data')
 
     elif tf_type == 'resource':
-        resource_absent = False
-
-        # Attempt to import resource tfstate if 'id' is given
-        if resource.tf_type == 'resource' and resource.id_ is not None:
-            if not terraform.set_existing_args(resource):
-                resource_absent = True
-                if resource.parameters['state'] == 'available':
-                    result['warnings'].append(
-                        "Unable to import resource id '{}' (type {}). "
-                        "Attempting to create new resource."
-                        .format(resource.id_, resource.resource_type))
-
-        # Create/update resource
-        if resource.parameters['state'] == 'available':
+        _manage_resource(terraform, resource, result)
+
+    _report_phase_stats(result, terraform, env)
+    terraform.cleanup(result, RM_OBJECT_SUBDIRS)
+    return result
+
+
+def ibmcloud_terraform_lookup(
+        resource_type,
+        parameters,
+        ibm_provider_version,
+        tl_required_params,
+        tl_all_params,
+        tl_required_params_ds,
+        tl_all_params_ds,
+        terraform_dir=None):
+    """
+    Use Terraform to look up an existing IBM Cloud resource with its
+    data source, and to create, update or destroy the resource if the
+    lookup does not apply, in a single Terraform working directory.
+
+    This is the same as running 'ibmcloud_terraform()' for the data
+    source and, unless it finds the resource for a new resource task,
+    again for the resource; but the working directory, 'terraform init'
+    and the provider configuration are shared. The lookup is skipped
+    if its result is not used: with 'id', with 'state: absent', or if
+    a required argument of the data source is missing.
+
+    Args:
+        resource_type (str): Resource type (e.g.: 'ibm_is_vpc')
+        parameters (dict): Resource parameter dictionary
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        tl_required_params (list of tuple): Top Level Parameters
+            required by TF. Each tuple consists of two strings:
+            (<name>, <type>)
+        tl_all_params (list): Top Level Parameters supported by TF.
+            Each tuple consists of two strings:(<name>, <type>)
+        tl_required_params_ds (list of tuple): Top Level Parameters
+            required by the TF data source
+        tl_all_params_ds (list): Top Level Parameters supported by the
+            TF data source
+        terraform_dir (str, optional): Path to Terraform working
+            directory. Can also be set using the
+            'IBMCLOUD_ANSIBLE_TERRAFORM_DIR' environment variable.
+
+    Returns:
+        dict: Ansible 'result' dictionary of the data source if it found
+              the resource, of the resource otherwise; see
+              'ibmcloud_terraform()'
+    """
+    if (parameters.get('id') is not None or
+            parameters.get('state') == 'absent' or
+            any(parameters.get(arg) is None
+                for arg, _ in tl_required_params_ds)):
+        return ibmcloud_terraform(
+            resource_type=resource_type,
+            tf_type='resource',
+            parameters=parameters,
+            ibm_provider_version=ibm_provider_version,
+            tl_required_params=tl_required_params,
+            tl_all_params=tl_all_params,
+            terraform_dir=terraform_dir)
+
+    result = {
+        'changed': False,
+        'resource': {},
+        'rc': 0,
+        'stdout': '',
+        'stderr': '',
+        'warnings': []
+    }
+
+    attributes = _read_native_data_source(
+        resource_type, parameters, terraform_dir)
+    if attributes is not None:
+        result['resource'] = attributes
+        return result
+
+    terraform, env = _init_terraform(
+        parameters, ibm_provider_version, terraform_dir)
+
+    lookup = Resource(
+        resource_type,
+        'data',
+        parameters,
+        tl_required_params_ds,
+        tl_all_params_ds)
+    terraform.add_resource(lookup)
+    terraform.init()
+    rc, stdout, stderr = terraform.apply()
+    if rc == 0:
+        result['stdout'] = stdout
+        result['resource'] = terraform.get_tfstate_attributes(
+            lookup.target, mode='data')
+    else:
+        # No existing resource, manage it in the initialized working
+        # directory instead
+        terraform.remove_resource(lookup)
+        resource = Resource(
+            resource_type,
+            'resource',
+            parameters,
+            tl_required_params,
+            tl_all_params)
+        terraform.add_resource(resource)
+        _manage_resource(terraform, resource, result)
+
+    _report_phase_stats(result, terraform, env)
+    terraform.cleanup(result, RM_OBJECT_SUBDIRS)
+    return result
+
+
+def _read_native_data_source(resource_type, parameters, terraform_dir):
+    # Attributes of the data source read with the REST APIs, if
+    # enabled and supported, else None
+    if not _env_enabled(os.environ, 'IBMCLOUD_ANSIBLE_NATIVE_DATA_SOURCES'):
+        return None
+    from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud_rest import read_data_source
+    env, _ = _environment(parameters, terraform_dir)
+    attributes = read_data_source(resource_type, parameters, env)
+    if attributes is not None and parameters.get('return_fields'):
+        attributes = project_attributes(
+            attributes, parse_return_fields(parameters['return_fields']))
+    return attributes
+
+
+def _manage_resource(terraform, resource, result):
+    # Import, create/update or destroy a resource added to 'terraform'
+    # and fill in 'result', see 'ibmcloud_terraform()'
+    resource_absent = False
+
+    # Attempt to import resource tfstate if 'id' is given
+    if resource.tf_type == 'resource' and resource.id_ is not None:
+        if not terraform.set_existing_args(resource):
+            resource_absent = True
+            if resource.parameters['state'] == 'available':
+                result['warnings'].append(
+                    "Unable to import resource id '{}' (type {}). "
+                    "Attempting to create new resource."
+                    .format(resource.id_, resource.resource_type))
+
+    # Create/update resource. Plan first and only apply if the
+    # plan changes anything.
+    if resource.parameters['state'] == 'available':
+        result['rc'], result['stdout'], result['stderr'], changes = (
+            terraform.plan())
+        if result['rc'] == 0 and changes:
+            result['rc'], result['stdout'], result['stderr'] = (
+                terraform.apply_plan())
+            result['changed'] = result['rc'] == 0
+        elif result['rc'] == 0 and terraform.restored_state:
+            # The plan refreshes a restored state without saving it;
+            # applying the empty plan saves the refreshed state
             result['rc'], result['stdout'], result['stderr'] = (
-                terraform.apply())
+                terraform.apply_plan())
+        # Load resource return data
+        result['resource'] = terraform.get_tfstate_attributes(
+            resource.target, mode='managed')
+
+    # Remove resource
+    elif resource.parameters['state'] == 'absent':
+        if not resource_absent:
+            result['rc'], result['stdout'], result['stderr'] = (
+                terraform.destroy(None))
             # Determine 'changed' result value
             if (result['rc'] == 0 and not re.search(
-                    '0 added, 0 changed, 0 destroyed', result['stdout'])):
+                    'Resources: 0 destroyed', result['stdout'])):
                 result['changed'] = True
-            # Load resource return data
-            result['resource'] = terraform.get_tfstate_attributes(
-                resource.target)
-
-        # Remove resource
-        elif resource.parameters['state'] == 'absent':
-            if not resource_absent:
-                result['rc'], result['stdout'], result['stderr'] = (
-                    terraform.destroy(None))
-                # Determine 'changed' result value
-                if (result['rc'] == 0 and not re.search(
-                        'Resources: 0 destroyed', result['stdout'])):
-                    result['changed'] = True
 
-    terraform.cleanup(result, RM_OBJECT_SUBDIRS)
-    return result
+    terraform.update_state_cache(resource, result)
+
+
+def ibmcloud_terraform_batch(
+        resource_type,
+        parameters_list,
+        ibm_provider_version,
+        tl_required_params,
+        tl_all_params,
+        terraform_dir=None,
+        env=None):
+    """
+    Use a single Terraform working directory and a single 'terraform
+    apply' to create several resources of the same type. Terraform
+    creates the resources concurrently, and each resource succeeds or
+    fails on its own.
+
+    Provider configuration and credentials are taken from the first
+    parameter dictionary; all of them are expected to share it. Only
+    new resources ('state' is 'available' and no 'id' given) can be
+    batched.
+
+    Args:
+        resource_type (str): Resource type (e.g.: 'ibm_is_vpc')
+        parameters_list (list of dict): Resource parameter dictionaries
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        tl_required_params (list of tuple): Top Level Parameters
+            required by TF. Each tuple consists of two strings:
+            (<name>, <type>)
+        tl_all_params (list): Top Level Parameters supported by TF.
+            Each tuple consists of two strings:(<name>, <type>)
+        terraform_dir (str, optional): Path to Terraform working
+            directory. Can also be set using the
+            'IBMCLOUD_ANSIBLE_TERRAFORM_DIR' environment variable.
+        env (dict, optional): Environment the modules would run with,
+            instead of the environment of this process
+
+    Returns:
+        list of dict: Ansible 'result' dictionary per parameter
+                      dictionary, see 'ibmcloud_terraform()'
+    """
+    terraform, env = _init_terraform(
+        parameters_list[0], ibm_provider_version, terraform_dir, env)
+
+    resources = []
+    tf_names = set()
+    for index, parameters in enumerate(parameters_list):
+        resource = Resource(
+            resource_type,
+            'resource',
+            parameters,
+            tl_required_params,
+            tl_all_params)
+        # Resource addresses must be unique within the working directory
+        if resource.tf_name in tf_names:
+            resource.tf_name = '{}_{}'.format(resource.tf_name, index)
+            resource.target = '{}.{}'.format(
+                resource.resource_type, resource.tf_name)
+        tf_names.add(resource.tf_name)
+        terraform.add_resource(resource)
+        resources.append(resource)
+    terraform.init()
+    rc, stdout, stderr = terraform.apply()
+
+    results = []
+    for resource in resources:
+        attributes = terraform.get_tfstate_attributes(
+            resource.target, mode='managed')
+        created = rc == 0 or 'id' in attributes
+        results.append({
+            'changed': created,
+            'resource': attributes if created else {},
+            'rc': 0 if created else max(rc, 1),
+            'stdout': stdout,
+            'stderr': '' if created else stderr,
+            'warnings': []
+        })
+
+    overall = {'rc': rc, 'stdout': stdout, 'stderr': stderr}
+    _report_phase_stats(overall, terraform, env)
+    if 'terraform_phases' in overall:
+        for result in results:
+            result['terraform_phases'] = overall['terraform_phases']
+    terraform.cleanup(overall, RM_OBJECT_SUBDIRS)
+    return results
+
+
+def ibmcloud_terraform_data(
+        data_sources,
+        parameters,
+        ibm_provider_version,
+        terraform_dir=None):
+    """
+    Use a single Terraform working directory and a single 'terraform
+    apply' to read several data sources of different types with the
+    same parameters, e.g. everything an inventory needs from a region.
+    Data sources with a native implementation are read with the REST
+    APIs if enabled; Terraform only runs for the others.
+
+    Each data source succeeds or fails on its own: a data source that
+    Terraform read into the state is returned even if another one
+    failed the apply.
+
+    Args:
+        data_sources (list of tuple): Data sources to read. Each tuple
+            consists of (<resource type>, <tl_required_params>,
+            <tl_all_params>), see 'ibmcloud_terraform()'
+        parameters (dict): Data source parameter dictionary, shared by
+            all data sources
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        terraform_dir (str, optional): Path to Terraform working
+            directory. Can also be set using the
+            'IBMCLOUD_ANSIBLE_TERRAFORM_DIR' environment variable.
+
+    Returns:
+        list of dict: Ansible 'result' dictionary per data source, see
+                      'ibmcloud_terraform()'
+    """
+    results = []
+    resources = []
+    for resource_type, tl_required_params, tl_all_params in data_sources:
+        result = {
+            'changed': False,
+            'resource': {},
+            'rc': 0,
+            'stdout': '',
+            'stderr': '',
+            'warnings': []
+        }
+        attributes = _read_native_data_source(
+            resource_type, parameters, terraform_dir)
+        if attributes is not None:
+            result['resource'] = attributes
+        else:
+            resources.append((result, Resource(
+                resource_type,
+                'data',
+                parameters,
+                tl_required_params,
+                tl_all_params)))
+        results.append(result)
+
+    if not resources:
+        return results
+
+    terraform, env = _init_terraform(
+        parameters, ibm_provider_version, terraform_dir)
+    for _, resource in resources:
+        terraform.add_resource(resource)
+    terraform.init()
+    rc, stdout, stderr = terraform.apply()
+
+    for result, resource in resources:
+        attributes = terraform.get_tfstate_attributes(
+            resource.target, mode='data')
+        read = rc == 0 or 'id' in attributes
+        result.update({
+            'resource': attributes if read else {},
+            'rc': 0 if read else max(rc, 1),
+            'stdout': stdout,
+            'stderr': '' if read else stderr,
+        })
+
+    overall = {'rc': rc, 'stdout': stdout, 'stderr': stderr}
+    _report_phase_stats(overall, terraform, env)
+    if 'terraform_phases' in overall:
+        for result, _ in resources:
+            result['terraform_phases'] = overall['terraform_phases']
+    terraform.cleanup(overall, RM_OBJECT_SUBDIRS)
+    return results
+
+
+def _environment(parameters, terraform_dir=None, base_env=None):
+    """
+    Build the process environment for the credentials in 'parameters'.
+
+    Args:
+        base_env (dict, optional): Environment to start from instead of
+            the environment of this process
+
+    Returns:
+        (dict, str): Tuple with (environment, Terraform directory)
+    """
+    # Initialize environment variable mapping
+    # Import any env vars set within ansible
+    env = dict(os.environ if base_env is None else base_env)
+    # Set 'no_log' provider parameters via env vars to prevent
+    # exposing key in plaintext provider file
+    if ('ibmcloud_api_key' in parameters and
+            parameters['ibmcloud_api_key'] is not None):
+        env['IC_API_KEY'] = parameters['ibmcloud_api_key']
+    if ('iaas_classic_username' in parameters and
+            parameters['iaas_classic_username'] is not None):
+        env['IAAS_CLASSIC_USERNAME'] = parameters['iaas_classic_username']
+    if ('iaas_classic_api_key' in parameters and
+            parameters['iaas_classic_api_key'] is not None):
+        env['IAAS_CLASSIC_API_KEY'] = parameters['iaas_classic_api_key']
+
+    # Set terraform directory
+    if terraform_dir is None:
+        if 'IBMCLOUD_ANSIBLE_TERRAFORM_DIR' in env:
+            terraform_dir = env['IBMCLOUD_ANSIBLE_TERRAFORM_DIR']
+        else:
+            terraform_dir = DEFAULT_TF_DIR
+
+    # Authenticate with a cached IAM token instead of the API key. The
+    # provider ignores the token if an API key is set.
+    if (_env_enabled(env, 'IBMCLOUD_ANSIBLE_IAM_TOKEN_CACHE') and
+            env.get('IC_API_KEY')):
+        try:
+            token = IAMTokenCache(terraform_dir).token(env['IC_API_KEY'], env)
+        except Exception:
+            token = None  # The provider reports authentication errors
+        if token is not None:
+            env['IC_IAM_TOKEN'] = 'Bearer ' + token['access_token']
+            env['IC_IAM_REFRESH_TOKEN'] = token['refresh_token']
+            del env['IC_API_KEY']
+
+    return env, terraform_dir
+
+
+def _init_terraform(
+        parameters, ibm_provider_version, terraform_dir=None, base_env=None):
+    """
+    Create the Terraform object and its process environment for the
+    provider configuration and credentials in 'parameters', see
+    '_environment()'.
+
+    Returns:
+        (Terraform, dict): Tuple with (Terraform object, environment)
+    """
+    env, terraform_dir = _environment(parameters, terraform_dir, base_env)
+
+    # Re-use initialized working directories if the pool is enabled
+    workspace_pool = None
+    pool_size = int(env.get(
+        'IBMCLOUD_ANSIBLE_WORKSPACE_POOL_SIZE', WORKSPACE_POOL_SIZE))
+    if pool_size > 0:
+        workspace_pool = WorkspacePool(
+            terraform_dir,
+            pool_size,
+            int(env.get(
+                'IBMCLOUD_ANSIBLE_WORKSPACE_POOL_KEY_SIZE',
+                WORKSPACE_POOL_KEY_SIZE)))
+
+    # Initialize Terraform object
+    terraform = Terraform(
+        parameters,
+        terraform_dir,
+        ibm_provider_version,
+        env=env,
+        workspace_pool=workspace_pool)
+
+    return terraform, env
+
+
+def _report_phase_stats(result, terraform, env):
+    # Report Terraform process spawns per lifecycle phase
+    if _env_enabled(env, 'IBMCLOUD_ANSIBLE_TERRAFORM_STATS'):
+        result['terraform_phases'] = terraform.phase_stats
+
+
+def build_offline_bundle(
+        bundle_path,
+        ibm_provider_versions=BUNDLE_PROVIDER_VERSIONS,
+        terraform_version=TERRAFORM_VERSION):
+    """
+    Build an offline bundle of Terraform and IBM Cloud Terraform
+    providers for the current platform, e.g. when building an execution
+    environment image. Set the 'IBMCLOUD_ANSIBLE_TERRAFORM_MIRROR'
+    environment variable to the bundle path to install from it instead
+    of downloading.
+
+    Args:
+        bundle_path (str): Destination path. Paths ending in '.tar',
+            '.tar.gz' or '.tgz' create a tar archive, other paths a
+            directory.
+        ibm_provider_versions (list of str, optional): IBM Cloud
+            Terraform provider versions to include
+        terraform_version (str, optional): Terraform version to include
+
+    Returns:
+        str: Bundle path
+    """
+    import shutil
+    import tarfile
+    import tempfile
+    work_dir = tempfile.mkdtemp()
+    try:
+        for ibm_provider_version in ibm_provider_versions:
+            TerraformInstaller(
+                work_dir, terraform_version, ibm_provider_version).install()
+        shutil.rmtree(os.path.join(work_dir, 'downloads'), ignore_errors=True)
+        for name in os.listdir(work_dir):
+            if name.endswith('.lock'):
+                os.remove(os.path.join(work_dir, name))
+
+        if bundle_path.endswith(('.tar', '.tar.gz', '.tgz')):
+            mode = 'w' if bundle_path.endswith('.tar') else 'w:gz'
+            with tarfile.open(bundle_path, mode) as bundle:
+                for name in sorted(os.listdir(work_dir)):
+                    bundle.add(os.path.join(work_dir, name), arcname=name)
+        else:
+            shutil.copytree(work_dir, bundle_path, symlinks=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return bundle_path
+
+
+def _user_digest(*parts):
+    # Short digest of 'parts', different for each system user
+    digest = hashlib.sha256()
+    digest.update(str(os.getuid()).encode('utf-8'))
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(to_text(part).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def makedirs_shared(path):
+    """
+    Create the directory 'path' accessible by all system users. The
+    created directories are made writable with chmod instead of changing
+    the umask, which is process-wide and would affect other threads.
+
+    Args:
+        path (str): Directory path
+    """
+    created = []
+    parent = path
+    while parent and not os.path.isdir(parent):
+        created.append(parent)
+        parent = os.path.dirname(parent)
+    try:
+        os.makedirs(path)
+    except FileExistsError:
+        pass  # Concurrent makedirs are OK
+    for directory in reversed(created):
+        try:
+            os.chmod(directory, 0o777)
+        except OSError:
+            pass  # Created by another user
+
+
+def _makedirs_private(path):
+    """
+    Create the directory 'path' accessible by the system user only.
+
+    Args:
+        path (str): Directory path
+
+    Raises:
+        OSError: The directory exists and is not owned by the user
+    """
+    uid = os.getuid()
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    stat = os.lstat(path)
+    if not S_ISDIR(stat.st_mode) or stat.st_uid != uid:
+        raise OSError(
+            "Directory '{}' is not owned by the user".format(path))
+    if stat.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+def _uuid4():
+    # 'uuid' is only needed to name new files and directories
+    import uuid
+    return uuid.uuid4()
+
+
+def _env_enabled(env, name):
+    # Boolean switch set with an environment variable
+    return (env or {}).get(name, '').lower() in ('1', 'true', 'yes', 'on')
 
 
 def to_unicode(string):
@@ -526,29 +871,534 @@ def to_unicode(string):
     return unicode_string
 
 
-def run_process(command, cwd=None, env=None):
+def run_process(
+        command,
+        cwd=None,
+        env=None,
+        timeout=None,
+        progress=None,
+        spill_path=None,
+        buffer_size=RUN_PROCESS_BUFFER_SIZE):
     """
     Run system subprocess
 
+    Output is read incrementally. At most 'buffer_size' bytes per stream
+    are kept in memory; beyond that only the end of the output is kept
+    and, if 'spill_path' is set, the complete output is written to
+    '<spill_path>.stdout' and '<spill_path>.stderr'.
+
     Args:
         command (str): Full command string
         cwd (str, optional): Process current working directory
         env (dict, optional): Mapping of environment variables
+        timeout (float, optional): Seconds after which the process is
+            interrupted (SIGINT), and killed 'RUN_PROCESS_KILL_GRACE'
+            seconds later (SIGKILL)
+        progress (callable, optional): Called with the stream name
+            ('stdout' or 'stderr') and the text of each chunk of output
+        spill_path (str, optional): Path prefix for complete output
+            files of streams that exceed 'buffer_size'
+        buffer_size (int, optional): Bytes of output kept in memory per
+            stream, None for no limit
 
     Returns:
         (int, str, str): Tuple with (return code, stdout, stderr)
     """
     import subprocess
     import shlex
+    import selectors
+    import signal
 
     args = shlex.split(command)
 
+    # New session, so that a kill also reaches the provider plugins
     process = subprocess.Popen(
-        args, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = process.communicate()
-    returncode = process.returncode
+        args, cwd=cwd, env=env, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, start_new_session=True)
+    buffers = {
+        'stdout': _OutputBuffer(
+            buffer_size, spill_path and spill_path + '.stdout', progress,
+            'stdout'),
+        'stderr': _OutputBuffer(
+            buffer_size, spill_path and spill_path + '.stderr', progress,
+            'stderr'),
+    }
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ, buffers['stdout'])
+    selector.register(process.stderr, selectors.EVENT_READ, buffers['stderr'])
+
+    def kill():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass  # No process of the group is left
+
+    deadline = None
+    if timeout:
+        deadline = time.monotonic() + timeout
+    timed_out = False
+    killed = False
+    try:
+        while selector.get_map():
+            wait = None
+            if deadline is not None:
+                wait = max(deadline - time.monotonic(), 0)
+            if timed_out and not killed:
+                # Children may keep the pipes open after an interrupted
+                # process exited
+                if process.poll() is not None:
+                    kill()
+                    killed = True
+                    deadline = None
+                else:
+                    wait = 0.5 if wait is None else min(wait, 0.5)
+            events = selector.select(wait)
+            for key, _ in events:
+                data = os.read(key.fd, RUN_PROCESS_CHUNK_SIZE)
+                if data:
+                    key.data.write(data)
+                else:
+                    selector.unregister(key.fileobj)
+            if (deadline is not None and time.monotonic() >= deadline):
+                if not timed_out:
+                    # Let Terraform stop gracefully and save its state
+                    timed_out = True
+                    process.send_signal(signal.SIGINT)
+                    deadline = time.monotonic() + RUN_PROCESS_KILL_GRACE
+                else:
+                    kill()
+                    killed = True
+                    deadline = None
+        returncode = process.wait()
+    finally:
+        selector.close()
+        process.stdout.close()
+        process.stderr.close()
+        if process.poll() is None:
+            kill()
+            process.wait()
+
+    stdout = buffers['stdout'].close()
+    stderr = buffers['stderr'].close()
+    if timed_out:
+        returncode = returncode if returncode > 0 else 1
+        stderr += '\nError: Command timed out after {} seconds: {}\n'.format(
+            timeout, ' '.join([os.path.basename(args[0])] + args[1:2]))
+    return (returncode, stdout, stderr)
+
+
+class _OutputBuffer:
+    """
+    Output of a process stream, kept in memory up to 'size' bytes. Once
+    exceeded, only the last 'size' bytes are kept and the complete
+    output goes to 'spill_path', if set.
+    """
+    def __init__(self, size, spill_path=None, progress=None, name=None):
+        import codecs
+
+        self.size = size
+        self.spill_path = spill_path
+        self.spill = None
+        self.progress = progress
+        self.name = name
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = bytearray()
+        self.dropped = 0
+
+    def write(self, data):
+        if self.progress is not None:
+            self.progress(self.name, self.decoder.decode(data))
+        self.buffer += data
+        if self.size is None or len(self.buffer) <= self.size:
+            return
+        excess = len(self.buffer) - self.size
+        if self.spill_path is not None:
+            if self.spill is None:
+                self.spill = open(self.spill_path, 'wb')
+            self.spill.write(self.buffer[:excess])
+        del self.buffer[:excess]
+        self.dropped += excess
+
+    def close(self):
+        """
+        Returns:
+            str: Output text, starting with a note on omitted output
+        """
+        if self.progress is not None:
+            tail = self.decoder.decode(b'', final=True)
+            if tail:
+                self.progress(self.name, tail)
+        text = to_text(bytes(self.buffer), errors='surrogate_or_replace')
+        if self.spill is not None:
+            self.spill.write(self.buffer)
+            self.spill.close()
+        if self.dropped:
+            note = '[{} bytes of output omitted'.format(self.dropped)
+            if self.spill is not None:
+                note += ', complete output in {}'.format(self.spill_path)
+            text = note + ']\n' + text
+        return text
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared between processes. Used as
+    a context manager; entering blocks until the lock is acquired. The
+    lock file is created readable by all system users so that they can
+    coordinate on the same path.
+
+    Args:
+        path (str): Lock file path
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self, blocking=True):
+        """
+        Acquire the lock.
+
+        Args:
+            blocking (bool, optional): Wait until the lock is released
+                by other processes
+
+        Returns:
+            bool: True if the lock was acquired
+        """
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_CREAT, 0o644)
+        try:
+            os.fchmod(self.fd, 0o644)
+        except OSError:
+            pass  # Lock file owned by another user
+        flags = fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.fd, flags)
+        except BlockingIOError:
+            os.close(self.fd)
+            self.fd = None
+            return False
+        return True
+
+    def release(self):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def parse_return_fields(return_fields):
+    """
+    Parse 'return_fields' attribute paths to a projection tree.
+
+    Paths are dot separated keys. Lists are projected element-wise, an
+    optional '[*]' makes that explicit and '[<index>]' selects single
+    elements; e.g.: 'images.id', 'instances[0].primary_network_interface'.
+
+    Args:
+        return_fields (list of str): Attribute paths
+
+    Returns:
+        dict: Projection tree; a key maps to None if its whole value is
+              selected, and to the subtree otherwise. Integer keys
+              select list elements.
+    """
+    tree = {}
+    for field in return_fields:
+        keys = []
+        for part in field.split('.'):
+            match = re.match(r'^([^\[]*)((?:\[(?:\*|\d+)\])*)$', part)
+            if match is None:
+                raise ValueError("Invalid return field '{}'".format(field))
+            if match.group(1):
+                keys.append(match.group(1))
+            keys.extend(
+                int(index) for index in
+                re.findall(r'\[(\d+)\]', match.group(2)))
+        node = tree
+        for index, key in enumerate(keys):
+            if index + 1 == len(keys):
+                node[key] = None
+            elif node.get(key, {}) is None:
+                break  # Parent already selected as a whole
+            else:
+                node = node.setdefault(key, {})
+    return tree
+
+
+def project_attributes(value, tree):
+    """
+    Apply a projection tree (see 'parse_return_fields()') to data.
+    Missing keys and list indexes are left out. If a list is projected
+    both element-wise and by index, all elements are kept and the
+    subtrees of the indexes are merged into the element-wise one.
+
+    Args:
+        value: Attribute data
+        tree (dict): Projection tree, None to select everything
+
+    Returns:
+        Projected data
+    """
+    if tree is None:
+        return value
+    if isinstance(value, dict):
+        # Inline the common case of selected leaves, this runs for every
+        # element of large data source lists
+        return dict(
+            (key, value[key] if subtree is None
+             else project_attributes(value[key], subtree))
+            for key, subtree in iteritems(tree)
+            if key in value and not isinstance(key, int))
+    if isinstance(value, list):
+        elements, indexes = _split_tree(tree)
+        if not indexes:
+            return [project_attributes(element, tree) for element in value]
+        if not elements:
+            return [project_attributes(value[index], indexes[index])
+                    for index in sorted(indexes) if index < len(value)]
+        return [project_attributes(element, _element_tree(
+                    elements, indexes, index))
+                for index, element in enumerate(value)]
+    return value
+
+
+def _split_tree(tree):
+    # Element-wise and index subtrees of a list projection
+    elements, indexes = {}, {}
+    for key, subtree in iteritems(tree):
+        if isinstance(key, int):
+            indexes[key] = subtree
+        else:
+            elements[key] = subtree
+    return elements, indexes
+
+
+def _element_tree(elements, indexes, index):
+    # Element-wise keys apply to every element, the subtree of an index
+    # is merged on top
+    if index not in indexes:
+        return elements
+    return _merge_trees(elements, indexes[index])
+
+
+def _merge_trees(tree, other):
+    if tree is None or other is None:
+        return None
+    merged = dict(tree)
+    for key, subtree in iteritems(other):
+        merged[key] = (
+            _merge_trees(merged[key], subtree) if key in merged else subtree)
+    return merged
+
 
-    return (returncode, to_unicode(stdout), to_unicode(stderr))
+class _JSONScanner:
+    """
+    Incremental reader of a JSON document, e.g.: a memory mapped state
+    file. Values are decoded window by window with the C decoder of the
+    'json' module; only values larger than a window are scanned
+    bracket by bracket. At most one window of the document is held as
+    Python objects at a time.
+
+    Args:
+        buf (bytes or mmap): JSON document
+    """
+    WHITESPACE = re.compile(br'[ \t\n\r]*')
+    SEPARATOR = re.compile(r'[ \t\n\r,]*')
+    STRING = re.compile(br'"(?:[^"\\]+|\\.)*"')
+    SCALAR = re.compile(br'[^,\]}\s]+')
+    # Anything up to the next bracket outside of strings
+    NON_BRACKETS = re.compile(br'(?:[^"\[\]{}]+|"(?:[^"\\]+|\\.)*")*')
+
+    # Smallest and largest window decoded at once, in bytes
+    MIN_WINDOW_SIZE = 4 * 1024
+    WINDOW_SIZE = 1024 * 1024
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def peek(self):
+        self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+        return self.buf[self.pos:self.pos + 1]
+
+    def _window(self, size):
+        # Text of the next 'size' bytes, without a truncated character
+        # at the end
+        chunk = self.buf[self.pos:self.pos + size]
+        text = codecs.getincrementaldecoder('utf-8')().decode(chunk)
+        return text, len(chunk) < size
+
+    def _advance(self, text, end):
+        self.pos += len(text[:end].encode('utf-8'))
+
+    def _decode(self):
+        # Decode the next value if it fits into a window. Returns a
+        # (decoded, value) tuple.
+        size = self.MIN_WINDOW_SIZE
+        while True:
+            text, complete = self._window(size)
+            try:
+                value, end = self.decoder.raw_decode(text)
+            except ValueError:
+                if complete:
+                    raise
+            else:
+                # A value ending with the window may be truncated
+                if end < len(text) or complete:
+                    self._advance(text, end)
+                    return True, value
+            if size >= self.WINDOW_SIZE:
+                return False, None
+            size *= 4
+
+    def skip(self):
+        """
+        Move past the next value.
+
+        Returns:
+            int: Start position of the value
+        """
+        char = self.peek()
+        start = self.pos
+        if char == b'"':
+            self.pos = self.STRING.match(self.buf, self.pos).end()
+        elif char in (b'{', b'['):
+            if self._decode()[0]:
+                return start
+            depth = 0
+            while True:
+                char = self.buf[self.pos:self.pos + 1]
+                if char in (b'{', b'['):
+                    depth += 1
+                elif char in (b'}', b']'):
+                    depth -= 1
+                    if depth == 0:
+                        self.pos += 1
+                        break
+                else:
+                    raise ValueError('Unexpected end of JSON data')
+                self.pos = self.NON_BRACKETS.match(self.buf, self.pos + 1).end()
+        else:
+            self.pos = self.SCALAR.match(self.buf, self.pos).end()
+        return start
+
+    def load(self):
+        if self.peek() in (b'{', b'['):
+            decoded, value = self._decode()
+            if decoded:
+                return value
+        start = self.skip()
+        return json.loads(self.buf[start:self.pos])
+
+    def _items(self, close):
+        # Position after the opening bracket; yields once per element
+        self.pos += 1
+        while True:
+            char = self.peek()
+            if char == close:
+                self.pos += 1
+                return
+            if char == b',':
+                self.pos += 1
+            yield
+
+    def keys(self):
+        """
+        Iterate over the keys of the next object. The caller consumes
+        each value ('skip()', 'load()', ...) before the next key.
+        """
+        if self.peek() != b'{':
+            raise ValueError('Expected JSON object')
+        for _ in self._items(b'}'):
+            start = self.skip()
+            key = json.loads(self.buf[start:self.pos])
+            if self.peek() != b':':
+                raise ValueError('Expected : in JSON object')
+            self.pos += 1
+            yield key
+
+    def indexes(self):
+        """
+        Iterate over the indexes of the next array, see 'keys()'.
+        """
+        if self.peek() != b'[':
+            raise ValueError('Expected JSON array')
+        for index, _ in enumerate(self._items(b']')):
+            yield index
+
+    def _project_elements(self, tree):
+        # Project every element of the next array, decoding as many
+        # elements as fit into a window at once
+        result = []
+        self.pos += 1
+        while True:
+            char = self.peek()
+            if char == b']':
+                self.pos += 1
+                return result
+            if char == b',':
+                self.pos += 1
+                continue
+            text, complete = self._window(self.WINDOW_SIZE)
+            end = 0
+            while text[end:end + 1] not in ('', ']'):
+                try:
+                    value, value_end = self.decoder.raw_decode(text, end)
+                except ValueError:
+                    break
+                if value_end == len(text) and not complete:
+                    break
+                result.append(project_attributes(value, tree))
+                end = self.SEPARATOR.match(text, value_end).end()
+            if end:
+                self._advance(text, end)
+            else:
+                # Element larger than a window
+                result.append(self.project(tree))
+
+    def project(self, tree):
+        """
+        Decode the projection (see 'project_attributes()') of the next
+        value.
+        """
+        if tree is None:
+            return self.load()
+        char = self.peek()
+        if char == b'{':
+            decoded, value = self._decode()
+            if decoded:
+                return project_attributes(value, tree)
+            result = {}
+            for key in self.keys():
+                if key in tree:
+                    result[key] = self.project(tree[key])
+                else:
+                    self.skip()
+            return result
+        if char == b'[':
+            elements, indexes = _split_tree(tree)
+            if not indexes:
+                return self._project_elements(tree)
+            result = []
+            for index in self.indexes():
+                if elements:
+                    result.append(self.project(
+                        _element_tree(elements, indexes, index)))
+                elif index in indexes:
+                    result.append(self.project(indexes[index]))
+                else:
+                    self.skip()
+            return result
+        return self.load()
 
 
 class Resource:
@@ -603,79 +1453,585 @@ class Resource:
                 self.id_ = parameters['pi_cloud_instance_id'] + '/' + self.id_
 
 
-class Terraform:
+class WorkspacePool:
     """
-    Interaction with Terraform
+    Pool of initialized Terraform working directories
 
-    Constructor looks for Terraform executable and IBM Cloud Terraform
-    provider that satisfy version requirements passed into arguments. If
-    specified versions are not found they will be downloaded and
-    installed within the 'terraform_dir'.
+    Terraform working directories are expensive to create because
+    'terraform init' has to install the provider into '.terraform/'
+    and write '.terraform.lock.hcl'. Workspaces are returned to the
+    pool with only those files and 'provider.tf' in place, so a later
+    checkout for the same provider configuration can skip 'init' and
+    only write its own resource file.
+
+    Pooled workspaces live in '<terraform_dir>/workspace_pool/<key>/'.
+    A workspace is owned by exactly one process at a time: checkout and
+    checkin are atomic renames between the 'idle_' and 'busy_' prefixes,
+    so concurrent forks never share a directory. Idle workspaces are
+    evicted least recently used first.
+
+    Args:
+        terraform_dir (str): Terraform working directory
+        max_size (int): Maximum number of idle workspaces in the pool
+        max_size_per_key (int, optional): Maximum number of idle
+            workspaces for a single pool key
+    """
+    POOL_SUBDIR = 'workspace_pool'
+    IDLE_PREFIX = 'idle_'
+    BUSY_PREFIX = 'busy_'
+    TRASH_PREFIX = 'trash_'
+    # Workspaces checked out for longer than this are assumed to be
+    # left behind by a killed process
+    STALE_BUSY_SECONDS = 24 * 60 * 60
+    KEEP_ENTRIES = ('.terraform', '.terraform.lock.hcl', 'provider.tf')
+
+    def __init__(self, terraform_dir, max_size, max_size_per_key=None):
+        self.path = os.path.join(terraform_dir, self.POOL_SUBDIR)
+        self.max_size = max_size
+        if max_size_per_key is None:
+            max_size_per_key = max_size
+        self.max_size_per_key = min(max_size, max_size_per_key)
+
+        # Pool directory is shared by all system users, keys are not
+        makedirs_shared(self.path)
+
+    @staticmethod
+    def key(*parts):
+        """
+        Build a pool key from the values that make a workspace
+        reusable (e.g.: versions and the rendered provider file).
+
+        Args:
+            *parts (str): Values identifying a workspace configuration
+
+        Returns:
+            str: Pool key
+        """
+        return _user_digest(*parts)
+
+    def checkout(self, key):
+        """
+        Take a workspace out of the pool.
+
+        Args:
+            key (str): Pool key, see 'WorkspacePool.key()'
+
+        Returns:
+            (str, bool): Tuple with (workspace path, True if the
+                         workspace is already initialized)
+        """
+        key_dir = os.path.join(self.path, key)
+        try:
+            os.makedirs(key_dir)
+        except FileExistsError:
+            pass
+
+        # Most recently used first, its files are likely still cached
+        for _, name in sorted(self._entries(key_dir, self.IDLE_PREFIX),
+                              reverse=True):
+            src = os.path.join(key_dir, name)
+            dst = os.path.join(
+                key_dir, self.BUSY_PREFIX + name[len(self.IDLE_PREFIX):])
+            try:
+                os.rename(src, dst)
+            except OSError:
+                continue  # Checked out by another process
+            # The mtime of busy workspaces is their checkout time, see
+            # 'evict()'
+            os.utime(dst, None)
+            return dst, True
+
+        path = os.path.join(key_dir, self.BUSY_PREFIX + _uuid4().hex)
+        os.makedirs(path)
+        return path, False
+
+    def checkin(self, path):
+        """
+        Return a workspace to the pool. Per-run files (resource
+        configuration, state, results) are removed first. Workspaces
+        that were never initialized are discarded.
+
+        Args:
+            path (str): Workspace path returned by 'checkout()'
+        """
+        import shutil
+        if not os.path.isdir(os.path.join(path, '.terraform')):
+            self.discard(path)
+            return
+        for entry in os.listdir(path):
+            if entry in self.KEEP_ENTRIES:
+                continue
+            entry_path = os.path.join(path, entry)
+            if os.path.isdir(entry_path) and not os.path.islink(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                os.remove(entry_path)
+
+        key_dir, name = os.path.split(path)
+        os.utime(path, None)
+        os.rename(path, os.path.join(
+            key_dir, self.IDLE_PREFIX + name[len(self.BUSY_PREFIX):]))
+        self.evict()
+
+    def discard(self, path):
+        """
+        Remove a workspace without returning it to the pool.
+
+        Args:
+            path (str): Workspace path
+        """
+        import shutil
+        key_dir, name = os.path.split(path)
+        trash = os.path.join(key_dir, self.TRASH_PREFIX + name)
+        try:
+            os.rename(path, trash)
+        except OSError:
+            return  # Already claimed by another process
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def evict(self):
+        """
+        Enforce the pool size limits by removing the least recently
+        used idle workspaces, and remove stale checked out workspaces.
+        """
+        now = time.time()
+        idle = []
+        for key in os.listdir(self.path):
+            key_dir = os.path.join(self.path, key)
+            if not os.path.isdir(key_dir):
+                continue
+            for mtime, name in self._entries(key_dir, self.BUSY_PREFIX):
+                if now - mtime > self.STALE_BUSY_SECONDS:
+                    self.discard(os.path.join(key_dir, name))
+            key_idle = sorted(self._entries(key_dir, self.IDLE_PREFIX))
+            excess = len(key_idle) - self.max_size_per_key
+            for mtime, name in key_idle[:max(excess, 0)]:
+                self.discard(os.path.join(key_dir, name))
+            idle.extend(
+                (mtime, os.path.join(key_dir, name))
+                for mtime, name in key_idle[max(excess, 0):])
+
+        idle.sort()
+        for _, path in idle[:max(len(idle) - self.max_size, 0)]:
+            self.discard(path)
+
+    @staticmethod
+    def _entries(key_dir, prefix):
+        entries = []
+        try:
+            names = os.listdir(key_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+            try:
+                mtime = os.stat(os.path.join(key_dir, name)).st_mtime
+            except OSError:
+                continue  # Renamed by another process
+            entries.append((mtime, name))
+        return entries
+
+
+class ResidentProvider:
+    """
+    IBM Cloud provider process shared by consecutive Terraform runs
+
+    Every Terraform command normally launches the provider plugin,
+    completes the plugin handshake and loads the provider schema before
+    doing any work. A resident provider is started once in debug mode
+    ('-debug'), and Terraform attaches to it through the
+    'TF_REATTACH_PROVIDERS' environment variable instead.
+
+    The provider reads credentials from its own environment, so resident
+    providers are only shared between runs with the same provider
+    version and credentials. They live in
+    '<terraform_dir>/resident_providers/<key>/<slot>/'. A slot serves
+    one Terraform command at a time, concurrent runs use further slots.
+    Each provider is started by a supervisor process, detached from the
+    Ansible Module, which stops it after 'ttl' seconds without use. The
+    key directories and the directory of the provider's reattach socket
+    ('<tmp>/ibmcloud_ansible_providers_<uid>/') are private to the
+    system user.
+
+    Used as a context manager around a Terraform command; entering
+    returns the 'TF_REATTACH_PROVIDERS' value, or None if the provider
+    could not be started (e.g.: a provider version without debug mode).
+
+    Args:
+        terraform_dir (str): Terraform working directory
+        executable (str): IBM Cloud provider plugin executable
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        env (dict): Mapping of environment variables
+        ttl (float, optional): Idle seconds before the provider stops
+
+    Raises:
+        OSError: A directory of the user's providers is not private
+    """
+    SUBDIR = 'resident_providers'
+    SOCKET_DIR_PREFIX = 'ibmcloud_ansible_providers_'
+    REATTACH_FILE = 'reattach.json'
+    LOCK_FILE = 'lock'
+    # Environment variables the provider reads credentials and
+    # endpoints from
+    ENV_PREFIXES = ('IC_', 'IBMCLOUD_', 'IAAS_', 'SL_')
+    START_TIMEOUT = 60
+    SUPERVISOR = dedent("""\
+        import json, os, re, signal, subprocess, sys, threading, time, fcntl
+        executable, slot, ttl = sys.argv[1], sys.argv[2], float(sys.argv[3])
+        reattach_path = os.path.join(slot, 'reattach.json')
+        provider = subprocess.Popen(
+            [executable, '-debug'], cwd=slot, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        timeout = threading.Timer(float(sys.argv[4]), provider.kill)
+        timeout.start()
+        reattach = None
+        for line in provider.stdout:
+            match = re.search(rb"TF_REATTACH_PROVIDERS='([^']+)'", line)
+            if match is not None:
+                reattach = match.group(1).decode('utf-8')
+                break
+        timeout.cancel()
+        if reattach is None:
+            provider.kill()
+            sys.exit(1)
+        threading.Thread(
+            target=lambda: [None for _ in provider.stdout], daemon=True).start()
+        with open(reattach_path + '.tmp', 'w') as file_obj:
+            json.dump({'reattach': reattach, 'pid': provider.pid}, file_obj)
+        os.rename(reattach_path + '.tmp', reattach_path)
+        lock_fd = os.open(os.path.join(slot, 'lock'), os.O_RDONLY)
+        while True:
+            time.sleep(max(1, min(ttl, 10)))
+            if provider.poll() is None:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+                if time.time() - os.stat(reattach_path).st_mtime < ttl:
+                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                    continue
+            else:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            os.remove(reattach_path)
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            provider.send_signal(signal.SIGTERM)
+            try:
+                provider.wait(10)
+            except subprocess.TimeoutExpired:
+                provider.kill()
+            break
+        """)
+
+    def __init__(
+            self,
+            terraform_dir,
+            executable,
+            ibm_provider_version,
+            env,
+            ttl=RESIDENT_PROVIDER_TTL):
+        import tempfile
+
+        self.executable = executable
+        self.env = dict(env)
+        self.env.pop('TF_REATTACH_PROVIDERS', None)
+        self.ttl = ttl
+        self.lock = None
+        self.slot = None
+
+        parent = os.path.join(terraform_dir, self.SUBDIR)
+        makedirs_shared(parent)
+        self.path = os.path.join(parent, _user_digest(
+            ibm_provider_version,
+            executable,
+            *sorted(
+                '{}={}'.format(name, value)
+                for name, value in iteritems(self.env)
+                if name.startswith(self.ENV_PREFIXES))))
+        _makedirs_private(self.path)
+        # Unix socket paths are limited to about 100 characters, so the
+        # reattach sockets are not created below 'terraform_dir'
+        self.socket_dir = os.path.join(
+            tempfile.gettempdir(), self.SOCKET_DIR_PREFIX + str(os.getuid()))
+        _makedirs_private(self.socket_dir)
+
+    def __enter__(self):
+        # Use the first idle slot, or add a slot if all are busy
+        for name in sorted(os.listdir(self.path)):
+            lock = FileLock(os.path.join(self.path, name, self.LOCK_FILE))
+            if lock.acquire(blocking=False):
+                self.lock = lock
+                self.slot = os.path.join(self.path, name)
+                break
+        else:
+            self.slot = os.path.join(self.path, _uuid4().hex)
+            os.makedirs(self.slot)
+            self.lock = FileLock(os.path.join(self.slot, self.LOCK_FILE))
+            self.lock.acquire()
+
+        reattach = self._read_reattach()
+        if reattach is None:
+            reattach = self._start()
+        return reattach
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            # The reattach file modification time marks the last use
+            os.utime(os.path.join(self.slot, self.REATTACH_FILE), None)
+        except OSError:
+            pass
+        self.lock.release()
+        self.lock = None
+
+    def _read_reattach(self):
+        try:
+            with open(os.path.join(self.slot, self.REATTACH_FILE)) as file_obj:
+                reattach = json.load(file_obj)
+            os.kill(reattach['pid'], 0)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return reattach['reattach']
+
+    def _start(self):
+        import subprocess
+
+        try:
+            os.remove(os.path.join(self.slot, self.REATTACH_FILE))
+        except OSError:
+            pass
+        try:
+            supervisor = subprocess.Popen(
+                [sys.executable, '-c', self.SUPERVISOR, self.executable,
+                 self.slot, str(self.ttl), str(self.START_TIMEOUT)],
+                cwd=self.slot,
+                env=dict(
+                    self.env,
+                    TMPDIR=self.socket_dir,
+                    PLUGIN_UNIX_SOCKET_DIR=self.socket_dir),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True)
+        except OSError:
+            return None
+
+        # The supervisor keeps running once the provider is up
+        deadline = time.monotonic() + self.START_TIMEOUT
+        while time.monotonic() < deadline:
+            reattach = self._read_reattach()
+            if reattach is not None:
+                return reattach
+            if supervisor.poll() is not None:
+                return None
+            time.sleep(0.05)
+        supervisor.kill()
+        return None
+
+
+class IAMTokenCache:
+    """
+    IAM tokens shared by all Ansible Module runs of a system user
+
+    Exchanging the API key for an IAM token is the first request of
+    every Terraform run. Tokens are instead cached in
+    '<terraform_dir>/iam_tokens/<uid>/', a directory private to the
+    user, one file per API key (named by a hash, readable by the owner
+    only), and exchanged again 'RENEW_SECONDS' before they expire.
+    Token files of other users or readable by them are ignored.
+    Concurrent runs wait for a single exchange under a file lock.
+
+    Args:
+        terraform_dir (str): Terraform working directory
+
+    Raises:
+        OSError: The user's token directory is not private
+    """
+    SUBDIR = 'iam_tokens'
+    # Cached tokens must stay valid for a whole Terraform run
+    RENEW_SECONDS = 10 * 60
+
+    def __init__(self, terraform_dir):
+        parent = os.path.join(terraform_dir, self.SUBDIR)
+        makedirs_shared(parent)
+        self.uid = os.getuid()
+        self.path = os.path.join(parent, str(self.uid))
+        _makedirs_private(self.path)
+
+    def token(self, api_key, env=None):
+        """
+        Get a valid IAM token for the API key.
+
+        Args:
+            api_key (str): IBM Cloud API key
+            env (dict, optional): Mapping of environment variables
+
+        Returns:
+            dict: Token with the 'access_token', 'refresh_token' and
+                  'expiration' (Unix time) keys
+        """
+        path = os.path.join(self.path, _user_digest('iam_token', api_key))
+        token = self._read(path)
+        if token is not None:
+            return token
+        with FileLock(path + '.lock'):
+            # Exchanged by another process while waiting for the lock
+            token = self._read(path)
+            if token is None:
+                from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud_rest import iam_token_exchange
+                response = iam_token_exchange(api_key, env)
+                token = dict(
+                    (key, response[key]) for key in
+                    ('access_token', 'refresh_token', 'expiration'))
+                self._write(path, token)
+        return token
+
+    def _read(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+        with os.fdopen(fd) as file_obj:
+            # Only trust files of the user that nobody else can read
+            stat = os.fstat(fd)
+            if stat.st_uid != self.uid or stat.st_mode & 0o177:
+                return None
+            try:
+                token = json.load(file_obj)
+            except ValueError:
+                return None
+        if token.get('expiration', 0) - self.RENEW_SECONDS <= time.time():
+            return None
+        return token
+
+    @staticmethod
+    def _write(path, token):
+        tmp_path = '{}.{}.tmp'.format(path, _uuid4().hex)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as file_obj:
+            json.dump(token, file_obj)
+        os.rename(tmp_path, path)
+
+
+class ResourceStateCache:
+    """
+    Last known Terraform state of resources, keyed by resource type,
+    ID and provider version
+
+    Modules given an 'id' import the resource into a new working
+    directory on every run. With the cache, the state of the resource
+    after a successful run is kept in '<terraform_dir>/resource_states/'
+    (one file per user and key, named by a hash, readable by the owner
+    only). The next run for the same key starts from that state, which
+    the plan refreshes and the run saves, instead of importing. States
+    older than 'ttl' seconds are discarded. Writers serialize on a file
+    lock, readers only see complete files.
+
+    Args:
+        terraform_dir (str): Terraform working directory
+        ttl (float): Maximum age of a cached state in seconds
+    """
+    SUBDIR = 'resource_states'
+
+    def __init__(self, terraform_dir, ttl=RESOURCE_STATE_CACHE_TTL):
+        self.path = os.path.join(terraform_dir, self.SUBDIR)
+        self.ttl = ttl
+        makedirs_shared(self.path)
+
+    def _path(self, resource_type, resource_id, ibm_provider_version):
+        return os.path.join(self.path, _user_digest(
+            'resource_state', resource_type, resource_id,
+            ibm_provider_version))
+
+    def get(self, resource_type, resource_id, ibm_provider_version):
+        """
+        Get the cached state of a resource.
+
+        Args:
+            resource_type (str): Resource type (e.g.: 'ibm_is_vpc')
+            resource_id (str): Resource ID as passed to import
+            ibm_provider_version (str): IBM Cloud provider version
+
+        Returns:
+            dict: 'terraform_version' and 'resource' (the resource
+                  entry of a version 4 state), None if not cached or
+                  expired
+        """
+        path = self._path(resource_type, resource_id, ibm_provider_version)
+        try:
+            if os.path.getmtime(path) + self.ttl <= time.time():
+                return None
+            with open(path) as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, resource_type, resource_id, ibm_provider_version, state):
+        """
+        Cache the state of a resource, see 'get()'.
+        """
+        path = self._path(resource_type, resource_id, ibm_provider_version)
+        with FileLock(path + '.lock'):
+            tmp_path = '{}.{}.tmp'.format(path, _uuid4().hex)
+            fd = os.open(
+                tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as file_obj:
+                json.dump(state, file_obj)
+            os.rename(tmp_path, path)
+
+    def remove(self, resource_type, resource_id, ibm_provider_version):
+        """
+        Discard the cached state of a resource.
+        """
+        path = self._path(resource_type, resource_id, ibm_provider_version)
+        with FileLock(path + '.lock'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class TerraformInstaller:
+    """
+    Installation of the Terraform executable and the IBM Cloud
+    Terraform provider within 'terraform_dir'
+
+    Release archives are downloaded from 'TERRAFORM_BASE_URL' and
+    'IBM_PROVIDER_BASE_URL', unless an offline mirror is given. A mirror
+    is a directory or tar archive with the same layout as
+    'terraform_dir' (see 'build_offline_bundle()'); when set, nothing is
+    ever downloaded.
 
     Args:
-        parameters (dict): Resource parameter dictionary
         terraform_dir (str): Terraform working directory
+        terraform_version (str): Terraform version
         ibm_provider_version (str): IBM Cloud Terraform provider version
-        terraform_version (str, optional): Terraform version. TODO: If
-                                           not specified version is set
-                                           via table lookup.
-        env (dict, optional): Mapping of environment variables
+        mirror (str, optional): Offline mirror directory or bundle path
+        run_version (callable, optional): Runs the 'terraform version'
+            command string, returning (return code, stdout, stderr)
     """
     IBM_PROVIDER_BASE_URL = (
         "https://github.com"
         "/IBM-Cloud/terraform-provider-ibm/releases/download/")
     TERRAFORM_BASE_URL = "https://releases.hashicorp.com/terraform/"
-    TF_PROVIDER_TEMPLATE = """\
-    terraform {{
-        required_version = ">= 1.0"
-        required_providers {{ ibm = {{ source  = "IBM-Cloud/ibm" , version = ">= {ibm_provider_version}" }} }}
-    }}
-    provider "ibm" {{
-    {{% if generation is not none %}}
-        generation       = "{{{{ generation }}}}"
-    {{% endif %}}
-    {{% if region is not none %}}
-        region           = "{{{{ region }}}}"
-    {{% endif %}}
-    {{% if zone is not none %}}
-        zone             = "{{{{ zone }}}}"
-    {{% endif %}}
-    {{% if function_namespace is not none %}}
-        function_namespace = "{{{{ function_namespace }}}}"
-    {{% endif %}}
-    }}
-    """
 
     def __init__(
             self,
-            parameters,
             terraform_dir,
+            terraform_version,
             ibm_provider_version,
-            terraform_version='1.5.5',
-            env=None):
-
-        self.generation = None
-        if 'generation' in parameters:
-            self.generation = parameters['generation']
-        self.region = None
-        if 'region' in parameters:
-            self.region = parameters['region']
-        self.zone = None
-        if 'zone' in parameters:
-            self.zone = parameters['zone']
-        self.function_namespace = None
-        if 'function_namespace' in parameters:
-            self.function_namespace = parameters['function_namespace']
+            mirror=None,
+            run_version=None):
         self.terraform_dir = terraform_dir
-        self.ibm_provider_version = ibm_provider_version
         self.terraform_version = terraform_version
+        self.ibm_provider_version = ibm_provider_version
+        self.mirror = mirror or None
+        self.run_version = run_version or run_process
         self.executable_dir = os.path.join(terraform_dir, "terraform", terraform_version)
         self.executable = os.path.join(self.executable_dir, "terraform")
-        self.env = env
         self.platform = sys.platform
         if self.platform.startswith('linux'):
             self.platform = 'linux'
-        self.arch = platform.machine().lower()
+        self.arch = os.uname().machine.lower()
         if self.arch == 'x86_64':
             self.arch = 'amd64'
         elif "386" in self.arch:
@@ -693,117 +2049,614 @@ class Terraform:
         )
 
         # Create global 'terraform_dir' accessible by all system users
-        if not os.path.isdir(self.terraform_dir):
-            orig_umask = os.umask(0o000)
-            os.makedirs(self.terraform_dir)
-            os.umask(orig_umask)
-
-        # Create a subdirectory in 'terraform_dir' to use as a working
-        # directory for a single object instance
-        def tf_subdir_path():
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-            return os.path.join(self.terraform_dir, timestamp + str(uuid4()))
-        path = tf_subdir_path()
-        while os.path.isdir(path):
-            path = tf_subdir_path()
-        else:
-            self.directory = path
-            os.makedirs(self.directory)
+        makedirs_shared(self.terraform_dir)
 
-        # Create provider file in object subdir
-        self._render_provider_file()
+    def install(self):
+        """
+        Install Terraform and the IBM Cloud provider if the desired
+        versions are not found. Only one process installs each of them,
+        concurrent processes wait for the lock and then use the
+        installed files.
+        """
+        if not self._terraform_installed():
+            with FileLock(self._install_lock_path(
+                    'terraform_' + self.terraform_version)):
+                if not self._terraform_installed():
+                    self._install_terraform()
+
+        if not self._ibmcloud_tf_provider_installed():
+            with FileLock(self._install_lock_path(
+                    'terraform-provider-ibm_{}_{}_{}'.format(
+                        self.ibm_provider_version, self.platform, self.arch))):
+                if not self._ibmcloud_tf_provider_installed():
+                    self._install_ibmcloud_tf_provider()
+
+    def _install_lock_path(self, name):
+        return os.path.join(self.terraform_dir, '.{}.lock'.format(name))
+
+    def _terraform_installed(self):
+        """
+        Check for an existing Terraform executable of the desired
+        version. The executable's identity is recorded in a stamp file
+        beside 'executable_dir' so that later calls only need a single
+        'stat()'. The executable is only probed with 'terraform version'
+        if it is not known yet or changed since it was stamped, unless
+        it was just installed and verified by this class.
 
-        # Check for existing Terraform executable
-        if os.path.isfile(self.executable):
-            returncode, stdout, stderr = run_process(
+        Returns:
+            bool: True if the desired version is installed
+        """
+        try:
+            stat = os.stat(self.executable)
+        except OSError:
+            return False
+        stamp = self._read_stamp()
+        if (stamp is not None and
+                stamp.get('size') == stat.st_size and
+                stamp.get('mtime_ns') == stat.st_mtime_ns):
+            return stamp.get('version') == self.terraform_version
+
+        if (stamp is None and
+                self._read_verified_marker(self.executable_dir) is not None):
+            existing_version = self.terraform_version
+        else:
+            returncode, stdout, stderr = self.run_version(
                 '{} version'.format(self.executable))
             try:
                 existing_version = re.findall(
                     r"Terraform v(\d+\.\d+\.\d+)\n", stdout)[0]
             except IndexError:
                 existing_version = None
+        if existing_version is not None:
+            self._write_stamp(existing_version)
+        return existing_version == self.terraform_version
 
-        # Download and install Terraform if desired version not found
-        if (not os.path.isfile(self.executable) or
-                existing_version != self.terraform_version):
-            self._install_terraform()
+    def _stamp_path(self):
+        return self.executable_dir + '.stamp'
 
+    def _read_stamp(self):
+        try:
+            with open(self._stamp_path()) as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+
+    def _write_stamp(self, version):
+        # Record version and identity of the Terraform executable
+        import tempfile
+        stat = os.stat(self.executable)
+        digest = hashlib.sha256()
+        with open(self.executable, 'rb') as file_obj:
+            for chunk in iter(
+                    lambda: file_obj.read(DOWNLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        stamp = {
+            'version': version,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest.hexdigest()}
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.executable_dir))
+            with os.fdopen(fd, 'w') as file_obj:
+                json.dump(stamp, file_obj)
+            os.chmod(tmp_path, 0o644)
+            os.rename(tmp_path, self._stamp_path())
+        except OSError:
+            pass  # Stamp is an optimization only
+
+    def _ibmcloud_tf_provider_installed(self):
         # Check for existing IBM Cloud provider
-        provider_found = False
-        if os.path.isdir(self.ibm_provider_plugin_dir):
-            for item in os.listdir(self.ibm_provider_plugin_dir):
-                if item.startswith('terraform-provider-ibm_v'):
-                    if item == 'terraform-provider-ibm_v' + ibm_provider_version:
-                        provider_found = True
-
-        # Download and install IBM Cloud provider if desired version not
-        # found
-        if not provider_found:
-            self._install_ibmcloud_tf_provider()
-            time.sleep(2)
-
-        # Initialize Terraform
-        self.init()
-        self.refresh()
+        return os.path.isfile(os.path.join(
+            self.ibm_provider_plugin_dir,
+            'terraform-provider-ibm_v' + self.ibm_provider_version))
 
-    def _download_extract_zip(self, url, path):
+    @staticmethod
+    def _read_verified_marker(path):
+        try:
+            with open(os.path.join(path, VERIFIED_MARKER)) as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+
+    def _download_file(self, url, path):
+        """
+        Download a file in chunks without holding it in memory. An
+        existing partial download ('<path>.part') is resumed with an
+        HTTP range request if the server supports it.
+
+        Args:
+            url (str): File URL
+            path (str): Destination file path
+
+        Returns:
+            str: SHA256 hex digest of the downloaded file
+        """
         from ansible.module_utils.urls import open_url
-        from ansible.module_utils.six import BytesIO
-        from zipfile import ZipFile
-        if not os.path.isdir(path):
+        from ansible.module_utils.six.moves.urllib.error import HTTPError
+        part_path = path + '.part'
+        digest = hashlib.sha256()
+        offset = 0
+        if os.path.isfile(part_path):
+            with open(part_path, 'rb') as file_obj:
+                for chunk in iter(
+                        lambda: file_obj.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    offset += len(chunk)
+
+        headers = {}
+        if offset > 0:
+            headers['Range'] = 'bytes={}-'.format(offset)
+        try:
+            resp = open_url(url, headers=headers)
+        except HTTPError as err:
+            if err.code != 416:
+                raise
+            # Range not satisfiable, partial download is complete
+            resp = None
+
+        if resp is not None:
+            if offset > 0 and resp.getcode() != 206:
+                # Server ignored the range request, start over
+                digest = hashlib.sha256()
+                offset = 0
+            with open(part_path, 'ab' if offset > 0 else 'wb') as file_obj:
+                for chunk in iter(
+                        lambda: resp.read(DOWNLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    file_obj.write(chunk)
+        os.rename(part_path, path)
+        return digest.hexdigest()
+
+    def _download_verify(self, url, sums_url):
+        """
+        Download a release archive into '<terraform_dir>/downloads' and
+        verify it against the published SHA256SUMS file.
+
+        Args:
+            url (str): Archive URL
+            sums_url (str): SHA256SUMS URL listing the archive
+
+        Returns:
+            (str, str): Tuple with (archive path, SHA256 hex digest)
+        """
+        from ansible.module_utils.urls import open_url
+        filename = url.rsplit('/', 1)[-1]
+        sums = {}
+        for line in to_text(open_url(sums_url).read()).splitlines():
+            fields = line.split()
+            if len(fields) == 2:
+                sums[fields[1].lstrip('*')] = fields[0].lower()
+        if filename not in sums:
+            raise ValueError(
+                "'{}' is not listed in '{}'".format(filename, sums_url))
+
+        download_dir = os.path.join(self.terraform_dir, 'downloads')
+        if not os.path.isdir(download_dir):
             try:
-                os.makedirs(path)
-            except FileExistsError as err:
+                os.makedirs(download_dir)
+            except FileExistsError:
                 pass  # Concurrent makedirs are OK
-        resp = open_url(url)
-        zip_archive = ZipFile(BytesIO(resp.read()))
+        path = os.path.join(download_dir, filename)
+        sha256 = self._download_file(url, path)
+        if sha256 != sums[filename]:
+            os.remove(path)
+            raise ValueError(
+                "Checksum mismatch for '{}': expected {}, got {}".format(
+                    filename, sums[filename], sha256))
+        return path, sha256
+
+    def _download_extract_zip(self, url, sums_url, path, executable):
+        """
+        Download a zip archive and install its contents as directory
+        'path'. The archive is streamed to disk and verified against
+        'sums_url' before it is extracted into a temporary sibling
+        directory, which is renamed to 'path' once complete, so other
+        processes never see a partially extracted 'executable'. A
+        verified marker is written into 'path' so that later calls can
+        trust the installed files without hashing or probing them.
+
+        Args:
+            url (str): Zip archive URL
+            sums_url (str): SHA256SUMS URL listing the zip archive
+            path (str): Destination directory
+            executable (str): Name of the archive member to make
+                              executable
+        """
+        import shutil
+        from zipfile import ZipFile
+        archive, sha256 = self._download_verify(url, sums_url)
+        tmp_path = self._make_tmp_dir(path)
+        try:
+            with ZipFile(archive) as zip_archive:
+                zip_archive.extractall(tmp_path)
+            os.chmod(os.path.join(tmp_path, executable), 0o777)
+            with open(os.path.join(tmp_path, VERIFIED_MARKER), 'w') as file_obj:
+                json.dump({'archive': os.path.basename(archive),
+                           'sha256': sha256}, file_obj)
+            self._replace_dir(tmp_path, path)
+        finally:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        os.remove(archive)
+
+    def _install_from_mirror(self, path):
+        """
+        Install directory 'path' from the offline mirror. The mirror is
+        either a directory or a tar archive with the same layout as
+        'terraform_dir', e.g. as created by 'build_offline_bundle()'.
+        Files of a mirror directory are hard linked, or copied if the
+        mirror is on another file system.
+
+        Args:
+            path (str): Destination directory within 'terraform_dir'
+        """
+        import shutil
+        import tarfile
+        from ansible.errors import AnsibleError
+        relpath = os.path.relpath(path, self.terraform_dir)
+        tmp_path = self._make_tmp_dir(path)
         try:
-            zip_archive.extractall(path)
-        except OSError as err:
-            if err.errno != 26:  # [Errno 26] Text file busy usually caused by another thread downloading terraform
-                raise err
+            if os.path.isdir(self.mirror):
+                src_dir = os.path.join(self.mirror, relpath)
+                if not os.path.isdir(src_dir):
+                    raise AnsibleError(
+                        "'%s' not found in offline mirror '%s'" %
+                        (relpath, self.mirror))
+                for name in os.listdir(src_dir):
+                    src = os.path.join(src_dir, name)
+                    try:
+                        os.link(src, os.path.join(tmp_path, name))
+                    except OSError:
+                        shutil.copy2(src, os.path.join(tmp_path, name))
+            else:
+                prefix = relpath.replace(os.sep, '/') + '/'
+                found = False
+                with tarfile.open(self.mirror) as bundle:
+                    for member in bundle:
+                        name = member.name
+                        if name.startswith('./'):
+                            name = name[2:]
+                        if not member.isfile() or not name.startswith(prefix):
+                            continue
+                        member.name = name[len(prefix):]
+                        if '/' in member.name:
+                            continue
+                        if hasattr(tarfile, 'data_filter'):
+                            bundle.extract(member, tmp_path, filter='data')
+                        else:
+                            bundle.extract(member, tmp_path)
+                        found = True
+                if not found:
+                    raise AnsibleError(
+                        "'%s' not found in offline bundle '%s'" %
+                        (relpath, self.mirror))
+            self._replace_dir(tmp_path, path)
+        finally:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @staticmethod
+    def _make_tmp_dir(path):
+        # Temporary sibling directory, renamed to 'path' once complete
+        import tempfile
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            try:
+                os.makedirs(parent)
+            except FileExistsError:
+                pass  # Concurrent makedirs are OK
+        return tempfile.mkdtemp(
+            prefix='.{}.'.format(os.path.basename(path)), dir=parent)
+
+    @staticmethod
+    def _replace_dir(tmp_path, path):
+        import shutil
+        os.chmod(tmp_path, 0o755)
+        if os.path.isfile(path):
+            os.remove(path)
+        elif os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
 
     def _install_terraform(self):
-        if os.path.isfile(self.executable_dir):
-            os.remove(self.executable_dir)
+        if self.mirror is None:
+            self._download_terraform()
+        else:
+            self._install_from_mirror(self.executable_dir)
+        self._write_stamp(self.terraform_version)
+
+    def _download_terraform(self):
+        from ansible.errors import AnsibleError
         download_url = "{0}{1}/terraform_{1}_{2}_{3}.zip".format(
             self.TERRAFORM_BASE_URL, self.terraform_version, self.platform, self.arch)
+        sums_url = "{0}{1}/terraform_{1}_SHA256SUMS".format(
+            self.TERRAFORM_BASE_URL, self.terraform_version)
         try:
-            self._download_extract_zip(download_url, self.executable_dir)
+            self._download_extract_zip(
+                download_url, sums_url, self.executable_dir, 'terraform')
         except Exception as err:
             raise AnsibleError(
                 "Unable to download Terraform from '%s'. Error: '%s'" %
                     (download_url, to_native(err))
             )
-        os.chmod(self.executable, 0o777)
 
     def _install_ibmcloud_tf_provider(self):
+        from ansible.errors import AnsibleError
         filename = 'terraform-provider-ibm_v' + self.ibm_provider_version
+        if self.mirror is not None:
+            self._install_from_mirror(self.ibm_provider_plugin_dir)
+            return
         download_url = "{0}v{1}/terraform-provider-ibm_{1}_{2}_{3}.zip".format(
                 self.IBM_PROVIDER_BASE_URL, self.ibm_provider_version, self.platform, self.arch)
+        sums_url = "{0}v{1}/terraform-provider-ibm_{1}_SHA256SUMS".format(
+                self.IBM_PROVIDER_BASE_URL, self.ibm_provider_version)
         try:
-            self._download_extract_zip(download_url, self.ibm_provider_plugin_dir)
+            self._download_extract_zip(
+                download_url, sums_url, self.ibm_provider_plugin_dir, filename)
         except Exception as err:
             raise AnsibleError(
                 "Unable to download IBM Cloud Terraform provider from '%s'. Error: '%s'" %
                     (download_url, to_native(err))
             )
-        os.chmod(os.path.join(self.ibm_provider_plugin_dir, filename), 0o777)
-
-    def _render_provider_file(self):
-        # Render terraform provider file
-        templateEnv = jinja2.Environment(trim_blocks=True)
-        provider_template = templateEnv.from_string(
-            dedent(self.TF_PROVIDER_TEMPLATE.format(
-                ibm_provider_version=self.ibm_provider_version)))
-        with open(
-                os.path.join(self.directory, 'provider.tf'), 'w') as file_obj:
-            file_obj.write(provider_template.render(
-                {'generation': self.generation,
-                 'region': self.region,
-                 'zone': self.zone,
-                 'function_namespace': self.function_namespace}))
-            file_obj.write("\n")
+
+
+class Terraform:
+    """
+    Interaction with Terraform
+
+    Constructor looks for Terraform executable and IBM Cloud Terraform
+    provider that satisfy version requirements passed into arguments. If
+    specified versions are not found they will be downloaded and
+    installed within the 'terraform_dir'.
+
+    The working directory moves through the lifecycle phases listed in
+    'PHASES'. Phases that already ran successfully and would not change
+    anything (e.g.: a second 'init', or 'refresh' without any state) are
+    skipped instead of spawning another Terraform process. The number of
+    spawned and skipped processes, and the time spent, are recorded per
+    phase in 'phase_stats'. Commands are interrupted after the timeout
+    set with 'IBMCLOUD_ANSIBLE_TERRAFORM_<PHASE>_TIMEOUT' or
+    'IBMCLOUD_ANSIBLE_TERRAFORM_TIMEOUT' in 'env', if any. With
+    'IBMCLOUD_ANSIBLE_RESIDENT_PROVIDER' set in 'env', the phases in
+    'PROVIDER_PHASES' attach to a 'ResidentProvider' instead of
+    launching the provider plugin.
+
+    Args:
+        parameters (dict): Resource parameter dictionary
+        terraform_dir (str): Terraform working directory
+        ibm_provider_version (str): IBM Cloud Terraform provider version
+        terraform_version (str, optional): Terraform version. TODO: If
+                                           not specified version is set
+                                           via table lookup.
+        env (dict, optional): Mapping of environment variables
+        workspace_pool (WorkspacePool, optional): Pool to check out an
+                                                  initialized working
+                                                  directory from
+        progress (callable, optional): Called with the lifecycle phase,
+                                       the stream name and the text of
+                                       each chunk of Terraform output
+    """
+    PHASES = (
+        'version', 'init', 'refresh', 'import', 'plan', 'apply', 'destroy')
+    # Phases that start the provider plugin
+    PROVIDER_PHASES = ('refresh', 'import', 'plan', 'apply', 'destroy')
+    PLAN_FILE = 'ansible.tfplan'
+    TF_PROVIDER_TEMPLATE = """\
+    terraform {{
+        required_version = ">= 1.0"
+        required_providers {{ ibm = {{ source  = "IBM-Cloud/ibm" , version = ">= {ibm_provider_version}" }} }}
+    }}
+    provider "ibm" {{
+    {arguments}}}
+    """
+    # Provider arguments rendered if not None
+    TF_PROVIDER_ARGUMENTS = (
+        ('generation', '    generation       = "{}"\n'),
+        ('region', '    region           = "{}"\n'),
+        ('zone', '    zone             = "{}"\n'),
+        ('function_namespace', '    function_namespace = "{}"\n'),
+    )
+
+    def __init__(
+            self,
+            parameters,
+            terraform_dir,
+            ibm_provider_version,
+            terraform_version=TERRAFORM_VERSION,
+            env=None,
+            workspace_pool=None,
+            progress=None):
+
+        self.generation = None
+        if 'generation' in parameters:
+            self.generation = parameters['generation']
+        self.region = None
+        if 'region' in parameters:
+            self.region = parameters['region']
+        self.zone = None
+        if 'zone' in parameters:
+            self.zone = parameters['zone']
+        self.function_namespace = None
+        if 'function_namespace' in parameters:
+            self.function_namespace = parameters['function_namespace']
+        self.terraform_dir = terraform_dir
+        self.ibm_provider_version = ibm_provider_version
+        self.terraform_version = terraform_version
+        self.env = env
+        self.progress = progress
+        self.completed_phases = set()
+        self.phase_stats = {}
+        self.installer = TerraformInstaller(
+            terraform_dir,
+            terraform_version,
+            ibm_provider_version,
+            mirror=(env or {}).get('IBMCLOUD_ANSIBLE_TERRAFORM_MIRROR'),
+            run_version=lambda command: self._run_phase(
+                'version', command, cwd=None))
+        self.platform = self.installer.platform
+        self.arch = self.installer.arch
+        self.executable_dir = self.installer.executable_dir
+        self.executable = self.installer.executable
+        self.ibm_provider_plugin_dir_parent = (
+            self.installer.ibm_provider_plugin_dir_parent)
+        self.ibm_provider_plugin_dir = self.installer.ibm_provider_plugin_dir
+
+        # Create a subdirectory in 'terraform_dir' to use as a working
+        # directory for a single object instance, or check out an
+        # initialized one for the same provider configuration
+        self.workspace_pool = workspace_pool
+        self.warm = False
+        provider_config = self._render_provider_config()
+        if self.workspace_pool is not None:
+            self.directory, self.warm = self.workspace_pool.checkout(
+                WorkspacePool.key(
+                    self.terraform_version,
+                    self.ibm_provider_version,
+                    provider_config))
+        else:
+            def tf_subdir_path():
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+                return os.path.join(self.terraform_dir, timestamp + str(_uuid4()))
+            path = tf_subdir_path()
+            while os.path.isdir(path):
+                path = tf_subdir_path()
+            else:
+                self.directory = path
+                os.makedirs(self.directory)
+
+        # Create provider file in object subdir
+        if self.warm:
+            self.completed_phases.add('init')
+        else:
+            with open(
+                    os.path.join(self.directory, 'provider.tf'), 'w') as file_obj:
+                file_obj.write(provider_config)
+
+        # Commands using the provider attach to a resident provider
+        # process, if enabled
+        self.resident_provider = None
+        if _env_enabled(env, 'IBMCLOUD_ANSIBLE_RESIDENT_PROVIDER'):
+            try:
+                self.resident_provider = ResidentProvider(
+                    terraform_dir,
+                    os.path.join(
+                        self.ibm_provider_plugin_dir,
+                        'terraform-provider-ibm_v' + ibm_provider_version),
+                    ibm_provider_version,
+                    env,
+                    float(env.get(
+                        'IBMCLOUD_ANSIBLE_RESIDENT_PROVIDER_TTL',
+                        RESIDENT_PROVIDER_TTL)))
+            except OSError:
+                pass  # Terraform launches the provider for each command
+
+        # Resource blocks are written in HCL, or in Terraform JSON syntax
+        # if 'IBMCLOUD_ANSIBLE_TERRAFORM_JSON' is true
+        self.json_config = _env_enabled(env, 'IBMCLOUD_ANSIBLE_TERRAFORM_JSON')
+
+        # Resources given by ID start from their cached state, if enabled
+        self.state_cache = None
+        self.restored_state = False
+        if _env_enabled(env, 'IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE'):
+            self.state_cache = ResourceStateCache(
+                terraform_dir,
+                float(env.get(
+                    'IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE_TTL',
+                    RESOURCE_STATE_CACHE_TTL)))
+
+        # Download and install Terraform and the IBM Cloud provider if
+        # the desired versions are not found
+        self.installer.install()
+
+        # Initialize Terraform. Refresh is a no-op until the working
+        # directory holds state.
+        self.init()
+        self.refresh()
+
+    def _run_phase(
+            self,
+            phase,
+            command,
+            cwd=True,
+            buffer_size=RUN_PROCESS_BUFFER_SIZE):
+        """
+        Run a Terraform command for a lifecycle phase and record its
+        duration in 'phase_stats'.
+
+        Args:
+            phase (str): Lifecycle phase, one of 'PHASES'
+            command (str): Full command string
+            cwd (str or bool, optional): Process current working
+                directory, defaults to the object's working directory
+            buffer_size (int, optional): Bytes of output kept in memory
+                per stream, see 'run_process()'
+
+        Returns:
+            (int, str, str): Tuple with (return code, stdout, stderr)
+        """
+        if cwd is True:
+            cwd = self.directory
+        stats = self._phase_stats(phase)
+        kwargs = {
+            'timeout': self._phase_timeout(phase),
+            'buffer_size': buffer_size,
+        }
+        if cwd is not None:
+            # Output beyond the in-memory limit goes to the workspace
+            kwargs['spill_path'] = os.path.join(
+                cwd, 'terraform_{}_{}'.format(phase, stats['spawns'] + 1))
+        if self.progress is not None:
+            kwargs['progress'] = (
+                lambda stream, text: self.progress(phase, stream, text))
+
+        start = time.monotonic()
+        if (self.resident_provider is not None and
+                phase in self.PROVIDER_PHASES):
+            with self.resident_provider as reattach:
+                env = self.env
+                if reattach is not None:
+                    env = dict(self.env, TF_REATTACH_PROVIDERS=reattach)
+                returncode, stdout, stderr = run_process(
+                    command, cwd=cwd, env=env, **kwargs)
+        else:
+            returncode, stdout, stderr = run_process(
+                command, cwd=cwd, env=self.env, **kwargs)
+        stats['spawns'] += 1
+        stats['seconds'] += time.monotonic() - start
+        return returncode, stdout, stderr
+
+    def _phase_timeout(self, phase):
+        # Per phase timeout, or the timeout for all phases, in seconds
+        env = self.env or {}
+        for name in ('IBMCLOUD_ANSIBLE_TERRAFORM_{}_TIMEOUT'.format(phase.upper()),
+                     'IBMCLOUD_ANSIBLE_TERRAFORM_TIMEOUT'):
+            if env.get(name):
+                return float(env[name])
+        return None
+
+    def _skip_phase(self, phase):
+        self._phase_stats(phase)['skipped'] += 1
+        return (0, '', '')
+
+    def _phase_stats(self, phase):
+        if phase not in self.phase_stats:
+            self.phase_stats[phase] = {
+                'spawns': 0, 'skipped': 0, 'seconds': 0.0}
+        return self.phase_stats[phase]
+
+    def _has_state(self):
+        return os.path.isfile(os.path.join(self.directory, 'terraform.tfstate'))
+
+    def _render_provider_config(self):
+        # Render terraform provider file contents
+        arguments = ''.join(
+            line.format(getattr(self, name))
+            for name, line in self.TF_PROVIDER_ARGUMENTS
+            if getattr(self, name) is not None)
+        return dedent(self.TF_PROVIDER_TEMPLATE).format(
+            ibm_provider_version=self.ibm_provider_version,
+            arguments=arguments)
 
     def cleanup(self, result, rm_subdir):
         """
@@ -817,15 +2670,27 @@ class Terraform:
             rm_subdir (bool): If True subdir and all contents are
                               removed
         """
+        import shutil
         if os.path.isdir(self.directory):
+            # Kept workspaces are moved out of the pool
+            keep_path = self.directory
+            if self.workspace_pool is not None:
+                keep_path = os.path.join(
+                    self.terraform_dir,
+                    datetime.now().strftime("%Y%m%d%H%M%S%f") + str(_uuid4()))
             if result['rc'] != 0:
                 result_path = os.path.join(
                     self.directory, 'ansible_result.json')
                 with open(result_path, 'w') as file_obj:
                     file_obj.write(json.dumps(result))
-                os.rename(self.directory, self.directory + '_fail')
+                os.rename(self.directory, keep_path + '_fail')
             elif rm_subdir:
-                shutil.rmtree(self.directory)
+                if self.workspace_pool is not None:
+                    self.workspace_pool.checkin(self.directory)
+                else:
+                    shutil.rmtree(self.directory)
+            elif self.workspace_pool is not None:
+                os.rename(self.directory, keep_path)
 
     def init(self):
         """
@@ -834,14 +2699,20 @@ class Terraform:
         Returns:
             (int, str, str): Tuple with (return code, stdout, stderr)
         """
+        # Adding resources does not require another init, the provider
+        # requirements of the working directory never change
+        if 'init' in self.completed_phases:
+            return self._skip_phase('init')
         command = '{} init -no-color -plugin-dir {}'.format(self.executable, self.ibm_provider_plugin_dir_parent)
-        returncode, stdout, stderr = run_process(command, cwd=self.directory, env=self.env)
+        returncode, stdout, stderr = self._run_phase('init', command)
 
         if returncode == 1 and "doesn't match any of the checksums" in stderr:
             providers_lock = '{} providers lock'.format(self.executable)
-            returncode, stdout, stderr = run_process(providers_lock, cwd=self.directory, env=self.env)
-            returncode, stdout, stderr = run_process(command, cwd=self.directory, env=self.env)
+            returncode, stdout, stderr = self._run_phase('init', providers_lock)
+            returncode, stdout, stderr = self._run_phase('init', command)
 
+        if returncode == 0:
+            self.completed_phases.add('init')
         return returncode, stdout, stderr
 
     def refresh(self):
@@ -852,11 +2723,18 @@ class Terraform:
         Returns:
             (int, str, str): Tuple with (return code, stdout, stderr)
         """
+        # Nothing to refresh without state, and state that was just
+        # refreshed, imported or applied is already current
+        if not self._has_state() or 'refresh' in self.completed_phases:
+            return self._skip_phase('refresh')
         returncode, stdout, stderr = self.init()
         if returncode > 0:
             return (returncode, stdout, stderr)
         command = '{} refresh -no-color'.format(self.executable)
-        return run_process(command, cwd=self.directory, env=self.env)
+        returncode, stdout, stderr = self._run_phase('refresh', command)
+        if returncode == 0:
+            self.completed_phases.add('refresh')
+        return returncode, stdout, stderr
 
     def apply(self, target=None):
         """
@@ -875,7 +2753,65 @@ class Terraform:
         if target is not None:
             command += '-target={} '.format(target)
         command += '-no-color -auto-approve'
-        return run_process(command, cwd=self.directory, env=self.env)
+        returncode, stdout, stderr = self._run_phase('apply', command)
+        if returncode == 0:
+            self.completed_phases.add('refresh')
+        return returncode, stdout, stderr
+
+    def plan(self, target=None):
+        """
+        Run Terraform plan to 'Show changes required by the current
+        configuration', and save the plan for 'apply_plan()'. The
+        change set is read from the saved plan's JSON representation.
+
+        Args:
+            target (str, optional): Resource Address to target
+
+        Returns:
+            (int, str, str, list): Tuple with (return code, stdout,
+                                   stderr, addresses of the managed
+                                   resources the plan changes)
+        """
+        returncode, stdout, stderr = self.init()
+        if returncode > 0:
+            return (returncode, stdout, stderr, [])
+        command = '{} plan '.format(self.executable)
+        if target is not None:
+            command += '-target={} '.format(target)
+        command += '-no-color -input=false -detailed-exitcode -out={}'.format(
+            self.PLAN_FILE)
+        returncode, stdout, stderr = self._run_phase('plan', command)
+        # Exit code 2: succeeded with a non-empty plan
+        if returncode != 2:
+            return (returncode, stdout, stderr, [])
+
+        command = '{} show -no-color -json {}'.format(
+            self.executable, self.PLAN_FILE)
+        returncode, show_stdout, stderr = self._run_phase(
+            'plan', command, buffer_size=None)
+        if returncode > 0:
+            return (returncode, stdout, stderr, [])
+        changes = []
+        for change in json.loads(show_stdout).get('resource_changes', []):
+            if change.get('mode', 'managed') != 'managed':
+                continue
+            if change['change']['actions'] not in (['no-op'], ['read']):
+                changes.append(change['address'])
+        return (0, stdout, stderr, changes)
+
+    def apply_plan(self):
+        """
+        Run Terraform apply to apply the plan saved by 'plan()'
+
+        Returns:
+            (int, str, str): Tuple with (return code, stdout, stderr)
+        """
+        command = '{} apply -no-color -input=false {}'.format(
+            self.executable, self.PLAN_FILE)
+        returncode, stdout, stderr = self._run_phase('apply', command)
+        if returncode == 0:
+            self.completed_phases.add('refresh')
+        return returncode, stdout, stderr
 
     def destroy(self, target):
         """
@@ -892,7 +2828,7 @@ class Terraform:
         if target is not None:
             command += '-target={} '.format(target)
         command += '-no-color -auto-approve'
-        return run_process(command, cwd=self.directory, env=self.env)
+        return self._run_phase('destroy', command)
 
     def import_(self, target, resource_id):
         """
@@ -907,13 +2843,17 @@ class Terraform:
         """
         command = '{} import {} {} -no-color'.format(
             self.executable, target, resource_id)
-        return run_process(command, cwd=self.directory, env=self.env)
+        returncode, stdout, stderr = self._run_phase('import', command)
+        if returncode == 0:
+            self.completed_phases.add('refresh')
+        return returncode, stdout, stderr
 
     def set_existing_args(self, resource):
         """
         Set any missing required arguments for an existing resource.
         This method requires the 'resource.id_' attribute to be set in
-        order to call the 'self.import()' method.
+        order to call the 'self.import()' method. A cached state of the
+        resource (see 'ResourceStateCache') replaces the import.
 
         Args:
             resource (Resource): Resource object
@@ -942,10 +2882,12 @@ class Terraform:
             elif isinstance(args, dict):
                 return args
 
-        return_code, _, _ = self.import_(resource.target, resource.id_)
-        if return_code != 0:
-            return False
-        existing_args = self.get_tfstate_attributes(resource.target)
+        if not self.restore_state(resource):
+            return_code, _, _ = self.import_(resource.target, resource.id_)
+            if return_code != 0:
+                return False
+        existing_args = self.get_tfstate_attributes(
+            resource.target, mode='managed')
         for arg, arg_type in resource.tl_required_params:
             if resource.parameters[arg] is None:
                 try:
@@ -960,6 +2902,82 @@ class Terraform:
         self.add_resource(resource)
         return True
 
+    def restore_state(self, resource):
+        """
+        Write the cached state of a resource, renamed to its target in
+        this working directory, as the Terraform state.
+
+        Args:
+            resource (Resource): Resource object with 'id_' set
+
+        Returns:
+            bool: True if a cached state was restored
+        """
+        if self.state_cache is None or self._has_state():
+            return False
+        cached = self.state_cache.get(
+            resource.resource_type, resource.id_, self.ibm_provider_version)
+        if cached is None:
+            return False
+        cached['resource']['name'] = resource.tf_name
+        tfstate = {
+            'version': 4,
+            'terraform_version': cached['terraform_version'],
+            'serial': 1,
+            'lineage': str(_uuid4()),
+            'outputs': {},
+            'resources': [cached['resource']],
+        }
+        with open(
+                os.path.join(self.directory, 'terraform.tfstate'),
+                'w') as file_obj:
+            json.dump(tfstate, file_obj)
+        self.restored_state = True
+        return True
+
+    def update_state_cache(self, resource, result):
+        """
+        Cache the state of a managed resource after a run, or discard
+        it if the resource was destroyed or the run failed.
+
+        Args:
+            resource (Resource): Resource object
+            result (dict): Ansible result dictionary
+        """
+        if self.state_cache is None or resource.tf_type != 'resource':
+            return
+        path = os.path.join(self.directory, 'terraform.tfstate')
+        entry = None
+        if (result['rc'] == 0 and os.path.isfile(path) and
+                resource.parameters.get('state') != 'absent'):
+            with open(path) as file_obj:
+                tfstate = json.load(file_obj)
+            _type, _name = resource.target.split('.', 1)
+            for state_resource in tfstate.get('resources', []):
+                if (state_resource['mode'] == 'managed' and
+                        state_resource['type'] == _type and
+                        state_resource['name'] == _name and
+                        state_resource['instances']):
+                    entry = state_resource
+                    break
+
+        # The import ID of a resource is its 'id' attribute
+        resource_id = None
+        if entry is not None:
+            resource_id = entry['instances'][0].get(
+                'attributes', {}).get('id')
+        if resource.id_ is not None and resource.id_ != resource_id:
+            self.state_cache.remove(
+                resource.resource_type, resource.id_,
+                self.ibm_provider_version)
+        if resource_id is not None:
+            self.state_cache.put(
+                resource.resource_type, resource_id,
+                self.ibm_provider_version,
+                {'terraform_version': tfstate.get(
+                     'terraform_version', self.terraform_version),
+                 'resource': entry})
+
     def add_resource(self, resource):
         """
         Add resource to Terraform environment.
@@ -967,6 +2985,18 @@ class Terraform:
         Args:
             resource (Resource): Resource object
         """
+        # Write terraform resource block to file, in JSON syntax if
+        # enabled
+        if self.json_config:
+            config = {resource.tf_type: {resource.resource_type: {
+                resource.tf_name: tf_json_block(
+                    resource.parameters,
+                    validate_tl_params=resource.tl_all_params)}}}
+            # 'json.dumps()' uses the C encoder, 'json.dump()' does not
+            with open(self._resource_file(resource), 'w') as file_obj:
+                file_obj.write(json.dumps(config))
+            return
+
         # Generate TF resource block
         tf_block = (
             '{} {} "{}" '.format(resource.tf_type, resource.resource_type, resource.tf_name) +
@@ -980,20 +3010,44 @@ class Terraform:
             '}\n'
         )
 
-        # Write terraform resource block to file
-        resource_file = '{}_{}.tf'.format(
-            resource.resource_type, resource.tf_name)
-        with open(
-                os.path.join(self.directory, resource_file), 'w') as file_obj:
+        with open(self._resource_file(resource), 'w') as file_obj:
             file_obj.write(tf_block)
 
-    def get_tfstate_attributes(self, target):
+    def remove_resource(self, resource):
+        """
+        Remove a resource added with 'add_resource()' from the
+        Terraform environment.
+
+        Args:
+            resource (Resource): Resource object
+        """
+        os.remove(self._resource_file(resource))
+
+    def _resource_file(self, resource):
+        # Data sources and resources of the same type and name can be
+        # added to the same working directory
+        return os.path.join(self.directory, '{}_{}_{}.{}'.format(
+            resource.tf_type, resource.resource_type, resource.tf_name,
+            'tf.json' if self.json_config else 'tf'))
+
+    def get_tfstate_attributes(self, target, return_fields=None, mode=None):
         """
         Retrieve resource primary.attributes dictionary from Terraform
         tfstate data.
 
+        State format version 4 stores nested JSON 'attributes', which
+        are returned as they are. Flat 'attributes_flat' maps of states
+        upgraded from older Terraform versions are expanded.
+
         Args:
             target (str): Resource Address to target
+            return_fields (list of str, optional): Attribute paths to
+                return (see 'parse_return_fields()'). From state files of
+                'TFSTATE_SCAN_SIZE' bytes or more, only these are
+                decoded.
+            mode (str, optional): Only match resources of this mode
+                ('managed' or 'data'); a working directory can hold a
+                resource and a data source with the same address
 
         Returns:
             dict: Resource/DataSource return data structure, empty dict
@@ -1001,69 +3055,153 @@ class Terraform:
         """
         def str_keys(dictionary):
             output = {}
-            for key, value in iteritems(attributes):
+            for key, value in iteritems(dictionary):
                 output[ensure_str(key)] = value
             return output
 
         # Load 'tfstate' json file to extract result data
-        if not os.path.isfile(
-                os.path.join(self.directory, 'terraform.tfstate')):
+        path = os.path.join(self.directory, 'terraform.tfstate')
+        if not os.path.isfile(path):
             return dict()
-        with open(
-                os.path.join(self.directory, 'terraform.tfstate')) as file_obj:
+        tree = None
+        if return_fields:
+            tree = parse_return_fields(return_fields)
+            if os.path.getsize(path) >= TFSTATE_SCAN_SIZE:
+                return self._project_tfstate(target, tree, mode)
+        with open(path) as file_obj:
             tfstate = json.load(file_obj)
 
         _type, _name = target.split('.', 1)
         for resource in tfstate['resources']:
-            if resource['name'] == _name and resource['type'] == _type:
-                attributes = resource['instances'][0]['attributes']
+            if self._matches(resource, _type, _name, mode):
+                instance = resource['instances'][0]
                 break
         else:
             return {'_type': _type, '_name': _name, 'target': target}
 
+        if 'attributes' in instance:
+            attributes = str_keys(instance['attributes'])
+        else:
+            attributes = instance.get('attributes_flat', {})
+            try:
+                attributes = str_keys(self.expand_flatmap(attributes))
+            except KeyError:
+                return str_keys(attributes)
+        if tree is not None:
+            return project_attributes(attributes, tree)
+        return attributes
+
+    @staticmethod
+    def _matches(resource, _type, _name, mode):
+        return (
+            resource.get('type') == _type and
+            resource.get('name') == _name and
+            (mode is None or resource.get('mode') == mode))
+
+    def _project_tfstate(self, target, tree, mode=None):
+        # Scan the memory mapped state for the target instance and
+        # decode only the projected attributes
+        import mmap
+
+        _type, _name = target.split('.', 1)
+        path = os.path.join(self.directory, 'terraform.tfstate')
+        with open(path, 'rb') as file_obj:
+            buf = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
         try:
-            expanded_attributes = dict()
-            for key, value in iteritems(attributes):
-                if key.endswith('.#'):
+            scanner = _JSONScanner(buf)
+            for key in scanner.keys():
+                if key != 'resources':
+                    scanner.skip()
                     continue
-                sub_keys = key.split('.')
-                nested_pointer = expanded_attributes
-                for index, sub_key in enumerate(sub_keys):
-                    if sub_key.isdigit():
-                        sub_key = int(sub_key)
-                        if sub_key > 10000:
-                            sub_key = len(nested_pointer)
-                            nested_pointer += ['']
-                        elif sub_key >= len(nested_pointer):
-                            nested_pointer += (
-                                [''] * (
-                                    int(sub_key) + 1 - len(nested_pointer)))
-                        elif type(nested_pointer[sub_key]) is not str:
-                            nested_pointer = nested_pointer[sub_key]
-                            continue
+                for _ in scanner.indexes():
+                    resource = {}
+                    instances = None
+                    for resource_key in scanner.keys():
+                        if resource_key != 'instances':
+                            resource[resource_key] = scanner.load()
+                        elif self._matches(resource, _type, _name, mode):
+                            return self._project_instance(scanner, tree)
+                        else:
+                            # Terraform writes 'instances' last, but
+                            # the keys are unordered in JSON
+                            instances = scanner.skip()
+                    if (instances is not None and
+                            self._matches(resource, _type, _name, mode)):
+                        scanner.pos = instances
+                        return self._project_instance(scanner, tree)
+        finally:
+            buf.close()
+        return {'_type': _type, '_name': _name, 'target': target}
+
+    def _project_instance(self, scanner, tree):
+        # Decode the first instance of a resource
+        for _ in scanner.indexes():
+            instance = {}
+            for key in scanner.keys():
+                if key == 'attributes':
+                    instance[key] = scanner.project(tree)
+                elif key == 'attributes_flat':
+                    instance[key] = scanner.load()
+                else:
+                    scanner.skip()
+            if 'attributes' in instance:
+                return instance['attributes']
+            return project_attributes(self.expand_flatmap(
+                instance.get('attributes_flat', {})), tree)
+        return {}
 
-                    if (type(nested_pointer) is list and
-                            sub_key in nested_pointer):
-                        nested_pointer = nested_pointer[sub_key]
-                        continue
+    @staticmethod
+    def expand_flatmap(attributes):
+        """
+        Expand flatmap attributes (e.g.: {'a.#': '1', 'a.0.b': 'c'}) to
+        nested data (e.g.: {'a': [{'b': 'c'}]}).
+
+        Args:
+            attributes (dict): Flatmap attributes
 
-                    if (type(nested_pointer) is dict and
-                            sub_key in nested_pointer):
+        Returns:
+            dict: Nested attributes
+        """
+        expanded_attributes = dict()
+        for key, value in iteritems(attributes):
+            if key.endswith('.#'):
+                continue
+            sub_keys = key.split('.')
+            nested_pointer = expanded_attributes
+            for index, sub_key in enumerate(sub_keys):
+                if sub_key.isdigit():
+                    sub_key = int(sub_key)
+                    if sub_key > 10000:
+                        sub_key = len(nested_pointer)
+                        nested_pointer += ['']
+                    elif sub_key >= len(nested_pointer):
+                        nested_pointer += (
+                            [''] * (
+                                int(sub_key) + 1 - len(nested_pointer)))
+                    elif type(nested_pointer[sub_key]) is not str:
                         nested_pointer = nested_pointer[sub_key]
                         continue
 
-                    if (index + 1) == len(sub_keys):
-                        nested_pointer[sub_key] = value
-                    if (index + 1) < len(sub_keys):
-                        if sub_keys[index + 1].isdigit():
-                            nested_pointer[sub_key] = list()
-                        else:
-                            nested_pointer[sub_key] = dict()
-                        nested_pointer = nested_pointer[sub_key]
+                if (type(nested_pointer) is list and
+                        sub_key in nested_pointer):
+                    nested_pointer = nested_pointer[sub_key]
+                    continue
+
+                if (type(nested_pointer) is dict and
+                        sub_key in nested_pointer):
+                    nested_pointer = nested_pointer[sub_key]
+                    continue
+
+                if (index + 1) == len(sub_keys):
+                    nested_pointer[sub_key] = value
+                if (index + 1) < len(sub_keys):
+                    if sub_keys[index + 1].isdigit():
+                        nested_pointer[sub_key] = list()
+                    else:
+                        nested_pointer[sub_key] = dict()
+                    nested_pointer = nested_pointer[sub_key]
 
-            return str_keys(expanded_attributes)
-        except KeyError:
-            return str_keys(attributes)
+        return expanded_attributes
 
     @staticmethod
     def parse_stderr(stderr):
@@ -1173,3 +3311,48 @@ def fmt_tf_block(
             output += indent() + key + ' = ' + json.dumps(value) + '\n'
 
     return output
+
+
+def tf_json_block(arg_dict, validate_tl_params=[]):
+    """
+    Convert a dictionary of configuration arguments into the body of a
+    block in Terraform JSON syntax ('*.tf.json'), with the same rules
+    as 'fmt_tf_block()': 'None' values are left out, a trailing '_' is
+    removed from keys and 'true'/'false' strings become booleans.
+
+    Terraform decodes JSON syntax with the provider schema, so lists of
+    dictionaries become nested blocks or attributes as the schema
+    defines them.
+
+    Args:
+        arg_dict (dict): Dictionary of configuration arguments
+        validate_tl_params (list, optional): Only allow top level
+            parameters found on this list. If list is empty any top
+            level parameter is allowed.
+
+    Returns:
+        dict: Block body, ready for 'json.dump()'
+    """
+    def convert(value):
+        if isinstance(value, string_types):
+            if len(value) in (4, 5) and value.lower() in ('true', 'false'):
+                return value.lower() == 'true'
+            return value
+        if isinstance(value, dict):
+            return convert_dict(value)
+        if isinstance(value, list):
+            if len(value) >= 1 and isinstance(value[0], dict):
+                return [convert_dict(item) for item in value]
+        return value
+
+    def convert_dict(dictionary, allowed=()):
+        output = {}
+        for key, value in dictionary.items():
+            if value is None or (allowed and key not in allowed):
+                continue
+            if key.endswith('_'):
+                key = key[:-1]
+            output[key] = convert(value)
+        return output
+
+    return convert_dict(arg_dict, validate_tl_params)
@@ -0,0 +1,702 @@
+#!/usr/bin/env python
+"""
+Mozilla Public License, version 2.0
+
+Read common IBM Cloud data sources with the REST APIs instead of
+Terraform. 'read_data_source()' returns the same attribute dictionary
+that 'Terraform.get_tfstate_attributes()' returns for the data source,
+or None if the data source has no native implementation or the read
+failed, in which case the caller falls back to Terraform.
+
+API endpoints can be overridden with the same environment variables the
+IBM Cloud Terraform provider uses ('IBMCLOUD_IAM_API_ENDPOINT',
+'IBMCLOUD_IS_NG_API_ENDPOINT', 'IBMCLOUD_RESOURCE_MANAGEMENT_API_ENDPOINT'
+and 'IBMCLOUD_GT_API_ENDPOINT').
+"""
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import (
+    urlencode, urlsplit, parse_qs)
+
+IAM_ENDPOINT = 'https://iam.cloud.ibm.com'
+VPC_ENDPOINT = 'https://{region}.iaas.cloud.ibm.com/v1'
+RESOURCE_MANAGER_ENDPOINT = 'https://resource-controller.cloud.ibm.com'
+GLOBAL_TAGGING_ENDPOINT = 'https://tags.global-search-tagging.cloud.ibm.com'
+# VPC API version date, matching the VPC SDK of the pinned provider
+VPC_API_VERSION = '2024-11-12'
+VPC_PAGE_LIMIT = 100
+HTTP_TIMEOUT = 60
+CONSOLE_URL = 'https://cloud.ibm.com'
+
+
+class RestError(Exception):
+    """
+    Failed IBM Cloud REST API request, or a result Terraform would
+    reject (e.g.: no resource with the given name)
+    """
+    pass
+
+
+class RestClient:
+    """
+    Minimal JSON client on pooled HTTP connections
+
+    Connections are kept open per thread, scheme and host and re-used
+    for all requests of the thread, which saves a TLS handshake per
+    request. 'http.client' connections are not thread-safe, and the
+    inventory reads the regions in parallel threads.
+    """
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @property
+    def connections(self):
+        # Pooled connections of the current thread
+        try:
+            return self.local.connections
+        except AttributeError:
+            self.local.connections = {}
+            return self.local.connections
+
+    def _connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        if key not in self.connections:
+            if scheme == 'https':
+                self.connections[key] = http_client.HTTPSConnection(
+                    netloc, timeout=self.timeout)
+            else:
+                self.connections[key] = http_client.HTTPConnection(
+                    netloc, timeout=self.timeout)
+        return self.connections[key]
+
+    def request(self, method, url, headers=None, body=None):
+        """
+        Send a request and decode the JSON response.
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL
+            headers (dict, optional): Request headers
+            body (str, optional): Request body
+
+        Returns:
+            dict: Decoded response body
+        """
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = dict(headers or {})
+        headers.setdefault('Accept', 'application/json')
+
+        # A pooled connection may have been closed by the server since
+        # its last use, retry once on a new connection
+        for attempt in (1, 2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http_client.HTTPException, OSError):
+                connection.close()
+                self.connections.pop((parts.scheme, parts.netloc), None)
+                if attempt == 2:
+                    raise
+        if response.status >= 400:
+            raise RestError('{} {} returned HTTP {}'.format(
+                method, parts.path, response.status))
+        return json.loads(data.decode('utf-8')) if data else {}
+
+    def close(self):
+        # Close the connections of the current thread
+        for connection in self.connections.values():
+            connection.close()
+        self.local.connections = {}
+
+
+# Shared by all reads of the process
+_CLIENT = RestClient()
+# IAM tokens by API key digest: (access token, expiration timestamp)
+_TOKENS = {}
+
+
+def iam_token_exchange(api_key, env=None):
+    """
+    Exchange an API key for an IAM token.
+
+    Args:
+        api_key (str): IBM Cloud API key
+        env (dict, optional): Mapping of environment variables
+
+    Returns:
+        dict: IAM response with the 'access_token', 'refresh_token' and
+              'expiration' (Unix time) keys
+    """
+    if env is None:
+        env = os.environ
+    return _CLIENT.request(
+        'POST',
+        env.get('IBMCLOUD_IAM_API_ENDPOINT', IAM_ENDPOINT).rstrip('/') +
+        '/identity/token',
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        body=urlencode({
+            'grant_type': 'urn:ibm:params:oauth:grant-type:apikey',
+            'apikey': api_key}))
+
+
+def _iam_token(api_key, env):
+    key = hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+    if key in _TOKENS and _TOKENS[key][1] - 60 > time.time():
+        return _TOKENS[key][0]
+    response = iam_token_exchange(api_key, env)
+    _TOKENS[key] = (response['access_token'], response['expiration'])
+    return response['access_token']
+
+
+def _token_account_id(token):
+    # Account ID claim of the IAM access token (JWT)
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload).decode('utf-8'))
+        return claims['account']['bss']
+    except (IndexError, KeyError, TypeError, ValueError):
+        raise RestError('IAM token without account ID')
+
+
+class _Session:
+    """
+    Authenticated API access for one data source read
+
+    Args:
+        api_key (str): IBM Cloud API key, or None to use 'token'
+        region (str): IBM Cloud region
+        env (dict): Mapping of environment variables
+        token (str, optional): IAM access token
+    """
+    def __init__(self, api_key, region, env, token=None):
+        self.env = env
+        self.token = _iam_token(api_key, env) if api_key else token
+        self.vpc_endpoint = env.get(
+            'IBMCLOUD_IS_NG_API_ENDPOINT',
+            VPC_ENDPOINT.format(region=region)).rstrip('/')
+
+    def get(self, url, query=None):
+        if query:
+            url += '?' + urlencode(query)
+        return _CLIENT.request(
+            'GET', url, headers={'Authorization': 'Bearer ' + self.token})
+
+    def vpc_get(self, path, query=None):
+        query = dict(query or {})
+        query.update({'version': VPC_API_VERSION, 'generation': 2})
+        return self.get(self.vpc_endpoint + path, query)
+
+    def vpc_list(self, path, collection, query=None):
+        # Follow the 'next' links of a paginated VPC collection
+        query = dict(query or {})
+        query['limit'] = VPC_PAGE_LIMIT
+        items = []
+        while True:
+            page = self.vpc_get(path, query)
+            items.extend(page.get(collection, []))
+            next_href = (page.get('next') or {}).get('href')
+            if not next_href:
+                return items
+            query['start'] = parse_qs(urlsplit(next_href).query)['start'][0]
+
+    def tags(self, crn, tag_type='user'):
+        endpoint = self.env.get(
+            'IBMCLOUD_GT_API_ENDPOINT', GLOBAL_TAGGING_ENDPOINT).rstrip('/')
+        response = self.get(endpoint + '/v3/tags', {
+            'attached_to': crn, 'tag_type': tag_type, 'limit': 1000})
+        return [tag['name'] for tag in response.get('items', [])]
+
+    def resource_groups(self, query):
+        endpoint = self.env.get(
+            'IBMCLOUD_RESOURCE_MANAGEMENT_API_ENDPOINT',
+            RESOURCE_MANAGER_ENDPOINT).rstrip('/')
+        query = dict(query, account_id=_token_account_id(self.token))
+        return self.get(endpoint + '/v2/resource_groups', query)['resources']
+
+
+def _ref(obj, key='id'):
+    # Attribute of a referenced resource, e.g.: the ID of 'resource_group'
+    if not obj:
+        return None
+    return obj.get(key)
+
+
+def _nested(value, schema):
+    """
+    Convert an API object, or a list of them, to the nested block
+    representation of the Terraform state: a list of dictionaries with
+    exactly the keys of the block schema.
+
+    The schema maps each attribute to None (same API field), a nested
+    schema, or a tuple with the path of the API field (e.g.:
+    ('zone', 'name') for the name of a referenced zone).
+    """
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [_nested(item, schema)[0] for item in value]
+    block = {}
+    for key, attribute in schema.items():
+        if isinstance(attribute, dict):
+            block[key] = _nested(value.get(key), attribute)
+        elif isinstance(attribute, tuple):
+            field = value
+            for name in attribute:
+                field = field.get(name) if isinstance(field, dict) else None
+            block[key] = field
+        else:
+            block[key] = value.get(key)
+    return [block]
+
+
+# Nested block schemas of the data sources, see '_nested()'
+_DELETED = {'more_info': None}
+_REFERENCE = {
+    'crn': None, 'deleted': _DELETED, 'href': None, 'id': None,
+    'name': None, 'resource_type': None}
+_VPC_DNS = {
+    'enable_hub': None,
+    'resolution_binding_count': None,
+    'resolver': {
+        'servers': {
+            'address': None, 'zone_affinity': ('zone_affinity', 'name')},
+        'type': None,
+        'configuration': None,
+        'vpc': dict(_REFERENCE, remote={
+            'account': {'id': None, 'resource_type': None},
+            'region': {'href': None, 'name': None}}),
+    },
+}
+_IMAGE_OPERATING_SYSTEM = {
+    'allow_user_image_creation': None, 'architecture': None,
+    'dedicated_host_only': None, 'display_name': None, 'family': None,
+    'href': None, 'name': None, 'user_data_format': None, 'vendor': None,
+    'version': None}
+_IMAGE_CATALOG_OFFERING = {'managed': None, 'version': {'crn': None}}
+_RESOURCE_GROUP = {'href': None, 'id': None, 'name': None}
+_RESERVED_IP = {
+    'address': None, 'href': None, 'name': None, 'reserved_ip': ('id',),
+    'resource_type': None}
+_NETWORK_ATTACHMENT = {
+    'deleted': _DELETED, 'href': None, 'id': None, 'name': None,
+    'primary_ip': _RESERVED_IP, 'resource_type': None,
+    'subnet': _REFERENCE,
+    'virtual_network_interface': {
+        'crn': None, 'href': None, 'id': None, 'name': None,
+        'resource_type': None}}
+_INSTANCE_SCHEMAS = {
+    'vcpu': {'architecture': None, 'count': None, 'manufacturer': None},
+    'gpu': {
+        'count': None, 'manufacturer': None, 'memory': None, 'model': None},
+    'disks': {
+        'created_at': None, 'href': None, 'id': None, 'interface_type': None,
+        'name': None, 'resource_type': None, 'size': None},
+    'placement_target': _REFERENCE,
+    'metadata_service': {
+        'enabled': None, 'protocol': None, 'response_hop_limit': None},
+    'reservation': _REFERENCE,
+    'reservation_affinity': {'policy': None, 'pool': _REFERENCE},
+}
+
+
+def _timestamp_id():
+    # Terraform ID of list data sources
+    return datetime.now(timezone.utc).strftime(
+        '%Y-%m-%d %H:%M:%S.%f +0000 UTC')
+
+
+def _health_reasons(reasons):
+    return [{'code': r.get('code'), 'message': r.get('message'),
+             'more_info': r.get('more_info')} for r in reasons or []]
+
+
+def _security_group_rule(rule):
+    remote = rule.get('remote') or {}
+    result = {
+        'rule_id': rule.get('id'),
+        'direction': rule.get('direction'),
+        'ip_version': rule.get('ip_version'),
+        'remote': (remote.get('cidr_block') or remote.get('address') or
+                   remote.get('id')),
+        'protocol': rule.get('protocol'),
+        'type': None,
+        'code': None,
+        'port_min': None,
+        'port_max': None,
+    }
+    if rule.get('protocol') == 'icmp':
+        result['type'] = rule.get('type')
+        result['code'] = rule.get('code')
+    elif rule.get('protocol') in ('tcp', 'udp'):
+        result['port_min'] = rule.get('port_min')
+        result['port_max'] = rule.get('port_max')
+    return result
+
+
+def _is_vpc(session, parameters):
+    if parameters.get('identifier'):
+        vpc = session.vpc_get('/vpcs/' + parameters['identifier'])
+    elif parameters.get('name'):
+        for vpc in session.vpc_list('/vpcs', 'vpcs'):
+            if vpc['name'] == parameters['name']:
+                break
+        else:
+            raise RestError('No VPC found with name ' + parameters['name'])
+    else:
+        raise RestError('name or identifier is required')
+
+    subnets = session.vpc_list('/subnets', 'subnets', {'vpc.id': vpc['id']})
+    security_groups = session.vpc_list(
+        '/security_groups', 'security_groups', {'vpc.id': vpc['id']})
+    return {
+        'id': vpc['id'],
+        'identifier': parameters.get('identifier'),
+        'name': vpc['name'],
+        'classic_access': vpc.get('classic_access'),
+        'crn': vpc['crn'],
+        'status': vpc.get('status'),
+        'health_state': vpc.get('health_state'),
+        'health_reasons': _health_reasons(vpc.get('health_reasons')),
+        'resource_group': _ref(vpc.get('resource_group')),
+        'resource_group_name': _ref(vpc.get('resource_group'), 'name'),
+        'default_network_acl': _ref(vpc.get('default_network_acl')),
+        'default_network_acl_name': _ref(vpc.get('default_network_acl'), 'name'),
+        'default_network_acl_crn': _ref(vpc.get('default_network_acl'), 'crn'),
+        'default_security_group': _ref(vpc.get('default_security_group')),
+        'default_security_group_name': _ref(
+            vpc.get('default_security_group'), 'name'),
+        'default_security_group_crn': _ref(
+            vpc.get('default_security_group'), 'crn'),
+        'default_routing_table': _ref(vpc.get('default_routing_table')),
+        'default_routing_table_name': _ref(
+            vpc.get('default_routing_table'), 'name'),
+        'cse_source_addresses': [
+            {'address': _ref(address.get('address'), 'address'),
+             'zone_name': _ref(address.get('zone'), 'name')}
+            for address in vpc.get('cse_source_addresses') or []],
+        'dns': _nested(vpc.get('dns'), _VPC_DNS),
+        'subnets': [
+            {'name': subnet['name'],
+             'id': subnet['id'],
+             'status': subnet.get('status'),
+             'zone': _ref(subnet.get('zone'), 'name'),
+             'total_ipv4_address_count': subnet.get('total_ipv4_address_count'),
+             'available_ipv4_address_count': subnet.get(
+                 'available_ipv4_address_count')}
+            for subnet in subnets],
+        'security_group': [
+            {'group_id': group['id'],
+             'group_name': group['name'],
+             'rules': [_security_group_rule(r) for r in group.get('rules', [])]}
+            for group in security_groups],
+        'tags': session.tags(vpc['crn']),
+        'access_tags': session.tags(vpc['crn'], 'access'),
+        'resource_controller_url': CONSOLE_URL + '/vpc-ext/network/vpcs',
+        'resource_name': vpc['name'],
+        'resource_crn': vpc['crn'],
+        'resource_status': vpc.get('status'),
+    }
+
+
+def _is_subnet(session, parameters):
+    if parameters.get('identifier'):
+        subnet = session.vpc_get('/subnets/' + parameters['identifier'])
+    elif parameters.get('name'):
+        query = {}
+        if parameters.get('vpc'):
+            query['vpc.id'] = parameters['vpc']
+        for subnet in session.vpc_list('/subnets', 'subnets', query):
+            if subnet['name'] == parameters['name']:
+                break
+        else:
+            raise RestError('No subnet found with name ' + parameters['name'])
+    else:
+        raise RestError('name or identifier is required')
+
+    return {
+        'id': subnet['id'],
+        'identifier': parameters.get('identifier'),
+        'name': subnet['name'],
+        'vpc': _ref(subnet.get('vpc')),
+        'vpc_name': _ref(subnet.get('vpc'), 'name'),
+        'crn': subnet['crn'],
+        'ip_version': subnet.get('ip_version'),
+        'ipv4_cidr_block': subnet.get('ipv4_cidr_block'),
+        'available_ipv4_address_count': subnet.get(
+            'available_ipv4_address_count'),
+        'total_ipv4_address_count': subnet.get('total_ipv4_address_count'),
+        'network_acl': _ref(subnet.get('network_acl')),
+        'public_gateway': _ref(subnet.get('public_gateway')),
+        'resource_group': _ref(subnet.get('resource_group')),
+        'resource_group_name': _ref(subnet.get('resource_group'), 'name'),
+        'routing_table': _nested(subnet.get('routing_table'), _REFERENCE),
+        'status': subnet.get('status'),
+        'zone': _ref(subnet.get('zone'), 'name'),
+        'tags': session.tags(subnet['crn']),
+        'access_tags': session.tags(subnet['crn'], 'access'),
+        'resource_controller_url': CONSOLE_URL + '/vpc-ext/network/subnets',
+        'resource_name': subnet['name'],
+        'resource_crn': subnet['crn'],
+        'resource_status': subnet.get('status'),
+    }
+
+
+def _is_images(session, parameters):
+    query = {}
+    for param, filter_name in (('resource_group', 'resource_group.id'),
+                               ('name', 'name'),
+                               ('status', 'status'),
+                               ('visibility', 'visibility')):
+        if parameters.get(param) is not None:
+            query[filter_name] = parameters[param]
+    if parameters.get('catalog_managed') is not None:
+        query['catalog_offering.managed'] = (
+            'true' if parameters['catalog_managed'] else 'false')
+    if parameters.get('user_data_format'):
+        query['user_data_format'] = ','.join(parameters['user_data_format'])
+
+    images = []
+    for image in session.vpc_list('/images', 'images', query):
+        operating_system = image.get('operating_system') or {}
+        checksums = (image.get('file') or {}).get('checksums') or {}
+        images.append({
+            'id': image['id'],
+            'name': image['name'],
+            'crn': image['crn'],
+            'status': image.get('status'),
+            'status_reasons': _health_reasons(image.get('status_reasons')),
+            'visibility': image.get('visibility'),
+            'os': operating_system.get('name'),
+            'architecture': operating_system.get('architecture'),
+            'operating_system': _nested(
+                operating_system, _IMAGE_OPERATING_SYSTEM),
+            'checksum': checksums.get('sha256'),
+            'encryption': image.get('encryption'),
+            'encryption_key': _ref(image.get('encryption_key'), 'crn'),
+            'source_volume': _ref(image.get('source_volume')),
+            'catalog_offering': _nested(
+                image.get('catalog_offering'), _IMAGE_CATALOG_OFFERING),
+            'resource_group': _nested(
+                image.get('resource_group'), _RESOURCE_GROUP),
+            'user_data_format': image.get('user_data_format'),
+            'created_at': image.get('created_at'),
+            'deprecation_at': image.get('deprecation_at'),
+            'obsolescence_at': image.get('obsolescence_at'),
+            # Public images cannot have access tags
+            'access_tags': session.tags(image['crn'], 'access')
+            if image.get('visibility') == 'private' else [],
+        })
+
+    result = dict((param, parameters.get(param)) for param in (
+        'resource_group', 'catalog_managed', 'name', 'status', 'visibility',
+        'user_data_format'))
+    result.update({'id': _timestamp_id(), 'images': images})
+    return result
+
+
+def _resource_group(session, parameters):
+    if parameters.get('name'):
+        query = {'name': parameters['name']}
+    elif parameters.get('is_default'):
+        query = {'default': 'true'}
+    else:
+        raise RestError('name or is_default is required')
+    groups = session.resource_groups(query)
+    if not groups:
+        raise RestError('No resource group found')
+    group = groups[0]
+    return {
+        'id': group['id'],
+        'name': group['name'],
+        'is_default': group.get('default'),
+        'state': group.get('state'),
+        'crn': group.get('crn'),
+        'account_id': group.get('account_id'),
+        'created_at': group.get('created_at'),
+        'updated_at': group.get('updated_at'),
+        'teams_url': group.get('teams_url'),
+        'payment_methods_url': group.get('payment_methods_url'),
+        'quota_url': group.get('quota_url'),
+        'quota_id': group.get('quota_id'),
+        'resource_linkages': group.get('resource_linkages') or [],
+    }
+
+
+def _network_interface(interface):
+    primary_ip = interface.get('primary_ip') or {}
+    return {
+        'id': interface.get('id'),
+        'name': interface.get('name'),
+        'primary_ipv4_address': primary_ip.get('address'),
+        'primary_ip': [{
+            'address': primary_ip.get('address'),
+            'href': primary_ip.get('href'),
+            'name': primary_ip.get('name'),
+            'reserved_ip': primary_ip.get('id'),
+            'resource_type': primary_ip.get('resource_type'),
+        }] if primary_ip else [],
+        'subnet': _ref(interface.get('subnet')),
+    }
+
+
+def _is_instances(session, parameters):
+    if parameters.get('instance_group') or parameters.get('instance_group_name'):
+        # Instance group memberships are not an instance list filter
+        raise RestError('instance group filters are not supported')
+    query = {}
+    for param, filter_name in (
+            ('resource_group', 'resource_group.id'),
+            ('vpc', 'vpc.id'),
+            ('vpc_crn', 'vpc.crn'),
+            ('vpc_name', 'vpc.name'),
+            ('dedicated_host', 'dedicated_host.id'),
+            ('dedicated_host_name', 'dedicated_host.name'),
+            ('placement_group', 'placement_group.id'),
+            ('placement_group_name', 'placement_group.name')):
+        if parameters.get(param) is not None:
+            query[filter_name] = parameters[param]
+
+    instances = []
+    for instance in session.vpc_list('/instances', 'instances', query):
+        boot_volume = instance.get('boot_volume_attachment') or {}
+        catalog_offering = instance.get('catalog_offering') or {}
+        attributes = {
+            'id': instance['id'],
+            'crn': instance['crn'],
+            'name': instance['name'],
+            'memory': instance.get('memory'),
+            'bandwidth': instance.get('bandwidth'),
+            'total_volume_bandwidth': instance.get('total_volume_bandwidth'),
+            'total_network_bandwidth': instance.get('total_network_bandwidth'),
+            'status': instance.get('status'),
+            'status_reasons': _health_reasons(instance.get('status_reasons')),
+            'lifecycle_state': instance.get('lifecycle_state'),
+            'lifecycle_reasons': _health_reasons(instance.get('lifecycle_reasons')),
+            'resource_group': _ref(instance.get('resource_group')),
+            'vpc': _ref(instance.get('vpc')),
+            'zone': _ref(instance.get('zone'), 'name'),
+            'image': _ref(instance.get('image')),
+            'profile': _ref(instance.get('profile'), 'name'),
+            'health_reasons': _health_reasons(instance.get('health_reasons')),
+            'health_state': instance.get('health_state'),
+            'metadata_service_enabled': (
+                instance.get('metadata_service') or {}).get('enabled'),
+            'availability_policy_host_failure': (
+                instance.get('availability_policy') or {}).get('host_failure'),
+            'boot_volume': [{
+                'id': boot_volume.get('id'),
+                'name': boot_volume.get('name'),
+                'device': _ref(boot_volume.get('device')),
+                'volume_id': _ref(boot_volume.get('volume')),
+                'volume_crn': _ref(boot_volume.get('volume'), 'crn'),
+            }] if boot_volume else [],
+            'volume_attachments': [{
+                'id': attachment.get('id'),
+                'name': attachment.get('name'),
+                'volume_id': _ref(attachment.get('volume')),
+                'volume_name': _ref(attachment.get('volume'), 'name'),
+                'volume_crn': _ref(attachment.get('volume'), 'crn'),
+            } for attachment in instance.get('volume_attachments') or []],
+            'primary_network_interface': [_network_interface(
+                instance['primary_network_interface'])]
+            if instance.get('primary_network_interface') else [],
+            'network_interfaces': [
+                _network_interface(interface)
+                for interface in instance.get('network_interfaces') or []],
+            'primary_network_attachment': _nested(
+                instance.get('primary_network_attachment'),
+                _NETWORK_ATTACHMENT),
+            'network_attachments': _nested(
+                instance.get('network_attachments'), _NETWORK_ATTACHMENT),
+            'catalog_offering': [{
+                'version_crn': _ref(catalog_offering.get('version'), 'crn'),
+                'plan_crn': _ref(catalog_offering.get('plan'), 'crn'),
+                'deleted': _nested(
+                    (catalog_offering.get('plan') or {}).get('deleted'),
+                    _DELETED),
+            }] if catalog_offering else [],
+        }
+        for key, schema in _INSTANCE_SCHEMAS.items():
+            attributes[key] = _nested(instance.get(key), schema)
+        instances.append(attributes)
+
+    result = dict((param, parameters.get(param)) for param in (
+        'resource_group', 'dedicated_host_name', 'dedicated_host',
+        'placement_group', 'instance_group', 'instance_group_name',
+        'vpc_name', 'vpc', 'vpc_crn', 'placement_group_name'))
+    result.update({'id': _timestamp_id(), 'instances': instances})
+    return result
+
+
+# Data sources with a native implementation
+DATA_SOURCES = {
+    'ibm_is_vpc': _is_vpc,
+    'ibm_is_subnet': _is_subnet,
+    'ibm_is_images': _is_images,
+    'ibm_resource_group': _resource_group,
+    'ibm_is_instances': _is_instances,
+}
+
+
+def read_data_source(resource_type, parameters, env=None):
+    """
+    Read a data source with the IBM Cloud REST APIs.
+
+    Args:
+        resource_type (str): Data source type (e.g.: 'ibm_is_vpc')
+        parameters (dict): Data source parameter dictionary
+        env (dict, optional): Mapping of environment variables
+
+    Returns:
+        dict: Data source attributes, None if the data source has to be
+              read with Terraform
+    """
+    if env is None:
+        env = os.environ
+    if resource_type not in DATA_SOURCES:
+        return None
+    # Private endpoints and classic infrastructure are left to the
+    # provider
+    if env.get('IC_VISIBILITY', 'public') != 'public':
+        return None
+    if parameters.get('generation') == 1:
+        return None
+
+    # Like the provider, prefer the API key over an IAM token in the
+    # environment
+    token = env.get('IC_IAM_TOKEN', '')
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    api_key = None
+    if 'IC_API_KEY' in env or not token:
+        api_key = parameters.get('ibmcloud_api_key') or env.get('IC_API_KEY')
+    region = (parameters.get('region') or env.get('IC_REGION') or
+              env.get('IBMCLOUD_REGION') or 'us-south')
+    if not api_key and not token:
+        return None
+
+    try:
+        session = _Session(api_key, region, env, token)
+        return DATA_SOURCES[resource_type](session, parameters)
+    except (RestError, http_client.HTTPException, OSError, ValueError):
+        # Failed requests and undecodable responses; Terraform reports
+        # the error, or reads what is not supported
+        return None
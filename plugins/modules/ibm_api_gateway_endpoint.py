@@ -104,6 +104,13 @@ author:
     - Jay Carman (@jaywcarman)
 '''
 
+# Terraform block and IBM Cloud provider version of the module
+RESOURCE_TYPE = 'ibm_api_gateway_endpoint'
+TF_TYPE = 'resource'
+IBM_PROVIDER_VERSION = '1.71.2'
+# Whether an existing resource is looked up with the data source first
+DATA_SOURCE_LOOKUP = False
+
 # Top level parameter keys required by Terraform module
 TL_REQUIRED_PARAMETERS = [
     ('open_api_doc_name', 'str'),
@@ -133,7 +140,7 @@ TL_CONFLICTS_MAP = {
 }
 
 # define available arguments/parameters a user can pass to the module
-from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import Terraform, ibmcloud_terraform
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import run_ibmcloud_module
 from ansible.module_utils.basic import env_fallback
 module_args = dict(
     open_api_doc_name=dict(
@@ -188,54 +195,15 @@ module_args = dict(
 )
 
 
-def run_module():
-    from ansible.module_utils.basic import AnsibleModule
-
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=False
-    )
-
-    # New resource required arguments checks
-    missing_args = []
-    if module.params['id'] is None:
-        for arg, _ in TL_REQUIRED_PARAMETERS:
-            if module.params[arg] is None:
-                missing_args.append(arg)
-        if missing_args:
-            module.fail_json(msg=(
-                "missing required arguments: " + ", ".join(missing_args)))
-
-    conflicts = {}
-    if len(TL_CONFLICTS_MAP) != 0:
-        for arg in TL_CONFLICTS_MAP:
-            if module.params[arg]:
-                for conflict in TL_CONFLICTS_MAP[arg]:
-                    try:
-                        if module.params[conflict]:
-                            conflicts[arg] = conflict
-                    except KeyError:
-                        pass
-    if len(conflicts):
-        module.fail_json(msg=("conflicts exist: {}".format(conflicts)))
-
-    result = ibmcloud_terraform(
-        resource_type='ibm_api_gateway_endpoint',
-        tf_type='resource',
-        parameters=module.params,
-        ibm_provider_version='1.71.2',
-        tl_required_params=TL_REQUIRED_PARAMETERS,
-        tl_all_params=TL_ALL_PARAMETERS)
-
-    if result['rc'] > 0:
-        module.fail_json(
-            msg=Terraform.parse_stderr(result['stderr']), **result)
-
-    module.exit_json(**result)
-
-
 def main():
-    run_module()
+    run_ibmcloud_module(
+        module_args,
+        resource_type=RESOURCE_TYPE,
+        tf_type=TF_TYPE,
+        ibm_provider_version=IBM_PROVIDER_VERSION,
+        tl_required_params=TL_REQUIRED_PARAMETERS,
+        tl_all_params=TL_ALL_PARAMETERS,
+        tl_conflicts_map=TL_CONFLICTS_MAP)
 
 
 if __name__ == '__main__':
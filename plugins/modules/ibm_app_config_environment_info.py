@@ -55,6 +55,15 @@ options:
               environment variable 'IC_REGION'.
         default: us-south
         required: False
+    return_fields:
+        description:
+            - Attribute paths of the data source to return, e.g.
+              'images.id' or 'instances[0].primary_network_interface'.
+              Lists are matched element-wise ('[*]' is optional). By
+              default all attributes are returned.
+        required: False
+        type: list
+        elements: str
     ibmcloud_api_key:
         description:
             - The IBM Cloud API key to authenticate with the IBM Cloud
@@ -66,6 +75,11 @@ author:
     - Jay Carman (@jaywcarman)
 '''
 
+# Terraform block and IBM Cloud provider version of the module
+RESOURCE_TYPE = 'ibm_app_config_environment'
+TF_TYPE = 'data'
+IBM_PROVIDER_VERSION = '1.71.2'
+
 # Top level parameter keys required by Terraform module
 TL_REQUIRED_PARAMETERS = [
     ('environment_id', 'str'),
@@ -84,7 +98,7 @@ TL_CONFLICTS_MAP = {
 }
 
 # define available arguments/parameters a user can pass to the module
-from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import Terraform, ibmcloud_terraform
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import run_ibmcloud_module
 from ansible.module_utils.basic import env_fallback
 module_args = dict(
     environment_id=dict(
@@ -110,6 +124,10 @@ module_args = dict(
         type='str',
         fallback=(env_fallback, ['IC_REGION']),
         default='us-south'),
+    return_fields=dict(
+        type='list',
+        elements='str',
+        required=False),
     ibmcloud_api_key=dict(
         type='str',
         no_log=True,
@@ -118,32 +136,15 @@ module_args = dict(
 )
 
 
-def run_module():
-    from ansible.module_utils.basic import AnsibleModule
-
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=False
-    )
-
-    result = ibmcloud_terraform(
-        resource_type='ibm_app_config_environment',
-        tf_type='data',
-        parameters=module.params,
-        ibm_provider_version='1.71.2',
+def main():
+    run_ibmcloud_module(
+        module_args,
+        resource_type=RESOURCE_TYPE,
+        tf_type=TF_TYPE,
+        ibm_provider_version=IBM_PROVIDER_VERSION,
         tl_required_params=TL_REQUIRED_PARAMETERS,
         tl_all_params=TL_ALL_PARAMETERS)
 
-    if result['rc'] > 0:
-        module.fail_json(
-            msg=Terraform.parse_stderr(result['stderr']), **result)
-
-    module.exit_json(**result)
-
-
-def main():
-    run_module()
-
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Make the checkout importable as 'ansible_collections.ibm.cloudcollection'
+# when the tests are not run from within a collection tree
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not ROOT.endswith(os.path.join('ansible_collections', 'ibm', 'cloudcollection')):
+    COLLECTIONS_PATH = tempfile.mkdtemp(prefix='ansible_collections_')
+    os.makedirs(os.path.join(COLLECTIONS_PATH, 'ansible_collections', 'ibm'))
+    os.symlink(ROOT, os.path.join(
+        COLLECTIONS_PATH, 'ansible_collections', 'ibm', 'cloudcollection'))
+    sys.path.insert(0, COLLECTIONS_PATH)
+
+
+@pytest.fixture
+def collections_path():
+    """
+    Path for ANSIBLE_COLLECTIONS_PATH that contains this collection
+    """
+    for path in sys.path:
+        if os.path.isdir(os.path.join(path, 'ansible_collections', 'ibm', 'cloudcollection')):
+            return path
+    return os.path.dirname(os.path.dirname(os.path.dirname(ROOT)))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def report(request, capsys):
+    """
+    Print a measurement on the terminal, also when output is captured.
+    """
+    def write(line):
+        with capsys.disabled():
+            print('\n{}: {}'.format(request.node.name, line), end='')
+
+    return write
+
+
+@pytest.fixture
+def benchmark(report):
+    """
+    Time a function and report the best of some rounds, e.g.:
+    'best, result = benchmark("label", func, rounds=3)'.
+    """
+    def run(label, func, rounds=3):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        report('{}: {:.1f} ms'.format(label, best * 1000))
+        return best, result
+
+    return run
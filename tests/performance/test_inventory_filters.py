@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Host selection of the vpc_inventory plugin on 50,000 hosts: filters and
+exclusions compiled once against the per host implementation they
+replaced.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible.module_utils.six import viewitems
+
+from ansible_collections.ibm.cloudcollection.plugins.inventory.vpc_inventory import HostFilter, InventoryModule
+
+HOSTS = 50000
+FILTERS = {'status': 'running', 'vpc': 'vpc-1', 'tags': ['env:prod']}
+
+
+class LegacyInventoryModule(InventoryModule):
+    """
+    Filters and exclusions as they were tested before they were
+    compiled: dictionaries split again and lists scanned for every host.
+    """
+    def is_vsi_excluded(self, vsi):
+        try:
+            if self.get_vsi_ip(vsi) in self.exclude_ip:
+                return True
+        except Exception:
+            pass
+        try:
+            if self.get_vsi_name(vsi) in self.exclude_name:
+                return True
+        except Exception:
+            pass
+        try:
+            if self.get_vsi_id(vsi) in self.exclude_id:
+                return True
+        except Exception:
+            pass
+        try:
+            vsi_tags = self.get_vsi_tags(vsi)
+            if any(t in vsi_tags for t in self.exclude_tag):
+                return True
+        except Exception:
+            pass
+        return False
+
+    def matches_filters(self, vsi):
+        non_list_filters = {k: v for k, v in self.filters.items() if not isinstance(v, list)}
+        list_filters = {k: v for k, v in self.filters.items() if isinstance(v, list)}
+        if viewitems(non_list_filters) <= viewitems(vsi):
+            for k, v in list_filters.items():
+                if not set(v).issubset(vsi.get(k)):
+                    return False
+            return True
+        return False
+
+
+def host(number):
+    return {
+        'id': '0717_{:08d}'.format(number),
+        'name': 'host-{}'.format(number),
+        'status': 'running' if number % 10 else 'stopped',
+        'vpc': 'vpc-{}'.format(number % 3),
+        'zone': 'us-south-{}'.format(1 + number % 3),
+        'memory': 4 * (1 + number % 8),
+        'tags': ['env:prod' if number % 4 else 'env:dev', 'team:{}'.format(number % 7)],
+        'primary_network_interface': [{
+            'id': 'nic-{}'.format(number), 'subnet': 'subnet-{}'.format(number % 5),
+            'primary_ip': [{'address': '10.{}.{}.{}'.format(number // 65536, number // 256 % 256, number % 256)}]}],
+    }
+
+
+@pytest.fixture(scope='module')
+def hosts():
+    return [host(number) for number in range(HOSTS)]
+
+
+def plugin(cls, filters, hosts):
+    plugin = cls()
+    plugin.filters = filters
+    plugin.use_floating_ips = False
+    plugin.exclude_ip = [h['primary_network_interface'][0]['primary_ip'][0]['address'] for h in hosts[::17]]
+    plugin.exclude_name = [h['name'] for h in hosts[1::13]]
+    plugin.exclude_id = [h['id'] for h in hosts[2::11]]
+    plugin.exclude_tag = ['team:6']
+    # Compiled like the inventory source options
+    plugin.host_filters = [HostFilter(path, value) for path, value in filters.items()]
+    plugin.excluded_ips = frozenset(plugin.exclude_ip)
+    plugin.excluded_names = frozenset(plugin.exclude_name)
+    plugin.excluded_ids = frozenset(plugin.exclude_id)
+    plugin.excluded_tags = frozenset(plugin.exclude_tag)
+    return plugin
+
+
+def select(plugin, hosts):
+    return [h['id'] for h in hosts if plugin.vsi_should_be_included(h)]
+
+
+def test_compiled_selection_against_per_host(hosts, benchmark):
+    compiled = plugin(InventoryModule, FILTERS, hosts)
+    legacy = plugin(LegacyInventoryModule, FILTERS, hosts)
+
+    compiled_time, compiled_hosts = benchmark('compiled', lambda: select(compiled, hosts))
+    legacy_time, legacy_hosts = benchmark('per host', lambda: select(legacy, hosts), rounds=1)
+
+    assert compiled_hosts == legacy_hosts
+    assert compiled_hosts
+    assert compiled_time * 3 < legacy_time
+
+
+def test_nested_paths_and_operators(hosts, benchmark):
+    filters = dict(FILTERS, **{
+        'memory': {'ge': 16},
+        'zone': {'not': {'regex': '-3$'}},
+        'primary_network_interface[0].subnet': {'in': ['subnet-1', 'subnet-2']},
+    })
+    compiled = plugin(InventoryModule, filters, hosts)
+
+    _, selected = benchmark('compiled', lambda: select(compiled, hosts))
+
+    excluded = compiled.excluded_ips | compiled.excluded_names | compiled.excluded_ids
+    expected = [
+        h['id'] for h in hosts
+        if h['status'] == 'running' and h['vpc'] == 'vpc-1' and 'env:prod' in h['tags'] and
+        h['memory'] >= 16 and not h['zone'].endswith('-3') and
+        h['primary_network_interface'][0]['subnet'] in ('subnet-1', 'subnet-2') and
+        'team:6' not in h['tags'] and not excluded & {
+            h['id'], h['name'], h['primary_network_interface'][0]['primary_ip'][0]['address']}]
+    assert selected == expected
+    assert selected
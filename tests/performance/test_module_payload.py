@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Payload and cold import cost of a representative module. Every task
+ships the module and the module_utils of the collection it imports in
+its AnsiballZ payload, and imports them in a new Python process.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import ast
+import io
+import json
+import os
+import subprocess
+import sys
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PACKAGE = 'ansible_collections.ibm.cloudcollection'
+MODULE = 'plugins.modules.ibm_is_vpc'
+MODULE_UTILS = 'plugins.module_utils.ibmcloud'
+# Imported by the functions that need them, not for every module run
+LAZY_IMPORTS = ('jinja2', 'uuid', 'shutil', 'tempfile', 'platform', 'http.client', 'ansible.errors',
+                PACKAGE + '.plugins.module_utils.ibmcloud_rest')
+IMPORT_RUNS = 7
+
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+before = set(sys.modules)
+start = time.perf_counter()
+__import__(sys.argv[2])
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': sorted(set(sys.modules) - before)}))
+"""
+
+
+def source_path(name):
+    return os.path.join(ROOT, *name.split('.')) + '.py'
+
+
+def bundled_files(name):
+    # The module and the collection module_utils it imports, also
+    # within functions, like the AnsiballZ module finder
+    files = []
+    pending = [name]
+    while pending:
+        name = pending.pop()
+        if name in files:
+            continue
+        files.append(name)
+        with open(source_path(name)) as file_obj:
+            tree = ast.parse(file_obj.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and (node.module or '').startswith(PACKAGE + '.plugins.module_utils'):
+                pending.append(node.module[len(PACKAGE) + 1:])
+    return files
+
+
+def payload_size(name):
+    files = bundled_files(name)
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for bundled in files:
+            archive.write(source_path(bundled), bundled.replace('.', '/') + '.py')
+    return files, sum(os.path.getsize(source_path(f)) for f in files), len(data.getvalue())
+
+
+def cold_import(name, collections_path):
+    runs = []
+    for _ in range(IMPORT_RUNS):
+        output = subprocess.check_output(
+            [sys.executable, '-B', '-c', IMPORT_SCRIPT, collections_path, PACKAGE + '.' + name])
+        runs.append(json.loads(output.decode('utf-8')))
+    runs.sort(key=lambda run: run['seconds'])
+    return runs[len(runs) // 2]
+
+
+def test_module_payload(report):
+    files, size, deflated = payload_size(MODULE)
+    report('{} bytes ({} deflated) in {}'.format(size, deflated, ', '.join(files)))
+
+    assert MODULE_UTILS in files
+    # A short license header instead of the license text
+    with open(source_path(MODULE_UTILS)) as file_obj:
+        docstring = ast.get_docstring(ast.parse(file_obj.read())) or ''
+    assert len(docstring.splitlines()) < 20
+
+
+def test_module_utils_cold_import(report, collections_path):
+    module_utils = cold_import(MODULE_UTILS, collections_path)
+    module = cold_import(MODULE, collections_path)
+    for name, run in ((MODULE_UTILS, module_utils), (MODULE, module)):
+        report('{}: median cold import {:.1f} ms, {} modules'.format(
+            name, run['seconds'] * 1000, len(run['modules'])))
+
+    assert not set(LAZY_IMPORTS) & set(module_utils['modules'])
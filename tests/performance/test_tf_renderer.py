@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Rendering large resource configurations: Terraform JSON syntax written
+with one 'json.dumps()' against the HCL of 'fmt_tf_block()'.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import fmt_tf_block, tf_json_block
+
+ZONES = 2000
+USER_DATA_LINES = 20000
+
+
+@pytest.fixture(scope='module')
+def parameters():
+    # Large nested arguments of e.g. 'ibm_container_vpc_cluster' and
+    # big user data and policy documents
+    return {
+        'name': 'cluster',
+        'vpc_id': 'r006-00000000',
+        'disable_public_service_endpoint': 'false',
+        'zones': [{'name': 'us-south-{}'.format(number % 3 + 1), 'subnet_id': 'subnet-{}'.format(number)}
+                  for number in range(ZONES)],
+        'user_data': ''.join('echo "line {}" >> /var/log/init.log\n'.format(number)
+                             for number in range(USER_DATA_LINES)),
+        'policy': json.dumps({'Statement': [
+            {'Effect': 'Allow', 'Action': ['s3:GetObject'], 'Resource': ['arn:bucket/{}/*'.format(number)]}
+            for number in range(ZONES)]}),
+        'tags': ['tag-{}'.format(number) for number in range(ZONES)],
+        'kms_config': [{'instance_id': 'kms', 'crk_id': 'key', 'private_endpoint': 'true'}],
+    }
+
+
+def test_json_renderer_throughput(parameters, benchmark, report):
+    hcl_time, hcl = benchmark('fmt_tf_block', lambda: fmt_tf_block(parameters), rounds=5)
+    json_time, text = benchmark(
+        'tf_json_block', lambda: json.dumps({'resource': {'ibm_container_vpc_cluster': {
+            'resource': tf_json_block(parameters)}}}), rounds=5)
+
+    report('{:.1f} MB/s HCL, {:.1f} MB/s JSON'.format(
+        len(hcl) / hcl_time / 1e6, len(text) / json_time / 1e6))
+    assert json_time < hcl_time
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Reading large data sources from the state: the nested attributes of
+state format version 4 against expanding the same attributes from the
+flatmap format of older states.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import tracemalloc
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import Terraform
+
+IMAGES = 5000
+
+
+def image(number):
+    # Strings only, flatmap states do not keep the value types
+    return {
+        'id': 'r006-{:08d}'.format(number),
+        'name': 'image-{}'.format(number),
+        'crn': 'crn:v1:bluemix:public:is:us-south:a/account::image:r006-{:08d}'.format(number),
+        'status': 'available',
+        'visibility': 'public',
+        'os': 'ubuntu-24-04-amd64',
+        'architecture': 'amd64',
+        'checksum': '{:064x}'.format(number),
+        'operating_system': [{
+            'architecture': 'amd64', 'display_name': 'Ubuntu Linux 24.04 LTS', 'family': 'Ubuntu Linux',
+            'href': 'https://us-south.iaas.cloud.ibm.com/v1/operating_systems/ubuntu-24-04-amd64',
+            'name': 'ubuntu-24-04-amd64', 'vendor': 'Canonical', 'version': '24.04 LTS'}],
+        'status_reasons': [],
+        'catalog_offering': [{'managed': 'false', 'version': []}],
+        'resource_group': [],
+        'access_tags': [],
+    }
+
+
+def flatmap(value, prefix=''):
+    # Flatmap representation, e.g.: {'a.#': '1', 'a.0.b': 'c'}
+    output = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            output.update(flatmap(item, prefix + key + '.'))
+    elif isinstance(value, list):
+        output[prefix + '#'] = str(len(value))
+        for index, item in enumerate(value):
+            output.update(flatmap(item, prefix + str(index) + '.'))
+    else:
+        output[prefix[:-1]] = value
+    return output
+
+
+def without_empty_lists(value):
+    # Empty lists are only a '<key>.#' count in the flatmap format,
+    # which the expansion leaves out
+    if isinstance(value, dict):
+        return dict((key, without_empty_lists(item)) for key, item in value.items() if item != [])
+    if isinstance(value, list):
+        return [without_empty_lists(item) for item in value]
+    return value
+
+
+@pytest.fixture(scope='module')
+def attributes():
+    return {'id': '2026-10-18 12:00:00.000000 +0000 UTC', 'visibility': 'public',
+            'images': [image(number) for number in range(IMAGES)]}
+
+
+def terraform_dir(tmp_path, name, instance):
+    directory = tmp_path / name
+    directory.mkdir()
+    (directory / 'terraform.tfstate').write_text(json.dumps({
+        'version': 4, 'terraform_version': '1.5.5', 'resources': [{
+            'mode': 'data', 'type': 'ibm_is_images', 'name': 'images',
+            'provider': 'provider["registry.terraform.io/ibm-cloud/ibm"]', 'instances': [instance]}]}))
+    terraform = Terraform.__new__(Terraform)
+    terraform.directory = str(directory)
+    return terraform
+
+
+def test_nested_attributes_against_flatmap(tmp_path, attributes, benchmark):
+    nested = terraform_dir(tmp_path, 'nested', {'schema_version': 0, 'attributes': attributes})
+    flat = terraform_dir(tmp_path, 'flat', {'schema_version': 0, 'attributes_flat': flatmap(attributes)})
+
+    nested_time, nested_attributes = benchmark(
+        'nested', lambda: nested.get_tfstate_attributes('ibm_is_images.images'))
+    flat_time, flat_attributes = benchmark(
+        'flatmap', lambda: flat.get_tfstate_attributes('ibm_is_images.images'))
+
+    assert nested_attributes == attributes
+    assert flat_attributes == without_empty_lists(attributes)
+    assert nested_time * 2 < flat_time
+
+
+def test_projected_nested_attributes(tmp_path, attributes, benchmark, monkeypatch):
+    # States below the scan size are decoded and projected, as fast as
+    # a full read. Scanning decodes only the returned attributes, which
+    # saves memory rather than time.
+    nested = terraform_dir(tmp_path, 'nested', {'schema_version': 0, 'attributes': attributes})
+    return_fields = ['images.id', 'images.name']
+    expected = {'images': [{'id': i['id'], 'name': i['name']} for i in attributes['images']]}
+
+    def peak_memory(func):
+        tracemalloc.start()
+        try:
+            result = func()
+            return tracemalloc.get_traced_memory()[1], result
+        finally:
+            tracemalloc.stop()
+
+    full_time, _ = benchmark('full', lambda: nested.get_tfstate_attributes('ibm_is_images.images'))
+    projected_time, projected = benchmark(
+        'projected', lambda: nested.get_tfstate_attributes('ibm_is_images.images', return_fields))
+    assert projected == expected
+    assert projected_time < full_time * 1.5
+
+    monkeypatch.setattr(ibmcloud, 'TFSTATE_SCAN_SIZE', 0)
+    benchmark('scanned', lambda: nested.get_tfstate_attributes('ibm_is_images.images', return_fields))
+    scanned_peak, scanned = peak_memory(
+        lambda: nested.get_tfstate_attributes('ibm_is_images.images', return_fields))
+    full_peak, _ = peak_memory(lambda: nested.get_tfstate_attributes('ibm_is_images.images'))
+    assert scanned == expected
+    assert scanned_peak * 2 < full_peak
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+
+import pytest
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stubs')
+
+
+class TerraformStub:
+    """
+    Terraform directory with the stub Terraform CLI and an empty IBM
+    Cloud provider installed, see 'stubs/terraform'.
+    """
+    def __init__(self, path, ibm_provider_version='1.71.2'):
+        self.path = str(path)
+        self.cloud_path = os.path.join(self.path, 'cloud.json')
+        self.data_path = os.path.join(self.path, 'data.json')
+        self.log_path = os.path.join(self.path, 'stub.log')
+
+        executable_dir = os.path.join(self.path, 'terraform', '1.5.5')
+        os.makedirs(executable_dir)
+        shutil.copy(os.path.join(STUBS, 'terraform'), executable_dir)
+        os.chmod(os.path.join(executable_dir, 'terraform'), 0o755)
+        self.add_provider(ibm_provider_version)
+
+    def add_provider(self, ibm_provider_version):
+        plugin_dir = os.path.join(
+            self.path, 'terraform_ibm_cloud_provider',
+            'registry.terraform.io/ibm-cloud/ibm', ibm_provider_version, 'linux_amd64')
+        os.makedirs(plugin_dir)
+        open(os.path.join(plugin_dir, 'terraform-provider-ibm_v' + ibm_provider_version), 'w').close()
+
+    @property
+    def cloud(self):
+        with open(self.cloud_path) as file_obj:
+            return json.load(file_obj)
+
+    @cloud.setter
+    def cloud(self, value):
+        with open(self.cloud_path, 'w') as file_obj:
+            json.dump(value, file_obj)
+
+    @property
+    def data(self):
+        with open(self.data_path) as file_obj:
+            return json.load(file_obj)
+
+    @data.setter
+    def data(self, value):
+        with open(self.data_path, 'w') as file_obj:
+            json.dump(value, file_obj)
+
+    def commands(self):
+        """
+        Returns:
+            list of dict: Logged stub runs ('command', 'cwd', 'env')
+        """
+        if not os.path.isfile(self.log_path):
+            return []
+        with open(self.log_path) as file_obj:
+            runs = [json.loads(line) for line in file_obj]
+        os.remove(self.log_path)
+        return runs
+
+
+@pytest.fixture
+def terraform_stub(tmp_path, monkeypatch):
+    if os.uname().machine not in ('x86_64', 'amd64'):
+        pytest.skip('The stub provider is installed for linux_amd64')
+    stub = TerraformStub(tmp_path / 'terraform_dir')
+    stub.cloud = {}
+    stub.data = {}
+    monkeypatch.setenv('IBMCLOUD_ANSIBLE_TERRAFORM_DIR', stub.path)
+    monkeypatch.setenv('STUB_CLOUD', stub.cloud_path)
+    monkeypatch.setenv('STUB_DATA', stub.data_path)
+    monkeypatch.setenv('STUB_LOG', stub.log_path)
+    for name in list(os.environ):
+        if name.startswith('IBMCLOUD_ANSIBLE_') and name != 'IBMCLOUD_ANSIBLE_TERRAFORM_DIR':
+            monkeypatch.delenv(name)
+    return stub
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ansible.plugins.action.normal import ActionModule as NormalActionModule
+from ansible_collections.ibm.cloudcollection.plugins.action import ibmcloud_batch
+
+PLAYBOOK = """
+- hosts: localhost
+  gather_facts: false
+  vars:
+    ibmcloud_batch_loop: true
+  tasks:
+    - ibm.cloudcollection.ibm_is_security_group_rule:
+        group: sg-1
+        direction: "{{ item.direction }}"
+        remote: "{{ item.remote }}"
+        ibmcloud_api_key: secretkey
+      environment:
+        HTTPS_PROXY: "{{ item.proxy }}"
+      loop:
+        - {direction: inbound, remote: 10.0.0.1, proxy: proxy-a}
+        - {direction: outbound, remote: 10.0.0.2, proxy: proxy-a}
+        - {direction: inbound, remote: 10.0.0.3, proxy: proxy-b}
+      register: rules
+    - copy:
+        content: "{{ rules.results | map(attribute='changed') | list | to_json }}"
+        dest: "{{ result_path }}"
+"""
+
+# Without 'ibmcloud_batch_loop' the tasks run like with the 'normal'
+# action plugin
+UNBATCHED_PLAYBOOK = """
+- hosts: remote
+  gather_facts: false
+  vars:
+    rule:
+      group: sg-1
+      direction: inbound
+      ibmcloud_api_key: secretkey
+  tasks:
+    - ibm.cloudcollection.ibm_is_security_group_rule: "{{ rule | combine({'remote': '10.0.0.1'}) }}"
+      check_mode: true
+      register: check
+    - ibm.cloudcollection.ibm_is_security_group_rule: "{{ rule | combine({'remote': '10.0.0.2'}) }}"
+      async: 60
+      poll: 1
+      register: async_rule
+    - ibm.cloudcollection.ibm_is_security_group_rule: "{{ rule | combine({'remote': '10.0.0.3'}) }}"
+      delegate_to: localhost
+      register: delegated
+    - ibm.cloudcollection.ibm_is_security_group_rule: "{{ rule | combine({'remote': item}) }}"
+      loop: [10.0.0.4, 10.0.0.5]
+      register: looped
+    - copy:
+        content: "{{ {'check': check, 'async': async_rule, 'delegated': delegated, 'looped': looped} | to_json }}"
+        dest: "{{ result_path }}"
+      delegate_to: localhost
+"""
+
+
+def run_playbook(text, tmp_path, collections_path, monkeypatch):
+    playbook = tmp_path / 'playbook.yml'
+    playbook.write_text(text)
+    inventory = tmp_path / 'inventory.ini'
+    inventory.write_text('remote ansible_connection=local ansible_python_interpreter={}\n'.format(sys.executable))
+    result_path = tmp_path / 'result.json'
+    monkeypatch.setenv('ANSIBLE_COLLECTIONS_PATH', collections_path)
+
+    with open(os.devnull) as stdin:
+        process = subprocess.run(
+            [sys.executable, '-m', 'ansible', 'playbook', str(playbook), '-i', str(inventory),
+             '-e', 'result_path=' + str(result_path)],
+            stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+    assert process.returncode == 0, process.stdout
+    return json.loads(result_path.read_text())
+
+
+def test_batched_items_run_with_task_environment(terraform_stub, collections_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('STUB_LOG_ENV', 'HTTPS_PROXY')
+    monkeypatch.delenv('HTTPS_PROXY', raising=False)
+
+    result = run_playbook(PLAYBOOK, tmp_path, collections_path, monkeypatch)
+
+    assert result == [True, True, True]
+    applies = [run for run in terraform_stub.commands() if run['command'] == 'apply']
+    # One Terraform run per distinct environment
+    assert sorted(run['env']['HTTPS_PROXY'] for run in applies) == ['proxy-a', 'proxy-b']
+    assert len(terraform_stub.cloud['ibm_is_security_group_rule']) == 3
+
+
+class FakeTask:
+    _uuid = 'task-1'
+    loop = ['a', 'b', 'a']
+
+    def get_name(self):
+        return 'fake'
+
+
+class FakeTemplar:
+    def template(self, value):
+        return value
+
+
+def test_batch_is_removed_after_last_item(monkeypatch):
+    action = ibmcloud_batch.ActionModule.__new__(ibmcloud_batch.ActionModule)
+    action._task = FakeTask()
+    action._templar = FakeTemplar()
+    monkeypatch.setattr(action, '_run_batch', lambda task_vars, items: {
+        'items': items, 'results': [{'item': index} for index in range(len(items))], 'used': set(), 'runs': 0})
+
+    results = []
+    for item in FakeTask.loop:
+        task_vars = {'ansible_loop_var': 'item', 'item': item, 'inventory_hostname': 'localhost'}
+        assert ('task-1', 'localhost') in ibmcloud_batch._BATCHES or not results
+        results.append(action._batched_result(task_vars))
+
+    assert results == [{'item': 0}, {'item': 1}, {'item': 2}]
+    assert ('task-1', 'localhost') not in ibmcloud_batch._BATCHES
+
+
+def test_unbatched_tasks_run_like_normal(terraform_stub, collections_path, tmp_path, monkeypatch):
+    result = run_playbook(UNBATCHED_PLAYBOOK, tmp_path, collections_path, monkeypatch)
+
+    # The modules do not support check mode
+    assert result['check']['skipped'] and not result['check'].get('changed')
+    assert result['async']['finished'] == 1 and result['async']['changed']
+    assert result['async']['ansible_job_id']
+    assert result['delegated']['changed']
+    assert [item['changed'] for item in result['looped']['results']] == [True, True]
+    # Every task and loop item ran the module with its own Terraform run
+    applies = [run for run in terraform_stub.commands() if run['command'] == 'apply']
+    assert len(applies) == 4
+    assert sorted(rule['remote'] for rule in terraform_stub.cloud['ibm_is_security_group_rule'].values()) == [
+        '10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.5']
+
+
+@pytest.mark.parametrize('task_vars', [
+    {},
+    {'ansible_loop_var': 'item', 'item': 'a'},
+    {'ansible_loop_var': 'item', 'item': 'a', 'ibmcloud_batch_loop': False},
+])
+def test_unbatched_run_is_normal_run(task_vars, monkeypatch):
+    calls = []
+    monkeypatch.setattr(NormalActionModule, 'run', lambda self, tmp=None, task_vars=None: calls.append(
+        (tmp, task_vars)) or {'normal': True})
+    action = ibmcloud_batch.ActionModule.__new__(ibmcloud_batch.ActionModule)
+    action._task = FakeTask()
+    action._templar = FakeTemplar()
+
+    assert action.run('tmp', task_vars) == {'normal': True}
+    assert calls == [('tmp', task_vars)]
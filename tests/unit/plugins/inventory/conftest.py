@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def unwrap(value):
+    # Newer Ansible versions mark host variables as unsafe in the output
+    if list(value) == ['__ansible_unsafe']:
+        return value['__ansible_unsafe']
+    return value
+
+
+class InventoryRunner:
+    """
+    Runs 'ansible-inventory' for a vpc_inventory source with the given
+    options against the stub Terraform CLI, see 'terraform_stub'.
+    """
+    def __init__(self, terraform_stub, path):
+        self.terraform_stub = terraform_stub
+        self.path = path
+        self.stderr = ''
+
+    def __call__(self, **options):
+        """
+        Returns:
+            dict: Host variables by inventory host name
+        """
+        source = os.path.join(self.path, 'hosts.vpc.yml')
+        with open(source, 'w') as file_obj:
+            # YAML is a superset of JSON
+            json.dump(dict({'plugin': 'ibm.cloudcollection.vpc_inventory', 'regions': ['us-south']}, **options),
+                      file_obj)
+        with open(os.devnull) as stdin:
+            process = subprocess.run(
+                [sys.executable, '-m', 'ansible', 'inventory', '-i', source, '--list'],
+                cwd=self.path, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True)
+        assert process.returncode == 0, process.stderr
+        self.stderr = process.stderr
+        return json.loads(process.stdout, object_hook=unwrap)['_meta']['hostvars']
+
+    def set_data(self, **data):
+        # Attributes of the data sources, e.g. 'ibm_is_instances', with
+        # the ID Terraform sets on every data source
+        self.terraform_stub.data = dict(
+            (resource_type, dict({'id': resource_type}, **attributes))
+            for resource_type, attributes in data.items())
+
+    def queries(self):
+        # Terraform runs reading data sources since the last call
+        return [run for run in self.terraform_stub.commands() if run['command'] == 'apply']
+
+
+@pytest.fixture
+def inventory(terraform_stub, collections_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('ANSIBLE_COLLECTIONS_PATH', collections_path)
+    monkeypatch.setenv('IC_API_KEY', 'secretkey')
+    return InventoryRunner(terraform_stub, str(tmp_path))
+
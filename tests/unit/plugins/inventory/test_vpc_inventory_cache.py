@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import glob
+import json
+import os
+import time
+
+import pytest
+
+
+def instance(name, address, **attributes):
+    return dict({
+        'id': 'id-' + name, 'name': name, 'tags': [],
+        'primary_network_interface': [{'id': 'nic-' + name, 'primary_ip': [{'address': address}]}]},
+        **attributes)
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.2)
+    return False
+
+
+@pytest.fixture
+def cached(inventory, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+
+    def run(cache_timeout=3600, region_cache_timeout=0):
+        return sorted(inventory(
+            cache=True, cache_plugin='ansible.builtin.jsonfile', cache_connection=cache_dir,
+            cache_timeout=cache_timeout, region_cache_timeout=region_cache_timeout))
+
+    def set_hosts(*names):
+        inventory.set_data(ibm_is_instances={'instances': [
+            instance(name, '10.0.0.{}'.format(number + 1)) for number, name in enumerate(names)]})
+
+    def cached_hosts():
+        names = set()
+        for path in glob.glob(os.path.join(cache_dir, '*')):
+            with open(path) as file_obj:
+                entry = json.load(file_obj)
+            # Newer Ansible versions wrap the entries
+            if '__payload__' in entry:
+                entry = json.loads(entry['__payload__'])
+            names.update(host['name'] for host in entry['hosts'])
+        return sorted(names)
+
+    run.set_hosts = set_hosts
+    run.cached_hosts = cached_hosts
+    run.queries = inventory.queries
+    return run
+
+
+def test_cache_hit(cached):
+    cached.set_hosts('vm1')
+    assert cached() == ['vm1']
+    assert len(cached.queries()) == 1
+
+    cached.set_hosts('vm1', 'vm2')
+
+    assert cached() == ['vm1']
+    assert cached.queries() == []
+
+
+def test_stale_region_is_served_and_refreshed(cached):
+    cached.set_hosts('vm1')
+    cached(region_cache_timeout=1)
+    cached.queries()
+    cached.set_hosts('vm1', 'vm2')
+    time.sleep(1.5)
+
+    # The stale hosts are returned, and refreshed by another process
+    # for the next runs
+    assert cached(region_cache_timeout=1) == ['vm1']
+    assert wait_for(lambda: cached.cached_hosts() == ['vm1', 'vm2'])
+    assert len(cached.queries()) == 1
+
+    assert cached(region_cache_timeout=3600) == ['vm1', 'vm2']
+    assert cached.queries() == []
+
+
+def test_expired_region_is_queried(cached):
+    cached.set_hosts('vm1')
+    cached(cache_timeout=1)
+    cached.queries()
+    cached.set_hosts('vm1', 'vm2')
+    time.sleep(1.5)
+
+    assert cached(cache_timeout=1) == ['vm1', 'vm2']
+    assert len(cached.queries()) == 1
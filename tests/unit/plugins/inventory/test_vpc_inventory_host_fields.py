@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import glob
+import json
+import os
+
+from ansible_collections.ibm.cloudcollection.plugins.inventory.vpc_inventory import HostFilter, InventoryModule
+
+ADDRESS_FIELDS = [
+    'primary_network_interface[0].primary_ip[0].address',
+    'primary_network_attachment[0].primary_ip[0].address']
+
+
+def host_fields(compose=None, groups=None, keyed_groups=None, filters=None, exclude_tag=None,
+                ansible_display_name='name'):
+    plugin = InventoryModule()
+    plugin.compose = compose or {}
+    plugin.groups = groups or {}
+    plugin.keyed_groups = keyed_groups or []
+    plugin.host_filters = [HostFilter(path, value) for path, value in (filters or {}).items()]
+    plugin.exclude_tag = exclude_tag or []
+    plugin.ansible_display_name = ansible_display_name
+    return plugin.get_host_fields()
+
+
+def test_default_fields():
+    assert host_fields() == ['floating_ip', 'id', 'name'] + ADDRESS_FIELDS
+    assert host_fields(ansible_display_name='ip') == ['floating_ip', 'id', 'ip', 'name'] + ADDRESS_FIELDS
+
+
+def test_template_references():
+    fields = host_fields(
+        compose={'ansible_user': "'root'", 'vpc_name': 'vpc[0].name', 'tag_names': "tags | map('lower') | list"},
+        groups={'running': "status == 'running' and memory > 4", 'constant': True},
+        keyed_groups=[
+            {'key': 'zone', 'prefix': 'zone'},
+            {'key': 'profile', 'parent_group': '{{ region }}_hosts'},
+            'invalid'])
+
+    assert fields == sorted([
+        'floating_ip', 'id', 'memory', 'name', 'profile', 'region', 'status', 'tags', 'vpc',
+        'zone']) + ADDRESS_FIELDS
+
+
+def test_filtered_and_excluded_fields():
+    fields = host_fields(
+        filters={'primary_network_interface[0].subnet': 'subnet-1', 'status': 'running'},
+        exclude_tag=['skip'])
+
+    # Filtered attributes are kept as a whole
+    assert fields == [
+        'floating_ip', 'id', 'name', 'primary_network_interface', 'status', 'tags'] + ADDRESS_FIELDS
+
+
+def test_all_fields_kept():
+    assert host_fields(compose={'everything': 'vars'}) is None
+    assert host_fields(compose={'broken': 'name | '}) is None
+    assert host_fields(keyed_groups=[{'key': 'zone', 'parent_group': '{{ region'}]) is None
+
+
+def test_hosts_keep_used_fields(inventory, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    inventory.set_data(ibm_is_instances={'instances': [{
+        'id': 'id-vm1', 'name': 'vm1', 'status': 'running', 'crn': 'crn:v1:vm1',
+        'vpc': [{'id': 'vpc-1', 'name': 'myvpc', 'crn': 'crn:v1:vpc-1'}],
+        'primary_network_interface': [{'id': 'nic-vm1', 'subnet': 'subnet-1', 'primary_ip': [{'address': '10.0.0.1'}]}],
+    }]})
+
+    hosts = inventory(
+        compose={'vpc_name': 'vpc[0].name'}, keyed_groups=[{'key': 'status', 'prefix': 'status'}],
+        cache=True, cache_plugin='ansible.builtin.jsonfile', cache_connection=cache_dir)
+
+    assert hosts == {'vm1': {'ansible_host': '10.0.0.1', 'vpc_name': 'myvpc'}}
+
+    cache_file, = glob.glob(os.path.join(cache_dir, '*'))
+    with open(cache_file) as file_obj:
+        entry = json.load(file_obj)
+    # Newer Ansible versions wrap the entries
+    if '__payload__' in entry:
+        entry = json.loads(entry['__payload__'])
+    cached_host, = entry['hosts']
+    assert cached_host == {
+        'id': 'id-vm1', 'name': 'vm1', 'status': 'running',
+        'vpc': [{'id': 'vpc-1', 'name': 'myvpc', 'crn': 'crn:v1:vpc-1'}],
+        'primary_network_interface': [{'primary_ip': [{'address': '10.0.0.1'}]}]}
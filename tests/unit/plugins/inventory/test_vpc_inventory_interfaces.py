@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.ibm.cloudcollection.plugins.inventory.vpc_inventory import InventoryModule
+
+
+def legacy_instance(name, *nics):
+    # Network interface model, the first interface is the primary one
+    return {
+        'id': 'id-' + name, 'name': name,
+        'primary_network_interface': [{'id': nics[0], 'primary_ip': [{'address': '10.0.0.1'}]}],
+        'network_interfaces': [{'id': nic} for nic in nics]}
+
+
+def vni_instance(name, *attachments):
+    # Network attachment model, with the VNIs embedded if known
+    def attachment(attachment_id, vni_id):
+        attachment = {'id': attachment_id}
+        if vni_id is not None:
+            attachment['virtual_network_interface'] = [{'id': vni_id, 'name': vni_id}]
+        return attachment
+
+    return {
+        'id': 'id-' + name, 'name': name,
+        'primary_network_interface': [],
+        'primary_network_attachment': [attachment(*attachments[0])],
+        'network_attachments': [attachment(*ids) for ids in attachments]}
+
+
+def test_legacy_interfaces():
+    vm1 = legacy_instance('vm1', 'nic-1', 'nic-2')
+    vm2 = legacy_instance('vm2', 'nic-3')
+
+    interfaces = InventoryModule.index_instance_interfaces([vm1, vm2])
+
+    assert interfaces == {'nic-1': vm1, 'nic-2': vm1, 'nic-3': vm2}
+    assert interfaces['nic-2'] is vm1
+
+
+def test_vni_interfaces():
+    vm1 = vni_instance('vm1', ('attachment-1', 'vni-1'), ('attachment-2', 'vni-2'))
+    # VNI not embedded in the attachment, matched by its target
+    vm2 = vni_instance('vm2', ('attachment-3', None))
+
+    interfaces = InventoryModule.index_instance_interfaces([vm1, vm2])
+
+    assert interfaces == {
+        'attachment-1': vm1, 'vni-1': vm1, 'attachment-2': vm1, 'vni-2': vm1, 'attachment-3': vm2}
+
+
+def test_mixed_and_missing_interfaces():
+    legacy = legacy_instance('vm1', 'nic-1')
+    attached = vni_instance('server1', ('attachment-1', 'vni-1'))
+    attached['host_type'] = 'bare_metal_server'
+    bare = {'id': 'id-vm3', 'name': 'vm3', 'primary_network_interface': None,
+            'network_interfaces': [{'name': 'no-id'}]}
+
+    interfaces = InventoryModule.index_instance_interfaces([legacy, attached, bare])
+
+    assert interfaces == {'nic-1': legacy, 'attachment-1': attached, 'vni-1': attached}
+    assert InventoryModule.index_instance_interfaces([]) == {}
+
+
+def test_floating_ips_of_all_interfaces(inventory):
+    instances = [legacy_instance('vm1', 'nic-1', 'nic-2'), vni_instance('vm2', ('attachment-1', 'vni-1'))]
+    instances[1]['primary_network_attachment'][0]['primary_ip'] = [{'address': '10.0.0.2'}]
+    inventory.set_data(
+        ibm_is_instances={'instances': instances},
+        ibm_is_floating_ips={'floating_ips': [
+            # Secondary network interface, and an embedded VNI
+            {'address': '169.0.0.1', 'target': [{'id': 'nic-2'}]},
+            {'address': '169.0.0.2', 'target': [{'id': 'vni-1'}]},
+            {'address': '169.0.0.3', 'target': [{'id': 'nic-unknown'}]},
+            {'address': '169.0.0.4'}]},
+        ibm_is_virtual_network_interfaces={'virtual_network_interfaces': []})
+
+    hosts = inventory(use_floating_ips=True)
+
+    assert dict((name, host['ansible_host']) for name, host in hosts.items()) == {
+        'vm1': '169.0.0.1', 'vm2': '169.0.0.2'}
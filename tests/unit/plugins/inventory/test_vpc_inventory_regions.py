@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+def instance(name, address, **attributes):
+    return dict({
+        'id': 'id-' + name, 'name': name, 'tags': [],
+        'primary_network_interface': [{'id': 'nic-' + name, 'primary_ip': [{'address': address}]}]},
+        **attributes)
+
+
+# Network attachment whose VNI is only known from the VNI data source
+ATTACHMENT = {'id': 'attachment-vm2', 'primary_ip': [{'address': '10.0.0.2'}]}
+INSTANCES = {'instances': [
+    instance('vm1', '10.0.0.1'),
+    instance('vm2', '10.0.0.2', primary_network_interface=[], primary_network_attachment=[ATTACHMENT])]}
+# Floating IPs target the network interface, or the VNI of the network
+# attachment
+FLOATING_IPS = {'floating_ips': [
+    {'address': '169.0.0.1', 'target': [{'id': 'nic-vm1'}]},
+    {'address': '169.0.0.2', 'target': [{'id': 'vni-vm2'}]}]}
+VNIS = {'virtual_network_interfaces': [{'id': 'vni-vm2', 'target': [{'id': 'attachment-vm2'}]}]}
+
+
+def test_floating_ips(inventory):
+    inventory.set_data(
+        ibm_is_instances=INSTANCES, ibm_is_floating_ips=FLOATING_IPS, ibm_is_virtual_network_interfaces=VNIS)
+
+    hosts = inventory(use_floating_ips=True)
+
+    assert dict((name, host['ansible_host']) for name, host in hosts.items()) == {
+        'vm1': '169.0.0.1', 'vm2': '169.0.0.2'}
+    assert 'WARNING' not in inventory.stderr
+
+
+def test_failing_optional_data_source_is_skipped(inventory):
+    # No permission to read VNIs
+    inventory.set_data(ibm_is_instances=INSTANCES, ibm_is_floating_ips=FLOATING_IPS)
+
+    hosts = inventory(use_floating_ips=True)
+
+    assert dict((name, host['ansible_host']) for name, host in hosts.items()) == {'vm1': '169.0.0.1'}
+    assert 'ibm_is_virtual_network_interfaces not read' in inventory.stderr
+
+
+def test_failing_hosts_skip_the_region(inventory):
+    # Bare metal servers are hosts of the region as well
+    inventory.set_data(ibm_is_instances=INSTANCES)
+
+    hosts = inventory(include_bare_metal_servers=True)
+
+    assert hosts == {}
+    assert 'Skipping region us-south' in inventory.stderr
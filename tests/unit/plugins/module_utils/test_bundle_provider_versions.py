@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import glob
+import os
+import re
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import BUNDLE_PROVIDER_VERSIONS
+
+PLUGINS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))),
+    'plugins')
+
+
+def test_bundle_includes_exactly_the_pinned_provider_versions():
+    pinned = set()
+    for path in glob.glob(os.path.join(PLUGINS_DIR, '*', '*.py')):
+        with open(path) as file_obj:
+            pinned.update(re.findall(
+                r"(?:ibm_provider_version=|IBM_PROVIDER_VERSION = )'([0-9.]+)'", file_obj.read()))
+
+    assert sorted(BUNDLE_PROVIDER_VERSIONS) == sorted(pinned)
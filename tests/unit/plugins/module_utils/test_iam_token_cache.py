@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import stat
+import time
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud_rest
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import IAMTokenCache
+
+
+@pytest.fixture
+def exchanges(monkeypatch):
+    exchanges = []
+
+    def iam_token_exchange(api_key, env=None):
+        exchanges.append(api_key)
+        return {'access_token': 'token-{}'.format(len(exchanges)), 'refresh_token': 'refresh',
+                'expiration': int(time.time()) + 3600, 'expires_in': 3600}
+
+    monkeypatch.setattr(ibmcloud_rest, 'iam_token_exchange', iam_token_exchange)
+    return exchanges
+
+
+def token_files(cache):
+    return [os.path.join(cache.path, name) for name in os.listdir(cache.path) if not name.endswith('.lock')]
+
+
+def test_tokens_are_cached_privately(tmp_path, exchanges):
+    cache = IAMTokenCache(str(tmp_path))
+
+    assert cache.token('key')['access_token'] == 'token-1'
+    assert IAMTokenCache(str(tmp_path)).token('key')['access_token'] == 'token-1'
+    assert cache.token('otherkey')['access_token'] == 'token-2'
+
+    assert exchanges == ['key', 'otherkey']
+    assert cache.path == os.path.join(str(tmp_path), 'iam_tokens', str(os.getuid()))
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o700
+    for path in token_files(cache):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_directory_mode_is_restricted(tmp_path, exchanges):
+    path = IAMTokenCache(str(tmp_path)).path
+    os.chmod(path, 0o777)
+
+    IAMTokenCache(str(tmp_path))
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+
+def test_token_file_readable_by_others_is_ignored(tmp_path, exchanges):
+    cache = IAMTokenCache(str(tmp_path))
+    cache.token('key')
+    os.chmod(token_files(cache)[0], 0o644)
+
+    assert cache.token('key')['access_token'] == 'token-2'
+    assert stat.S_IMODE(os.stat(token_files(cache)[0]).st_mode) == 0o600
+
+
+def test_symlinked_token_file_is_ignored(tmp_path, exchanges):
+    cache = IAMTokenCache(str(tmp_path))
+    cache.token('key')
+    path = token_files(cache)[0]
+    os.rename(path, path + '.target')
+    os.symlink(path + '.target', path)
+
+    assert cache.token('key')['access_token'] == 'token-2'
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason='Changing file owners requires root')
+def test_token_file_of_other_user_is_ignored(tmp_path, exchanges):
+    cache = IAMTokenCache(str(tmp_path))
+    cache.token('key')
+    os.chown(token_files(cache)[0], 12345, -1)
+
+    assert cache.token('key')['access_token'] == 'token-2'
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason='Changing file owners requires root')
+def test_directory_of_other_user_is_rejected(tmp_path, exchanges):
+    path = IAMTokenCache(str(tmp_path)).path
+    os.chown(path, 12345, -1)
+
+    with pytest.raises(OSError):
+        IAMTokenCache(str(tmp_path))
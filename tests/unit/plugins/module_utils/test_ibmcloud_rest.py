@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer, socketserver
+from ansible.module_utils.six.moves.urllib.parse import parse_qs, urlsplit
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud_rest
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud_rest import read_data_source
+
+# Attribute layout of the data sources in the Terraform state of
+# provider 1.71.2: scalar attributes are None, nested blocks and lists
+# of objects are the layout of their elements
+HEALTH_REASON = {'code': None, 'message': None, 'more_info': None}
+DELETED = {'more_info': None}
+REFERENCE = {'crn': None, 'deleted': DELETED, 'href': None, 'id': None, 'name': None, 'resource_type': None}
+RESERVED_IP = {'address': None, 'href': None, 'name': None, 'reserved_ip': None, 'resource_type': None}
+NETWORK_INTERFACE = {
+    'id': None, 'name': None, 'primary_ipv4_address': None, 'primary_ip': RESERVED_IP, 'subnet': None}
+NETWORK_ATTACHMENT = {
+    'deleted': DELETED, 'href': None, 'id': None, 'name': None, 'primary_ip': RESERVED_IP,
+    'resource_type': None, 'subnet': REFERENCE,
+    'virtual_network_interface': {'crn': None, 'href': None, 'id': None, 'name': None, 'resource_type': None}}
+
+LAYOUTS = {
+    'ibm_is_vpc': dict.fromkeys((
+        'id', 'identifier', 'name', 'classic_access', 'crn', 'status', 'health_state',
+        'resource_group', 'resource_group_name', 'default_network_acl', 'default_network_acl_name',
+        'default_network_acl_crn', 'default_security_group', 'default_security_group_name',
+        'default_security_group_crn', 'default_routing_table', 'default_routing_table_name', 'tags',
+        'access_tags', 'resource_controller_url', 'resource_name', 'resource_crn', 'resource_status')),
+    'ibm_is_subnet': dict.fromkeys((
+        'id', 'identifier', 'name', 'vpc', 'vpc_name', 'crn', 'ip_version', 'ipv4_cidr_block',
+        'available_ipv4_address_count', 'total_ipv4_address_count', 'network_acl', 'public_gateway',
+        'resource_group', 'resource_group_name', 'status', 'zone', 'tags', 'access_tags',
+        'resource_controller_url', 'resource_name', 'resource_crn', 'resource_status')),
+    'ibm_is_images': dict.fromkeys((
+        'id', 'resource_group', 'catalog_managed', 'name', 'status', 'visibility', 'user_data_format')),
+    'ibm_resource_group': dict.fromkeys((
+        'id', 'name', 'is_default', 'state', 'crn', 'account_id', 'created_at', 'updated_at', 'teams_url',
+        'payment_methods_url', 'quota_url', 'quota_id', 'resource_linkages')),
+    'ibm_is_instances': dict.fromkeys((
+        'id', 'resource_group', 'dedicated_host_name', 'dedicated_host', 'placement_group', 'instance_group',
+        'instance_group_name', 'vpc_name', 'vpc', 'vpc_crn', 'placement_group_name')),
+}
+LAYOUTS['ibm_is_vpc'].update({
+    'health_reasons': HEALTH_REASON,
+    'cse_source_addresses': {'address': None, 'zone_name': None},
+    'dns': {
+        'enable_hub': None, 'resolution_binding_count': None,
+        'resolver': {
+            'servers': {'address': None, 'zone_affinity': None}, 'type': None, 'configuration': None,
+            'vpc': dict(REFERENCE, remote={
+                'account': {'id': None, 'resource_type': None}, 'region': {'href': None, 'name': None}})}},
+    'subnets': dict.fromkeys((
+        'name', 'id', 'status', 'zone', 'total_ipv4_address_count', 'available_ipv4_address_count')),
+    'security_group': {
+        'group_id': None, 'group_name': None,
+        'rules': dict.fromkeys((
+            'rule_id', 'direction', 'ip_version', 'remote', 'type', 'code', 'port_min', 'port_max',
+            'protocol'))},
+})
+LAYOUTS['ibm_is_subnet']['routing_table'] = REFERENCE
+LAYOUTS['ibm_is_images']['images'] = dict(dict.fromkeys((
+    'id', 'name', 'crn', 'status', 'visibility', 'os', 'architecture', 'checksum', 'encryption',
+    'encryption_key', 'source_volume', 'user_data_format', 'created_at', 'deprecation_at', 'obsolescence_at',
+    'access_tags')),
+    status_reasons=HEALTH_REASON,
+    operating_system=dict.fromkeys((
+        'allow_user_image_creation', 'architecture', 'dedicated_host_only', 'display_name', 'family', 'href',
+        'name', 'user_data_format', 'vendor', 'version')),
+    catalog_offering={'managed': None, 'version': {'crn': None}},
+    resource_group={'href': None, 'id': None, 'name': None})
+LAYOUTS['ibm_is_instances']['instances'] = dict(dict.fromkeys((
+    'id', 'crn', 'name', 'memory', 'bandwidth', 'total_volume_bandwidth', 'total_network_bandwidth', 'status',
+    'lifecycle_state', 'resource_group', 'vpc', 'zone', 'image', 'profile', 'health_state',
+    'metadata_service_enabled', 'availability_policy_host_failure')),
+    status_reasons=HEALTH_REASON,
+    lifecycle_reasons=HEALTH_REASON,
+    health_reasons=HEALTH_REASON,
+    vcpu={'architecture': None, 'count': None, 'manufacturer': None},
+    gpu={'count': None, 'manufacturer': None, 'memory': None, 'model': None},
+    disks=dict.fromkeys(('created_at', 'href', 'id', 'interface_type', 'name', 'resource_type', 'size')),
+    placement_target=REFERENCE,
+    metadata_service={'enabled': None, 'protocol': None, 'response_hop_limit': None},
+    reservation=REFERENCE,
+    reservation_affinity={'policy': None, 'pool': REFERENCE},
+    boot_volume=dict.fromkeys(('id', 'name', 'device', 'volume_id', 'volume_crn')),
+    volume_attachments=dict.fromkeys(('id', 'name', 'volume_id', 'volume_name', 'volume_crn')),
+    primary_network_interface=NETWORK_INTERFACE,
+    network_interfaces=NETWORK_INTERFACE,
+    primary_network_attachment=NETWORK_ATTACHMENT,
+    network_attachments=NETWORK_ATTACHMENT,
+    catalog_offering={'version_crn': None, 'plan_crn': None, 'deleted': DELETED})
+
+
+def assert_layout(attributes, layout, path='attributes'):
+    """
+    Assert that the attribute dictionary has the layout of 'LAYOUTS':
+    the same keys, and nested blocks as lists (possibly empty) of
+    dictionaries with the same layout.
+    """
+    assert sorted(attributes) == sorted(layout), path
+    for key, nested in layout.items():
+        value = attributes[key]
+        if nested is None:
+            assert not isinstance(value, dict), '{}.{}'.format(path, key)
+            continue
+        assert isinstance(value, list), '{}.{}'.format(path, key)
+        for index, item in enumerate(value):
+            assert_layout(item, nested, '{}.{}[{}]'.format(path, key, index))
+
+
+def token(account='account-1'):
+    payload = base64.urlsafe_b64encode(json.dumps({'account': {'bss': account}}).encode('utf-8'))
+    return 'header.{}.signature'.format(payload.decode('utf-8').rstrip('='))
+
+
+def ref(kind, number, **fields):
+    return dict({
+        'id': '{}-{}'.format(kind, number), 'name': '{}{}'.format(kind, number),
+        'crn': 'crn:v1:bluemix:public:is:us-south:a/account-1::{}:{}-{}'.format(kind, kind, number),
+        'href': 'https://us-south.iaas.cloud.ibm.com/v1/{}s/{}-{}'.format(kind, kind, number),
+        'resource_type': kind}, **fields)
+
+
+def api_vpc(number):
+    return ref('vpc', number, classic_access=False, status='available', health_state='ok', health_reasons=[],
+               created_at='2024-01-01T00:00:00Z', resource_group=ref('resource_group', 1),
+               default_network_acl=ref('network_acl', number), default_security_group=ref('security_group', number),
+               default_routing_table=ref('routing_table', number),
+               cse_source_addresses=[{'address': {'address': '10.0.0.{}'.format(number)},
+                                      'zone': {'name': 'us-south-1', 'href': 'https://zone'}}],
+               dns={'enable_hub': False, 'resolution_binding_count': 0,
+                    'resolver': {'type': 'system', 'configuration': 'default',
+                                 'servers': [{'address': '161.26.0.10',
+                                              'zone_affinity': {'name': 'us-south-1', 'href': 'https://zone'}}],
+                                 'vpc': ref('vpc', number, remote={
+                                     'account': {'id': 'account-2', 'resource_type': 'account'},
+                                     'region': {'href': 'https://region', 'name': 'us-south'}})}})
+
+
+def api_subnet(number, vpc):
+    return ref('subnet', number, vpc=ref('vpc', vpc), zone={'name': 'us-south-1', 'href': 'https://zone'},
+               status='available', ip_version='ipv4', ipv4_cidr_block='10.240.{}.0/24'.format(number),
+               available_ipv4_address_count=250, total_ipv4_address_count=256,
+               network_acl=ref('network_acl', vpc), public_gateway=None, resource_group=ref('resource_group', 1),
+               routing_table=ref('routing_table', vpc))
+
+
+def api_security_group(number, vpc):
+    return ref('security_group', number, vpc=ref('vpc', vpc), rules=[
+        {'id': 'rule-1', 'direction': 'inbound', 'ip_version': 'ipv4', 'protocol': 'tcp', 'port_min': 22,
+         'port_max': 22, 'remote': {'cidr_block': '0.0.0.0/0'}, 'href': 'https://rule'},
+        {'id': 'rule-2', 'direction': 'outbound', 'ip_version': 'ipv4', 'protocol': 'icmp', 'type': 8,
+         'code': 0, 'remote': ref('security_group', number)},
+        {'id': 'rule-3', 'direction': 'outbound', 'ip_version': 'ipv4', 'protocol': 'all',
+         'remote': {'address': '10.0.0.1'}}])
+
+
+def api_image(number):
+    return ref('image', number, status='available', visibility='private' if number % 2 else 'public',
+               status_reasons=[], encryption='none', file={'checksums': {'sha256': 'abc'}, 'size': 1},
+               operating_system={'allow_user_image_creation': True, 'architecture': 'amd64',
+                                 'dedicated_host_only': False, 'display_name': 'Ubuntu', 'family': 'Ubuntu',
+                                 'href': 'https://os', 'name': 'ubuntu-24-04-amd64', 'user_data_format': 'cloud_init',
+                                 'vendor': 'Canonical', 'version': '24.04'},
+               catalog_offering={'managed': False}, resource_group=ref('resource_group', 1),
+               user_data_format='cloud_init', created_at='2024-01-01T00:00:00Z', minimum_provisioned_size=10)
+
+
+def api_instance(number):
+    primary_ip = {'address': '10.240.0.{}'.format(number), 'href': 'https://ip', 'id': 'ip-{}'.format(number),
+                  'name': 'ip', 'resource_type': 'subnet_reserved_ip'}
+    interface = ref('network_interface', number, primary_ip=primary_ip, subnet=ref('subnet', 1))
+    attachment = ref('network_attachment', number, primary_ip=primary_ip, subnet=ref('subnet', 1), type='primary',
+                     virtual_network_interface=ref('virtual_network_interface', number))
+    return ref('instance', number, memory=4, bandwidth=4000, total_volume_bandwidth=1000,
+               total_network_bandwidth=3000, status='running', status_reasons=[], lifecycle_state='stable',
+               lifecycle_reasons=[], health_state='ok', health_reasons=[],
+               resource_group=ref('resource_group', 1), vpc=ref('vpc', 1),
+               zone={'name': 'us-south-1', 'href': 'https://zone'}, image=ref('image', 1),
+               profile={'name': 'bx2-2x8', 'href': 'https://profile'},
+               vcpu={'architecture': 'amd64', 'count': 2, 'manufacturer': 'intel'},
+               disks=[], metadata_service={'enabled': True, 'protocol': 'http', 'response_hop_limit': 1},
+               availability_policy={'host_failure': 'restart'},
+               boot_volume_attachment={'id': 'attachment-1', 'name': 'boot', 'device': {'id': 'device-1'},
+                                       'volume': ref('volume', number)},
+               volume_attachments=[{'id': 'attachment-1', 'name': 'boot', 'device': {'id': 'device-1'},
+                                    'volume': ref('volume', number)}],
+               primary_network_interface=interface, network_interfaces=[interface],
+               primary_network_attachment=attachment, network_attachments=[attachment],
+               catalog_offering={'plan': {'crn': 'crn:plan'}, 'version': {'crn': 'crn:version'}},
+               reservation_affinity={'policy': 'disabled', 'pool': []})
+
+
+class CloudAPI:
+    """
+    IAM, VPC, Global Tagging and Resource Manager APIs on one local HTTP
+    server, a thread per connection. VPC collections are returned in pages of 'page_size' items.
+    """
+    def __init__(self):
+        self.vpcs = [api_vpc(number) for number in range(1, 6)]
+        self.subnets = [api_subnet(number, 1 + number % 2) for number in range(1, 6)]
+        self.security_groups = [api_security_group(number, 1 + number % 2) for number in range(1, 4)]
+        self.images = [api_image(number) for number in range(1, 6)]
+        self.instances = [api_instance(number) for number in range(1, 6)]
+        self.resource_groups = [
+            {'id': 'resource_group-1', 'name': 'default', 'default': True, 'state': 'ACTIVE',
+             'crn': 'crn:rg', 'account_id': 'account-1', 'quota_id': 'quota', 'resource_linkages': [],
+             'teams_url': '/teams', 'payment_methods_url': '/payment', 'quota_url': '/quota',
+             'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z'}]
+        self.page_size = 2
+        self.requests = []
+        self.fail = None
+        api = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.reply(api.token(self.path))
+
+            def do_GET(self):
+                if self.headers.get('Authorization') != 'Bearer ' + token():
+                    self.reply(None, 401)
+                    return
+                parts = urlsplit(self.path)
+                query = dict((key, values[0]) for key, values in parse_qs(parts.query).items())
+                api.requests.append((parts.path, query))
+                if api.fail is not None:
+                    self.reply(None, api.fail)
+                    return
+                response = api.get(parts.path, query)
+                self.reply(response, 200 if response is not None else 404)
+
+            def reply(self, body, status=200):
+                data = json.dumps(body or {'errors': []}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def token(self, path):
+        assert path == '/identity/token'
+        return {'access_token': token(), 'refresh_token': 'refresh', 'expiration': int(time.time()) + 3600}
+
+    def page(self, path, collection, items, query):
+        assert query['version'] == ibmcloud_rest.VPC_API_VERSION and query['generation'] == '2'
+        for key, value in query.items():
+            if key.endswith('.id') or key in ('name', 'visibility', 'status'):
+                field = key.split('.')[0]
+                items = [item for item in items if (item[field]['id'] if key.endswith('.id') else item[field]) == value]
+        start = int(query.get('start', 0))
+        page_size = min(self.page_size, int(query['limit']))
+        page = {collection: items[start:start + page_size], 'limit': page_size}
+        if start + page_size < len(items):
+            page['next'] = {'href': '{}/v1{}?start={}&limit={}'.format(self.url, path, start + page_size, page_size)}
+        return page
+
+    def get(self, path, query):
+        if path.startswith('/v1/'):
+            parts = path[len('/v1/'):].split('/')
+            items = getattr(self, parts[0])
+            if len(parts) == 2:
+                assert query['version'] == ibmcloud_rest.VPC_API_VERSION
+                return dict((item['id'], item) for item in items).get(parts[1])
+            return self.page('/' + parts[0], parts[0], items, query)
+        if path == '/v3/tags':
+            if query['tag_type'] == 'access':
+                return {'items': []}
+            return {'items': [{'name': 'env:test'}, {'name': query['attached_to'].rsplit(':', 1)[-1]}]}
+        if path == '/v2/resource_groups':
+            assert query['account_id'] == 'account-1'
+            return {'resources': [
+                group for group in self.resource_groups
+                if group['name'] == query.get('name') or (group['default'] and query.get('default') == 'true')]}
+        return None
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = CloudAPI()
+    monkeypatch.setattr(ibmcloud_rest, '_TOKENS', {})
+    yield api
+    ibmcloud_rest._CLIENT.close()
+    api.stop()
+
+
+@pytest.fixture
+def env(api):
+    return {
+        'IC_API_KEY': 'apikey',
+        'IBMCLOUD_IAM_API_ENDPOINT': api.url,
+        'IBMCLOUD_IS_NG_API_ENDPOINT': api.url + '/v1',
+        'IBMCLOUD_GT_API_ENDPOINT': api.url,
+        'IBMCLOUD_RESOURCE_MANAGEMENT_API_ENDPOINT': api.url,
+    }
+
+
+def test_vpc_by_name(api, env):
+    attributes = read_data_source('ibm_is_vpc', {'name': 'vpc5'}, env)
+
+    assert_layout(attributes, LAYOUTS['ibm_is_vpc'])
+    assert attributes['id'] == 'vpc-5' and attributes['identifier'] is None
+    # Found on the third page
+    assert [query.get('start') for path, query in api.requests if path == '/v1/vpcs'] == [None, '2', '4']
+    assert attributes['dns'][0]['resolver'][0]['servers'] == [{'address': '161.26.0.10', 'zone_affinity': 'us-south-1'}]
+    assert attributes['tags'] == ['env:test', 'vpc-5']
+
+
+def test_vpc_subnets_and_security_groups_of_all_pages(api, env):
+    attributes = read_data_source('ibm_is_vpc', {'identifier': 'vpc-2'}, env)
+
+    assert_layout(attributes, LAYOUTS['ibm_is_vpc'])
+    assert [subnet['id'] for subnet in attributes['subnets']] == ['subnet-1', 'subnet-3', 'subnet-5']
+    assert [group['group_id'] for group in attributes['security_group']] == ['security_group-1', 'security_group-3']
+    assert attributes['security_group'][0]['rules'] == [
+        {'rule_id': 'rule-1', 'direction': 'inbound', 'ip_version': 'ipv4', 'remote': '0.0.0.0/0', 'protocol': 'tcp',
+         'type': None, 'code': None, 'port_min': 22, 'port_max': 22},
+        {'rule_id': 'rule-2', 'direction': 'outbound', 'ip_version': 'ipv4', 'remote': 'security_group-1',
+         'protocol': 'icmp', 'type': 8, 'code': 0, 'port_min': None, 'port_max': None},
+        {'rule_id': 'rule-3', 'direction': 'outbound', 'ip_version': 'ipv4', 'remote': '10.0.0.1', 'protocol': 'all',
+         'type': None, 'code': None, 'port_min': None, 'port_max': None}]
+
+
+def test_subnet(api, env):
+    by_name = read_data_source('ibm_is_subnet', {'name': 'subnet4', 'vpc': 'vpc-1'}, env)
+    by_id = read_data_source('ibm_is_subnet', {'identifier': 'subnet-4'}, env)
+
+    assert_layout(by_name, LAYOUTS['ibm_is_subnet'])
+    assert_layout(by_id, LAYOUTS['ibm_is_subnet'])
+    assert by_name == dict(by_id, identifier=None)
+    assert by_name['vpc'] == 'vpc-1' and by_name['zone'] == 'us-south-1'
+    assert by_name['routing_table'][0]['deleted'] == []
+
+
+def test_images_of_all_pages(api, env):
+    attributes = read_data_source('ibm_is_images', {'visibility': 'private'}, env)
+
+    assert_layout(attributes, LAYOUTS['ibm_is_images'])
+    assert [image['id'] for image in attributes['images']] == ['image-1', 'image-3', 'image-5']
+    assert attributes['images'][0]['catalog_offering'] == [{'managed': False, 'version': []}]
+    assert attributes['images'][0]['os'] == 'ubuntu-24-04-amd64'
+
+
+def test_resource_group(api, env):
+    attributes = read_data_source('ibm_resource_group', {'is_default': True}, env)
+
+    assert_layout(attributes, LAYOUTS['ibm_resource_group'])
+    assert attributes['id'] == 'resource_group-1' and attributes['is_default'] is True
+
+
+def test_instances_of_all_pages(api, env):
+    attributes = read_data_source('ibm_is_instances', {'vpc': 'vpc-1'}, env)
+
+    assert_layout(attributes, LAYOUTS['ibm_is_instances'])
+    assert [instance['id'] for instance in attributes['instances']] == [
+        'instance-{}'.format(number) for number in range(1, 6)]
+    instance = attributes['instances'][0]
+    assert instance['primary_network_attachment'][0]['primary_ip'][0]['reserved_ip'] == 'ip-1'
+    assert instance['catalog_offering'] == [{'version_crn': 'crn:version', 'plan_crn': 'crn:plan', 'deleted': []}]
+    assert instance['gpu'] == [] and instance['reservation_affinity'][0]['pool'] == []
+
+
+@pytest.mark.parametrize('status', [400, 404, 500])
+def test_http_errors_fall_back(api, env, status):
+    api.fail = status
+    assert read_data_source('ibm_is_vpc', {'identifier': 'vpc-1'}, env) is None
+
+
+def test_missing_resource_falls_back(api, env):
+    assert read_data_source('ibm_is_vpc', {'name': 'missing'}, env) is None
+
+
+def test_connection_errors_fall_back(api, env):
+    env = dict(env, IBMCLOUD_IS_NG_API_ENDPOINT='http://127.0.0.1:1/v1')
+    assert read_data_source('ibm_is_subnet', {'identifier': 'subnet-1'}, env) is None
+
+
+def test_programming_errors_are_raised(api, env, monkeypatch):
+    def broken(session, parameters):
+        return {}['id']
+
+    monkeypatch.setitem(ibmcloud_rest.DATA_SOURCES, 'ibm_is_vpc', broken)
+    with pytest.raises(KeyError):
+        read_data_source('ibm_is_vpc', {'identifier': 'vpc-1'}, env)
+
+
+def test_concurrent_regions(api, env):
+    # Regions of the inventory are read in parallel threads with the
+    # shared client
+    def read(number):
+        region_env = dict(env, IBMCLOUD_IS_NG_API_ENDPOINT=api.url + '/v1')
+        return [read_data_source('ibm_is_instances', {'vpc': 'vpc-1', 'region': 'region-{}'.format(number)},
+                                 region_env) for _ in range(3)]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(read, range(12)))
+
+    for result in results:
+        for attributes in result:
+            assert attributes is not None
+            assert len(attributes['instances']) == 5
+
+
+def test_connections_per_thread(api):
+    client = ibmcloud_rest.RestClient()
+    connections = []
+
+    def request():
+        client.request('POST', api.url + '/identity/token', body='')
+        connections.append(client.connections[('http', api.url[len('http://'):])])
+        client.close()
+
+    threads = [threading.Thread(target=request) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(connections) == 2 and connections[0] is not connections[1]
+    assert client.connections == {}
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import makedirs_shared
+
+
+def test_created_directories_are_shared(tmp_path):
+    path = str(tmp_path / 'terraform_dir' / 'workspaces')
+
+    makedirs_shared(path)
+
+    for directory in (path, os.path.dirname(path)):
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o777
+    assert stat.S_IMODE(os.stat(str(tmp_path)).st_mode) != 0o777
+
+
+def test_umask_is_never_changed(tmp_path, monkeypatch):
+    # The umask is process-wide, changing it would affect files created
+    # meanwhile by other threads (e.g. the inventory region queries)
+    def umask(mask):
+        raise AssertionError('os.umask called')
+    monkeypatch.setattr(os, 'umask', umask)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(makedirs_shared, [str(tmp_path / 'shared' / str(i % 4)) for i in range(40)]))
+
+    for i in range(4):
+        assert stat.S_IMODE(os.stat(str(tmp_path / 'shared' / str(i))).st_mode) == 0o777
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import ibmcloud_terraform
+
+
+def run_vpc(**parameters):
+    parameters = dict({'state': 'available', 'id': None, 'name': 'myvpc', 'region': 'us-south'}, **parameters)
+    return ibmcloud_terraform(
+        resource_type='ibm_is_vpc',
+        tf_type='resource',
+        parameters=parameters,
+        ibm_provider_version='1.71.2',
+        tl_required_params=[('name', 'str')],
+        tl_all_params=['name'])
+
+
+def commands(terraform_stub):
+    return [run['command'] for run in terraform_stub.commands() if run['command'] != 'version']
+
+
+def test_changed_plan_is_applied(terraform_stub):
+    result = run_vpc()
+
+    assert result['rc'] == 0
+    assert result['changed'] is True
+    assert result['resource'] == {'id': 'ibm_is_vpc-1', 'name': 'myvpc'}
+    # Exit code 2 of the plan: show the saved plan and apply it
+    assert commands(terraform_stub) == ['init', 'plan', 'show', 'apply']
+    assert terraform_stub.cloud == {'ibm_is_vpc': {'ibm_is_vpc-1': {'id': 'ibm_is_vpc-1', 'name': 'myvpc'}}}
+
+
+def test_updated_resource_is_applied(terraform_stub):
+    terraform_stub.cloud = {'ibm_is_vpc': {'vpc-1': {'id': 'vpc-1', 'name': 'oldvpc'}}}
+
+    result = run_vpc(id='vpc-1')
+
+    assert result['rc'] == 0
+    assert result['changed'] is True
+    assert commands(terraform_stub) == ['init', 'import', 'plan', 'show', 'apply']
+    assert terraform_stub.cloud['ibm_is_vpc']['vpc-1']['name'] == 'myvpc'
+
+
+def test_empty_plan_is_not_applied(terraform_stub):
+    terraform_stub.cloud = {'ibm_is_vpc': {'vpc-1': {'id': 'vpc-1', 'name': 'myvpc', 'status': 'available'}}}
+
+    result = run_vpc(id='vpc-1')
+
+    assert result['rc'] == 0
+    assert result['changed'] is False
+    assert result['resource'] == {'id': 'vpc-1', 'name': 'myvpc', 'status': 'available'}
+    # Exit code 0 of the plan: no changes, nothing to show or apply
+    assert commands(terraform_stub) == ['init', 'import', 'plan']
+
+
+def test_failed_plan_is_not_applied(terraform_stub, monkeypatch):
+    monkeypatch.setenv('STUB_FAIL', 'plan')
+
+    result = run_vpc()
+
+    assert result['rc'] == 1
+    assert result['changed'] is False
+    assert result['stderr'] == 'Error: plan failed\n'
+    # Exit code 1 of the plan: report the error without applying
+    assert commands(terraform_stub) == ['init', 'plan']
+    assert terraform_stub.cloud == {}
+
+
+def test_failed_apply_is_not_changed(terraform_stub, monkeypatch):
+    monkeypatch.setenv('STUB_FAIL', 'apply')
+
+    result = run_vpc()
+
+    assert result['rc'] == 1
+    assert result['changed'] is False
+    assert commands(terraform_stub) == ['init', 'plan', 'show', 'apply']
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import signal
+import stat
+import tempfile
+import time
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import ResidentProvider
+
+STUBS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'stubs')
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    # A terminated provider may linger as a zombie of its supervisor
+    try:
+        with open('/proc/{}/stat'.format(pid)) as file_obj:
+            return file_obj.read().split(')')[-1].split()[0] != 'Z'
+    except OSError:
+        return True
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@pytest.fixture
+def temp_dir(monkeypatch):
+    # Short path for the unix sockets of the providers
+    path = tempfile.mkdtemp(prefix='rp')
+    monkeypatch.setattr(tempfile, 'tempdir', path)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def provider(tmp_path, temp_dir):
+    executable = str(tmp_path / 'terraform-provider-ibm_v1.71.2')
+    shutil.copy(os.path.join(STUBS, 'terraform-provider-ibm'), executable)
+    os.chmod(executable, 0o755)
+    log = str(tmp_path / 'provider.log')
+
+    def resident(ttl=300, api_key='key'):
+        env = dict(os.environ, STUB_PROVIDER_LOG=log, IC_API_KEY=api_key)
+        return ResidentProvider(str(tmp_path / 'terraform_dir'), executable, '1.71.2', env, ttl=ttl)
+
+    def starts():
+        if not os.path.isfile(log):
+            return []
+        with open(log) as file_obj:
+            return [json.loads(line)['pid'] for line in file_obj]
+
+    resident.starts = starts
+    yield resident
+    # Stop the providers together with their supervisors
+    for pid in starts():
+        try:
+            os.killpg(os.getpgid(pid), signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def reattach_pid(reattach):
+    return json.loads(reattach)['registry.terraform.io/ibm-cloud/ibm']['Pid']
+
+
+def test_provider_is_started_and_reused(provider):
+    with provider() as reattach:
+        assert reattach is not None
+        pid = reattach_pid(reattach)
+        assert provider.starts() == [pid]
+        assert alive(pid)
+
+    # Another run, e.g. the next Ansible Module, attaches to it
+    with provider() as reattach:
+        assert reattach_pid(reattach) == pid
+    assert provider.starts() == [pid]
+
+
+def test_concurrent_runs_use_separate_providers(provider):
+    with provider() as first:
+        with provider() as second:
+            assert reattach_pid(first) != reattach_pid(second)
+    with provider() as third:
+        assert reattach_pid(third) in (reattach_pid(first), reattach_pid(second))
+    assert len(provider.starts()) == 2
+
+
+def test_credentials_select_the_provider(provider):
+    with provider() as first:
+        pass
+    with provider(api_key='otherkey') as second:
+        pass
+    assert reattach_pid(first) != reattach_pid(second)
+
+
+def test_idle_provider_stops_after_ttl(provider):
+    with provider(ttl=1) as reattach:
+        pid = reattach_pid(reattach)
+
+    assert wait_for(lambda: not alive(pid))
+
+    with provider(ttl=1) as reattach:
+        assert reattach_pid(reattach) != pid
+    assert len(provider.starts()) == 2
+
+
+def test_provider_in_use_is_kept_after_ttl(provider):
+    with provider(ttl=1) as reattach:
+        time.sleep(3)
+        assert alive(reattach_pid(reattach))
+
+
+def test_reattach_socket_is_private(provider, temp_dir):
+    with provider() as reattach:
+        path = json.loads(reattach)['registry.terraform.io/ibm-cloud/ibm']['Addr']['String']
+        assert stat.S_ISSOCK(os.stat(path).st_mode)
+
+    socket_dir = os.path.dirname(path)
+    assert socket_dir == os.path.join(temp_dir, ResidentProvider.SOCKET_DIR_PREFIX + str(os.getuid()))
+    assert os.stat(socket_dir).st_uid == os.getuid()
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o700
+
+
+def test_socket_directory_is_made_private(provider, temp_dir):
+    socket_dir = os.path.join(temp_dir, ResidentProvider.SOCKET_DIR_PREFIX + str(os.getuid()))
+    os.mkdir(socket_dir)
+    os.chmod(socket_dir, 0o777)
+
+    provider()
+
+    assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o700
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason='Changing the owner requires root')
+def test_socket_directory_of_another_user_is_not_used(provider, temp_dir):
+    socket_dir = os.path.join(temp_dir, ResidentProvider.SOCKET_DIR_PREFIX + str(os.getuid()))
+    os.mkdir(socket_dir, 0o700)
+    os.chown(socket_dir, 12345, -1)
+
+    with pytest.raises(OSError):
+        provider()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import time
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    ResourceStateCache, ibmcloud_terraform)
+
+
+def run_vpc(**parameters):
+    parameters = dict({'state': 'available', 'id': 'vpc-1', 'name': 'myvpc', 'region': 'us-south'}, **parameters)
+    return ibmcloud_terraform(
+        resource_type='ibm_is_vpc',
+        tf_type='resource',
+        parameters=parameters,
+        ibm_provider_version='1.71.2',
+        tl_required_params=[],
+        tl_all_params=['name'])
+
+
+@pytest.fixture
+def state_cache(terraform_stub, monkeypatch):
+    monkeypatch.setenv('IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE', 'true')
+    monkeypatch.setenv('IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE_TTL', '3600')
+    terraform_stub.cloud = {'ibm_is_vpc': {'vpc-1': {'id': 'vpc-1', 'name': 'myvpc', 'status': 'old'}}}
+    return ResourceStateCache(terraform_stub.path)
+
+
+def set_status(terraform_stub, status):
+    cloud = terraform_stub.cloud
+    cloud['ibm_is_vpc']['vpc-1']['status'] = status
+    terraform_stub.cloud = cloud
+
+
+def commands(terraform_stub):
+    return [run['command'] for run in terraform_stub.commands() if run['command'] != 'version']
+
+
+def test_first_run_imports_and_caches(terraform_stub, state_cache):
+    result = run_vpc()
+
+    assert result['rc'] == 0
+    assert result['resource']['status'] == 'old'
+    assert 'import' in commands(terraform_stub)
+    assert state_cache.get('ibm_is_vpc', 'vpc-1', '1.71.2')['resource']['instances'][0]['attributes']['status'] == 'old'
+
+
+def test_unchanged_rerun_returns_refreshed_state(terraform_stub, state_cache):
+    run_vpc()
+    terraform_stub.commands()
+
+    for status in ('new', 'newer', 'newest'):
+        set_status(terraform_stub, status)
+        result = run_vpc()
+
+        assert result['rc'] == 0
+        assert not result['changed']
+        assert result['resource']['status'] == status
+        # Restored from the cache instead of imported, and the refreshed
+        # state saved by applying the empty plan
+        assert commands(terraform_stub) == ['init', 'plan', 'apply']
+        cached = state_cache.get('ibm_is_vpc', 'vpc-1', '1.71.2')
+        assert cached['resource']['instances'][0]['attributes']['status'] == status
+
+
+def test_expired_state_is_imported_again(terraform_stub, state_cache, monkeypatch):
+    monkeypatch.setenv('IBMCLOUD_ANSIBLE_RESOURCE_STATE_CACHE_TTL', '60')
+    run_vpc()
+    terraform_stub.commands()
+    path = state_cache._path('ibm_is_vpc', 'vpc-1', '1.71.2')
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    set_status(terraform_stub, 'new')
+
+    result = run_vpc()
+
+    assert result['resource']['status'] == 'new'
+    assert 'import' in commands(terraform_stub)
+
+
+def test_changed_resource_is_updated(terraform_stub, state_cache):
+    run_vpc()
+    terraform_stub.commands()
+
+    result = run_vpc(name='othervpc')
+
+    assert result['changed']
+    assert result['resource']['name'] == 'othervpc'
+    assert commands(terraform_stub) == ['init', 'plan', 'show', 'apply']
+    assert terraform_stub.cloud['ibm_is_vpc']['vpc-1']['name'] == 'othervpc'
+
+
+def test_absent_resource_is_removed_from_cache(terraform_stub, state_cache):
+    run_vpc()
+
+    result = run_vpc(state='absent')
+
+    assert result['rc'] == 0
+    assert state_cache.get('ibm_is_vpc', 'vpc-1', '1.71.2') is None
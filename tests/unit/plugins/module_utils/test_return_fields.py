@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    Terraform, _JSONScanner, parse_return_fields, project_attributes)
+
+DATA = {
+    'id': 'list-1',
+    'instances': [
+        {'id': 'a', 'name': 'first', 'zone': 'z1', 'nics': [{'id': 'n1', 'ip': '10.0.0.1'}, {'id': 'n2', 'ip': '10.0.0.2'}]},
+        {'id': 'b', 'name': 'second', 'zone': 'z2', 'nics': [{'id': 'n3', 'ip': '10.0.0.3'}]},
+        {'id': 'c', 'name': 'third', 'zone': 'z3', 'nics': []},
+    ],
+}
+
+
+def scanned(data, tree):
+    # Same projection by the state file scanner, with a window smaller
+    # than the data
+    scanner = _JSONScanner(json.dumps(data).encode('utf-8'))
+    scanner.MIN_WINDOW_SIZE = scanner.WINDOW_SIZE = 16
+    return scanner.project(tree)
+
+
+@pytest.mark.parametrize('return_fields, expected', [
+    (['id'], {'id': 'list-1'}),
+    (['instances.id'], {'instances': [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]}),
+    (['instances[*].id'], {'instances': [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]}),
+    (['instances[1].name', 'instances[5].name'], {'instances': [{'name': 'second'}]}),
+    (['instances.id', 'instances[0].name'], {'instances': [
+        {'id': 'a', 'name': 'first'}, {'id': 'b'}, {'id': 'c'}]}),
+    (['instances[2].zone', 'instances.id', 'instances[0]'], {'instances': [
+        DATA['instances'][0], {'id': 'b'}, {'id': 'c', 'zone': 'z3'}]}),
+    (['instances.nics.id', 'instances[0].nics[1].ip'], {'instances': [
+        {'nics': [{'id': 'n1'}, {'id': 'n2', 'ip': '10.0.0.2'}]}, {'nics': [{'id': 'n3'}]}, {'nics': []}]}),
+    (['instances', 'instances[0].name'], {'instances': DATA['instances']}),
+])
+def test_projection(return_fields, expected):
+    tree = parse_return_fields(return_fields)
+
+    assert project_attributes(DATA, tree) == expected
+    assert scanned(DATA, tree) == expected
+
+
+def test_invalid_return_field():
+    with pytest.raises(ValueError):
+        parse_return_fields(['instances[x].id'])
+
+
+@pytest.mark.parametrize('scan_size', [0, 64 * 1024 * 1024])
+@pytest.mark.parametrize('flat', [False, True])
+def test_state_projection(tmp_path, monkeypatch, scan_size, flat):
+    # Small states are decoded and projected, large ones scanned
+    monkeypatch.setattr(ibmcloud, 'TFSTATE_SCAN_SIZE', scan_size)
+    if flat:
+        instance = {'attributes_flat': {
+            'id': 'list-1', 'instances.#': '2', 'instances.0.id': 'a', 'instances.0.name': 'first',
+            'instances.1.id': 'b', 'instances.1.name': 'second'}}
+    else:
+        instance = {'attributes': DATA}
+    (tmp_path / 'terraform.tfstate').write_text(json.dumps({'version': 4, 'resources': [
+        {'mode': 'managed', 'type': 'ibm_is_instances', 'name': 'list', 'instances': [{'attributes': {}}]},
+        {'mode': 'data', 'type': 'ibm_is_instances', 'name': 'list', 'instances': [instance]}]}))
+    terraform = Terraform.__new__(Terraform)
+    terraform.directory = str(tmp_path)
+
+    assert terraform.get_tfstate_attributes('ibm_is_instances.list', ['instances.name'], mode='data') == {
+        'instances': [{'name': 'first'}, {'name': 'second'}] + ([] if flat else [{'name': 'third'}])}
+    assert terraform.get_tfstate_attributes('ibm_is_instances.other', ['instances.name']) == {
+        '_type': 'ibm_is_instances', '_name': 'other', 'target': 'ibm_is_instances.other'}
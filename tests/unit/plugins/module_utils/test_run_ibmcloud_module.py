@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible.module_utils.testing import patch_module_args
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud
+from ansible_collections.ibm.cloudcollection.plugins.modules import (
+    ibm_is_security_group_rule, ibm_is_subnet)
+
+
+def run_main(module, capsys, **args):
+    with patch_module_args(args):
+        with pytest.raises(SystemExit):
+            module.main()
+    return json.loads(capsys.readouterr().out)
+
+
+def test_create(terraform_stub, capsys):
+    result = run_main(
+        ibm_is_security_group_rule, capsys,
+        group='sg-1', direction='inbound', remote='10.0.0.1', ibmcloud_api_key='secretkey')
+
+    assert result['rc'] == 0
+    assert result['changed'] is True
+    rule, = terraform_stub.cloud['ibm_is_security_group_rule'].values()
+    assert (rule['group'], rule['direction'], rule['remote']) == ('sg-1', 'inbound', '10.0.0.1')
+    assert [run['command'] for run in terraform_stub.commands()].count('apply') == 1
+
+
+def test_missing_required_arguments(terraform_stub, capsys):
+    result = run_main(ibm_is_subnet, capsys, name='subnet-1', ibmcloud_api_key='secretkey')
+
+    assert result['failed'] is True
+    assert result['msg'] == 'missing required arguments: zone, vpc'
+    assert terraform_stub.commands() == []
+
+
+def test_conflicting_arguments(terraform_stub, capsys):
+    result = run_main(
+        ibm_is_subnet, capsys,
+        name='subnet-1', zone='us-south-1', vpc='vpc-1', ipv4_cidr_block='10.0.0.0/24',
+        total_ipv4_address_count=256, ibmcloud_api_key='secretkey')
+
+    assert result['failed'] is True
+    assert result['msg'] == "conflicts exist: {}".format({
+        'ipv4_cidr_block': 'total_ipv4_address_count',
+        'total_ipv4_address_count': 'ipv4_cidr_block'})
+    assert terraform_stub.commands() == []
+
+
+def test_argument_checks_computed_once(monkeypatch):
+    monkeypatch.setattr(ibmcloud, '_ARGUMENT_CHECKS', {})
+    checks = ibmcloud.argument_checks(
+        'ibm_is_subnet', ibm_is_subnet.TL_REQUIRED_PARAMETERS, ibm_is_subnet.TL_CONFLICTS_MAP)
+
+    assert checks.required == ('zone', 'name', 'vpc')
+    assert ibmcloud.argument_checks('ibm_is_subnet', [], {}) is checks
+    assert checks.missing({'name': 'subnet-1', 'zone': None}) == ['zone', 'vpc']
+    assert checks.conflicts({'routing_table': 'rt-1', 'routing_table_crn': None}) == {}
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import shlex
+import sys
+import time
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils import ibmcloud
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import run_process
+
+# Stub commands: Python scripts run with the interpreter of the tests
+FLOOD = '''
+import sys
+for i in range(10000):
+    sys.stdout.write('line {:05d}\\n'.format(i))
+sys.stderr.write('done\\n')
+'''
+# Stops on SIGINT like Terraform, saving its state first
+GRACEFUL = '''
+import signal, sys, time
+def interrupted(signum, frame):
+    sys.stdout.write('state saved\\n')
+    sys.exit(130)
+signal.signal(signal.SIGINT, interrupted)
+sys.stdout.write('started\\n')
+sys.stdout.flush()
+time.sleep(60)
+'''
+# Ignores SIGINT, only SIGKILL stops it
+STUBBORN = '''
+import signal, time
+signal.signal(signal.SIGINT, signal.SIG_IGN)
+time.sleep(60)
+'''
+# Exits on SIGINT, while a child in its own session (out of reach of
+# the process group kill) keeps the pipes open for a while
+ORPHAN = '''
+import subprocess, sys, time
+subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(1.5)'], start_new_session=True)
+time.sleep(60)
+'''
+
+
+@pytest.fixture
+def script(tmp_path):
+    def script(source):
+        path = tmp_path / 'stub.py'
+        path.write_text(source)
+        return '{} {} apply'.format(shlex.quote(sys.executable), shlex.quote(str(path)))
+    return script
+
+
+def test_output(script):
+    rc, stdout, stderr = run_process(script(FLOOD))
+
+    assert rc == 0
+    assert stdout.splitlines() == ['line {:05d}'.format(i) for i in range(10000)]
+    assert stderr == 'done\n'
+
+
+def test_bounded_buffer_spill(script, tmp_path):
+    spill_path = str(tmp_path / 'output')
+    chunks = []
+
+    rc, stdout, stderr = run_process(
+        script(FLOOD), spill_path=spill_path, buffer_size=1000,
+        progress=lambda name, text: chunks.append((name, text)))
+
+    complete = ''.join('line {:05d}\n'.format(i) for i in range(10000))
+    note, tail = stdout.split('\n', 1)
+    assert note == '[{} bytes of output omitted, complete output in {}.stdout]'.format(
+        len(complete) - 1000, spill_path)
+    assert tail == complete[-1000:]
+    with open(spill_path + '.stdout') as file_obj:
+        assert file_obj.read() == complete
+    # Streams within the limit are neither truncated nor spilled
+    assert stderr == 'done\n'
+    assert not (tmp_path / 'output.stderr').exists()
+    assert ''.join(text for name, text in chunks if name == 'stdout') == complete
+
+
+def test_bounded_buffer_without_spill(script):
+    rc, stdout, stderr = run_process(script(FLOOD), buffer_size=1000)
+
+    assert stdout.startswith('[{} bytes of output omitted]\n'.format(110000 - 1000))
+    assert stdout.endswith('line 09999\n')
+
+
+def test_timeout_interrupts(script, tmp_path):
+    start = time.monotonic()
+
+    rc, stdout, stderr = run_process(script(GRACEFUL), timeout=1)
+
+    assert time.monotonic() - start < 10
+    assert rc == 130
+    assert stdout == 'started\nstate saved\n'
+    assert stderr == '\nError: Command timed out after 1 seconds: {} {}\n'.format(
+        os.path.basename(sys.executable), tmp_path / 'stub.py')
+
+
+def test_timeout_kills_after_grace(script, monkeypatch):
+    monkeypatch.setattr(ibmcloud, 'RUN_PROCESS_KILL_GRACE', 1)
+    start = time.monotonic()
+
+    rc, stdout, stderr = run_process(script(STUBBORN), timeout=0.5)
+
+    assert 1.5 <= time.monotonic() - start < 10
+    assert rc == 1
+    assert 'Error: Command timed out after 0.5 seconds' in stderr
+
+
+def test_timeout_with_exited_process_group(script):
+    rc, stdout, stderr = run_process(script(ORPHAN), timeout=0.5)
+
+    assert rc == 1
+    assert 'Error: Command timed out after 0.5 seconds' in stderr
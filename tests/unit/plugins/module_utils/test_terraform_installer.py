@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.six.moves import BaseHTTPServer, socketserver
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    VERIFIED_MARKER, FileLock, TerraformInstaller, build_offline_bundle)
+
+
+def zip_archive(name, content):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        # Stored, so that the archive is large enough to be resumed
+        archive.writestr(name, content)
+    return data.getvalue()
+
+
+class ReleaseServer:
+    """
+    HTTP server for release archives and SHA256SUMS files, with support
+    for 'Range' requests unless 'ranges' is False. Responses are sent
+    after 'delay' seconds.
+    """
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.ranges = True
+        self.delay = 0
+        server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get('Range')))
+                time.sleep(server.delay)
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                status, start = 200, 0
+                if self.headers.get('Range') and server.ranges:
+                    start = int(self.headers['Range'][len('bytes='):].rstrip('-'))
+                    if start >= len(data):
+                        self.send_error(416)
+                        return
+                    status = 206
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data) - start))
+                if status == 206:
+                    self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(data) - 1, len(data)))
+                self.end_headers()
+                self.wfile.write(data[start:])
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add_release(self, prefix, name, archive, sums_name, checksum=None):
+        self.files[prefix + name] = archive
+        self.files[prefix + sums_name] = '{}  {}\n{}  other.zip\n'.format(
+            checksum or hashlib.sha256(archive).hexdigest(), name, '0' * 64).encode('utf-8')
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = ReleaseServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def installer(server, tmp_path):
+    def run_version(command):
+        raise AssertionError('verified executable must not be probed')
+
+    installer = TerraformInstaller(str(tmp_path / 'terraform_dir'), '1.5.5', '1.71.2', run_version=run_version)
+    installer.TERRAFORM_BASE_URL = server.url + '/terraform/'
+    installer.IBM_PROVIDER_BASE_URL = server.url + '/provider/'
+    installer.archive_name = 'terraform_1.5.5_{}_{}.zip'.format(installer.platform, installer.arch)
+    installer.archive = zip_archive('terraform', os.urandom(256 * 1024))
+    server.add_release('/terraform/1.5.5/', installer.archive_name, installer.archive, 'terraform_1.5.5_SHA256SUMS')
+    provider_name = 'terraform-provider-ibm_1.71.2_{}_{}.zip'.format(installer.platform, installer.arch)
+    server.add_release(
+        '/provider/v1.71.2/', provider_name, zip_archive('terraform-provider-ibm_v1.71.2', b'provider'),
+        'terraform-provider-ibm_1.71.2_SHA256SUMS')
+    return installer
+
+
+def marker(path):
+    with open(os.path.join(path, VERIFIED_MARKER)) as file_obj:
+        return json.load(file_obj)
+
+
+def test_install_verifies_and_marks(installer):
+    installer.install()
+
+    assert os.access(installer.executable, os.X_OK)
+    assert marker(installer.executable_dir) == {
+        'archive': installer.archive_name, 'sha256': hashlib.sha256(installer.archive).hexdigest()}
+    assert os.path.isfile(os.path.join(installer.ibm_provider_plugin_dir, 'terraform-provider-ibm_v1.71.2'))
+    assert marker(installer.ibm_provider_plugin_dir)['archive'].startswith('terraform-provider-ibm_1.71.2_')
+    assert os.listdir(os.path.join(installer.terraform_dir, 'downloads')) == []
+
+
+def test_checksum_mismatch_is_rejected(installer, server):
+    server.add_release(
+        '/terraform/1.5.5/', installer.archive_name, installer.archive, 'terraform_1.5.5_SHA256SUMS',
+        checksum='1' * 64)
+
+    with pytest.raises(AnsibleError, match='Checksum mismatch'):
+        installer.install()
+
+    # Neither the archive nor an unverified executable are kept
+    assert not os.path.exists(installer.executable_dir)
+    assert os.listdir(os.path.join(installer.terraform_dir, 'downloads')) == []
+    assert not installer._terraform_installed()
+
+
+def test_partial_download_is_resumed(installer, server):
+    downloads = os.path.join(installer.terraform_dir, 'downloads')
+    os.makedirs(downloads)
+    half = len(installer.archive) // 2
+    with open(os.path.join(downloads, installer.archive_name + '.part'), 'wb') as file_obj:
+        file_obj.write(installer.archive[:half])
+
+    installer.install()
+
+    assert ('/terraform/1.5.5/' + installer.archive_name, 'bytes={}-'.format(half)) in server.requests
+    assert marker(installer.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+
+
+def test_download_starts_over_without_range_support(installer, server):
+    server.ranges = False
+    downloads = os.path.join(installer.terraform_dir, 'downloads')
+    os.makedirs(downloads)
+    with open(os.path.join(downloads, installer.archive_name + '.part'), 'wb') as file_obj:
+        file_obj.write(installer.archive[:1000])
+
+    installer.install()
+
+    assert marker(installer.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+
+
+def test_corrupt_partial_download_is_not_marked(installer):
+    downloads = os.path.join(installer.terraform_dir, 'downloads')
+    os.makedirs(downloads)
+    with open(os.path.join(downloads, installer.archive_name + '.part'), 'wb') as file_obj:
+        file_obj.write(b'x' * 1000)
+
+    with pytest.raises(AnsibleError, match='Checksum mismatch'):
+        installer.install()
+
+    assert not os.path.exists(os.path.join(installer.executable_dir, VERIFIED_MARKER))
+    assert os.listdir(downloads) == []
+
+    # The next attempt downloads the archive again
+    installer.install()
+    assert marker(installer.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+
+
+def install(installer, barrier):
+    # Install with a new installer for the same directory in another
+    # process
+    other = TerraformInstaller(
+        installer.terraform_dir, '1.5.5', '1.71.2', run_version=installer.run_version)
+    other.TERRAFORM_BASE_URL = installer.TERRAFORM_BASE_URL
+    other.IBM_PROVIDER_BASE_URL = installer.IBM_PROVIDER_BASE_URL
+    barrier.wait()
+    other.install()
+
+
+def test_concurrent_installers_install_once(installer, server):
+    server.delay = 0.2
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(2)
+    processes = [context.Process(target=install, args=(installer, barrier)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    assert [process.exitcode for process in processes] == [0, 0]
+    archives = [path for path, _ in server.requests if path.endswith('.zip')]
+    assert sorted(archives) == sorted(set(archives))
+    assert len(archives) == 2
+    assert marker(installer.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+    assert os.path.isfile(os.path.join(installer.ibm_provider_plugin_dir, 'terraform-provider-ibm_v1.71.2'))
+
+
+def test_install_waits_for_lock(installer, server):
+    lock = FileLock(installer._install_lock_path('terraform_1.5.5'))
+    lock.acquire()
+    thread = threading.Thread(target=installer.install)
+    thread.start()
+    time.sleep(0.5)
+
+    # Nothing is downloaded while another process holds the lock
+    assert server.requests == []
+    lock.release()
+    thread.join(60)
+    assert marker(installer.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+
+
+def test_file_lock(tmp_path):
+    path = str(tmp_path / 'test.lock')
+    with FileLock(path):
+        assert not FileLock(path).acquire(blocking=False)
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+    lock = FileLock(path)
+    assert lock.acquire(blocking=False)
+    lock.release()
+    assert lock.fd is None
+
+
+def build_bundle(installer, monkeypatch, bundle_path):
+    # Offline bundle built from the release server
+    monkeypatch.setattr(TerraformInstaller, 'TERRAFORM_BASE_URL', installer.TERRAFORM_BASE_URL)
+    monkeypatch.setattr(TerraformInstaller, 'IBM_PROVIDER_BASE_URL', installer.IBM_PROVIDER_BASE_URL)
+    return build_offline_bundle(str(bundle_path), ibm_provider_versions=['1.71.2'])
+
+
+@pytest.mark.parametrize('name', ['bundle', 'bundle.tar.gz'])
+def test_install_from_offline_bundle(installer, server, monkeypatch, tmp_path, name):
+    bundle = build_bundle(installer, monkeypatch, tmp_path / name)
+    del server.requests[:]
+
+    offline = TerraformInstaller(
+        str(tmp_path / 'offline'), '1.5.5', '1.71.2', mirror=bundle, run_version=installer.run_version)
+    offline.install()
+
+    assert server.requests == []
+    with open(offline.executable, 'rb') as file_obj:
+        assert zip_archive('terraform', file_obj.read()) == installer.archive
+    assert os.access(offline.executable, os.X_OK)
+    assert marker(offline.executable_dir)['sha256'] == hashlib.sha256(installer.archive).hexdigest()
+    assert os.path.isfile(os.path.join(offline.ibm_provider_plugin_dir, 'terraform-provider-ibm_v1.71.2'))
+    # Installed once, later installers find the stamped executable
+    assert offline._terraform_installed()
+
+
+@pytest.mark.parametrize('name', ['bundle', 'bundle.tar'])
+def test_missing_version_in_offline_bundle(installer, monkeypatch, tmp_path, name):
+    bundle = build_bundle(installer, monkeypatch, tmp_path / name)
+
+    offline = TerraformInstaller(
+        str(tmp_path / 'offline'), '1.5.5', '1.65.1', mirror=bundle, run_version=installer.run_version)
+    with pytest.raises(AnsibleError, match="'terraform_ibm_cloud_provider/.*/1.65.1/.*' not found in offline"):
+        offline.install()
+
+    assert not offline._ibmcloud_tf_provider_installed()
+    assert os.listdir(os.path.dirname(offline.ibm_provider_plugin_dir)) == []
+
+
+def test_offline_bundle_checksum_mismatch(installer, server, monkeypatch, tmp_path):
+    server.add_release(
+        '/terraform/1.5.5/', installer.archive_name, installer.archive, 'terraform_1.5.5_SHA256SUMS',
+        checksum='1' * 64)
+
+    with pytest.raises(AnsibleError, match='Checksum mismatch'):
+        build_bundle(installer, monkeypatch, tmp_path / 'bundle.tgz')
+
+    assert not os.path.exists(str(tmp_path / 'bundle.tgz'))
+
+
+@pytest.fixture
+def stamped(tmp_path):
+    # Executable installed without a verified marker, probed by version
+    probes = []
+
+    def run_version(command):
+        probes.append(command)
+        with open(command.split()[0]) as file_obj:
+            return 0, file_obj.read(), ''
+
+    installer = TerraformInstaller(str(tmp_path / 'terraform_dir'), '1.5.5', '1.71.2', run_version=run_version)
+    os.makedirs(installer.executable_dir)
+    with open(installer.executable, 'w') as file_obj:
+        file_obj.write('Terraform v1.5.5\non linux_amd64\n')
+    installer.probes = probes
+    return installer
+
+
+def test_version_stamp_hit(stamped):
+    assert stamped._terraform_installed()
+    assert len(stamped.probes) == 1
+    stamp = stamped._read_stamp()
+    assert stamp['version'] == '1.5.5'
+    assert stamp['size'] == os.path.getsize(stamped.executable)
+
+    assert stamped._terraform_installed()
+    assert stamped._terraform_installed()
+    assert len(stamped.probes) == 1
+
+
+def test_version_stamp_miss_after_change(stamped):
+    stamped._terraform_installed()
+    mtime_ns = os.stat(stamped.executable).st_mtime_ns
+    with open(stamped.executable, 'w') as file_obj:
+        file_obj.write('Terraform v1.9.0\non linux_amd64\n')
+    # Same size, changed within the file system timestamp resolution
+    os.utime(stamped.executable, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+
+    assert not stamped._terraform_installed()
+    assert len(stamped.probes) == 2
+    assert stamped._read_stamp()['version'] == '1.9.0'
+    # The stamp of another version is a hit, too
+    assert not stamped._terraform_installed()
+    assert len(stamped.probes) == 2
+
+
+def test_version_stamp_not_written_for_unknown_executable(stamped):
+    with open(stamped.executable, 'w') as file_obj:
+        file_obj.write('not terraform\n')
+
+    assert not stamped._terraform_installed()
+    assert not stamped._terraform_installed()
+    assert len(stamped.probes) == 2
+    assert stamped._read_stamp() is None
+
+
+def test_corrupt_version_stamp_is_probed_again(stamped):
+    with open(stamped._stamp_path(), 'w') as file_obj:
+        file_obj.write('{')
+
+    assert stamped._terraform_installed()
+    assert len(stamped.probes) == 1
+    assert stamped._read_stamp()['version'] == '1.5.5'
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import ibmcloud_terraform_lookup
+
+
+def lookup_vpc(**parameters):
+    parameters = dict({'state': 'available', 'id': None, 'name': 'myvpc', 'region': 'us-south'}, **parameters)
+    return ibmcloud_terraform_lookup(
+        resource_type='ibm_is_vpc',
+        parameters=parameters,
+        ibm_provider_version='1.71.2',
+        tl_required_params=[('name', 'str')],
+        tl_all_params=['name'],
+        tl_required_params_ds=[('name', 'str')],
+        tl_all_params_ds=['name'])
+
+
+def runs(terraform_stub):
+    return [run for run in terraform_stub.commands() if run['command'] != 'version']
+
+
+def test_existing_resource_is_found(terraform_stub):
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-1', 'status': 'available'}}
+
+    result = lookup_vpc()
+
+    assert result['rc'] == 0
+    assert result['changed'] is False
+    assert result['resource'] == {'id': 'vpc-1', 'name': 'myvpc', 'status': 'available'}
+    assert [run['command'] for run in runs(terraform_stub)] == ['init', 'apply']
+    assert terraform_stub.cloud == {}
+
+
+def test_missing_resource_is_created_in_same_workspace(terraform_stub):
+    result = lookup_vpc()
+
+    assert result['rc'] == 0
+    assert result['changed'] is True
+    assert result['resource'] == {'id': 'ibm_is_vpc-1', 'name': 'myvpc'}
+    lookup_runs = runs(terraform_stub)
+    assert [run['command'] for run in lookup_runs] == ['init', 'apply', 'plan', 'show', 'apply']
+    assert len(set(run['cwd'] for run in lookup_runs)) == 1
+    assert list(terraform_stub.cloud['ibm_is_vpc']) == ['ibm_is_vpc-1']
+
+
+def test_lookup_skipped_with_id(terraform_stub):
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-2', 'status': 'available'}}
+    terraform_stub.cloud = {'ibm_is_vpc': {'vpc-1': {'id': 'vpc-1', 'name': 'myvpc'}}}
+
+    result = lookup_vpc(id='vpc-1')
+
+    assert result['rc'] == 0
+    assert result['changed'] is False
+    assert result['resource'] == {'id': 'vpc-1', 'name': 'myvpc'}
+    assert [run['command'] for run in runs(terraform_stub)] == ['init', 'import', 'plan']
+
+
+def test_lookup_skipped_without_data_source_arguments(terraform_stub):
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-2', 'status': 'available'}}
+
+    result = ibmcloud_terraform_lookup(
+        resource_type='ibm_is_vpc',
+        parameters={'state': 'available', 'id': None, 'name': 'myvpc', 'identifier': None, 'region': 'us-south'},
+        ibm_provider_version='1.71.2',
+        tl_required_params=[('name', 'str')],
+        tl_all_params=['name'],
+        tl_required_params_ds=[('identifier', 'str')],
+        tl_all_params_ds=['identifier'])
+
+    assert result['rc'] == 0
+    assert result['resource'] == {'id': 'ibm_is_vpc-1', 'name': 'myvpc'}
+    assert [run['command'] for run in runs(terraform_stub)] == ['init', 'plan', 'show', 'apply']
+
+
+def test_lookup_skipped_for_absent_state(terraform_stub):
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-1', 'status': 'available'}}
+
+    result = lookup_vpc(state='absent')
+
+    assert result['rc'] == 0
+    assert result['changed'] is False
+    assert [run['command'] for run in runs(terraform_stub)] == ['init', 'destroy']
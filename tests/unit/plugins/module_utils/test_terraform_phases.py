@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import (
+    Terraform, ibmcloud_terraform)
+
+
+def new_terraform(terraform_stub):
+    return Terraform({'region': 'us-south'}, terraform_stub.path, '1.71.2', env=dict(os.environ))
+
+
+def commands(terraform_stub):
+    return [run['command'] for run in terraform_stub.commands() if run['command'] != 'version']
+
+
+def test_constructor_skips_refresh_without_state(terraform_stub):
+    terraform = new_terraform(terraform_stub)
+
+    assert commands(terraform_stub) == ['init']
+    assert terraform.phase_stats['init']['spawns'] == 1
+    assert terraform.phase_stats['init']['seconds'] > 0
+    assert terraform.phase_stats['refresh'] == {'spawns': 0, 'skipped': 1, 'seconds': 0.0}
+
+
+def test_completed_phases_are_skipped(terraform_stub):
+    terraform = new_terraform(terraform_stub)
+    terraform_stub.commands()
+
+    assert terraform.init()[0] == 0
+    assert terraform.apply()[0] == 0
+    # The applied state is current
+    assert terraform.refresh()[0] == 0
+
+    assert commands(terraform_stub) == ['apply']
+    assert terraform.phase_stats['init'] == dict(terraform.phase_stats['init'], spawns=1, skipped=2)
+    assert terraform.phase_stats['apply']['spawns'] == 1
+    assert terraform.phase_stats['refresh']['skipped'] == 2
+
+
+def test_existing_state_is_refreshed_once(terraform_stub):
+    terraform = new_terraform(terraform_stub)
+    terraform_stub.commands()
+    with open(os.path.join(terraform.directory, 'terraform.tfstate'), 'w') as file_obj:
+        json.dump({'version': 4, 'resources': []}, file_obj)
+
+    assert terraform.refresh()[0] == 0
+    assert terraform.refresh()[0] == 0
+
+    assert commands(terraform_stub) == ['refresh']
+    assert terraform.phase_stats['refresh']['spawns'] == 1
+    assert terraform.phase_stats['refresh']['skipped'] == 2
+
+
+def test_failed_init_runs_again(terraform_stub, monkeypatch):
+    terraform = new_terraform(terraform_stub)
+    terraform_stub.commands()
+    terraform.completed_phases.discard('init')
+    executable = terraform.executable
+
+    monkeypatch.setattr(terraform, 'executable', '/bin/false')
+    assert terraform.init()[0] != 0
+    monkeypatch.setattr(terraform, 'executable', executable)
+    assert terraform.init()[0] == 0
+    assert terraform.init()[0] == 0
+
+    assert commands(terraform_stub) == ['init']
+    assert terraform.phase_stats['init'] == dict(terraform.phase_stats['init'], spawns=3, skipped=1)
+
+
+def test_phase_stats_reported(terraform_stub, monkeypatch):
+    monkeypatch.setenv('IBMCLOUD_ANSIBLE_TERRAFORM_STATS', 'true')
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-1', 'name': 'myvpc'}}
+
+    result = ibmcloud_terraform(
+        resource_type='ibm_is_vpc',
+        tf_type='data',
+        parameters={'name': 'myvpc', 'region': 'us-south'},
+        ibm_provider_version='1.71.2',
+        tl_required_params=[],
+        tl_all_params=['name'])
+
+    assert result['rc'] == 0
+    assert commands(terraform_stub) == ['init', 'apply']
+    phases = result['terraform_phases']
+    assert phases['init']['spawns'] == 1
+    assert phases['refresh'] == {'spawns': 0, 'skipped': 1, 'seconds': 0.0}
+    assert phases['apply']['spawns'] == 1
+
+
+def test_phase_stats_not_reported_by_default(terraform_stub):
+    terraform_stub.data = {'ibm_is_vpc': {'id': 'vpc-1', 'name': 'myvpc'}}
+
+    result = ibmcloud_terraform(
+        resource_type='ibm_is_vpc',
+        tf_type='data',
+        parameters={'name': 'myvpc', 'region': 'us-south'},
+        ibm_provider_version='1.71.2',
+        tl_required_params=[],
+        tl_all_params=['name'])
+
+    assert result['rc'] == 0
+    assert 'terraform_phases' not in result
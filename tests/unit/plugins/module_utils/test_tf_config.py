@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import glob
+import json
+import os
+import re
+from importlib import import_module
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import fmt_tf_block, tf_json_block
+
+MODULES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))),
+    'plugins', 'modules')
+MODULES = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(MODULES_DIR, 'ibm_*.py')))
+
+# Argument values per module argument type
+SAMPLES = {
+    'str': ['value', 'true', 'False', '10', ''],
+    'int': [0, 42],
+    'float': [1.5],
+    'bool': [True, False],
+    'list': [['a', 'true'], [], [{'name': 'rule', 'enabled': 'true', 'port': 22}]],
+    'dict': [{'key': 'value', 'flag': 'false'}],
+}
+
+
+def parse_hcl(text):
+    """
+    Values of the HCL written by 'fmt_tf_block()': attributes, maps and
+    repeated nested blocks.
+    """
+    lines = iter(text.splitlines())
+
+    def body():
+        output = {}
+        for line in lines:
+            line = line.strip()
+            if line == '}':
+                return output
+            match = re.match(r'^(\w+) (= )?\{$', line)
+            if match is None:
+                key, value = line.split(' = ', 1)
+                output[key] = json.loads(value)
+            elif match.group(2):
+                output[match.group(1)] = body()
+            else:
+                output.setdefault(match.group(1), []).append(body())
+        return output
+
+    return body()
+
+
+def assert_same_config(parameters, allowed=()):
+    expected = parse_hcl(fmt_tf_block(parameters, validate_tl_params=list(allowed)))
+    assert tf_json_block(parameters, validate_tl_params=list(allowed)) == expected
+
+
+@pytest.mark.parametrize('module_name', MODULES)
+def test_json_matches_hcl_for_module_parameters(module_name):
+    module = import_module('ansible_collections.ibm.cloudcollection.plugins.modules.' + module_name)
+    for round_ in range(max(len(samples) for samples in SAMPLES.values())):
+        parameters = {'region': 'us-south', 'ibmcloud_api_key': 'secret', 'id': None}
+        for name in module.TL_ALL_PARAMETERS:
+            samples = SAMPLES[module.module_args[name]['type']]
+            parameters[name] = samples[round_ % len(samples)]
+        assert_same_config(parameters, module.TL_ALL_PARAMETERS)
+
+
+def test_json_matches_hcl_for_nested_values():
+    assert_same_config({
+        'name': 'vm',
+        'count_': 2,
+        'unset': None,
+        'tags': ['a', 'b'],
+        'boot_volume': [{'name': 'boot', 'encryption': None, 'auto_delete': 'TRUE'}],
+        'rules': [{'name': 'a', 'ports': [{'min': 1, 'max': 2}]}, {'name': 'b'}],
+        'labels': {'env': 'prod', 'debug': 'false', 'nested': {'k': 1}},
+    })
+
+
+def test_json_matches_hcl_for_large_values():
+    assert_same_config({
+        'name': 'cluster',
+        'zones': [{'name': 'us-south-{}'.format(number % 3 + 1), 'subnet_id': 'subnet-{}'.format(number)}
+                  for number in range(100)],
+        'user_data': '#!/bin/sh\necho "quoted \\\\ value" ${var}\nété\n' * 100,
+        'policy': json.dumps({'Statement': [{'Effect': 'Allow', 'Action': ['s3:GetObject']}]}),
+        'kms_config': [{'instance_id': 'kms', 'private_endpoint': 'true'}],
+    }, ['name', 'zones', 'user_data', 'policy', 'kms_config'])
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import threading
+import time
+
+import pytest
+
+from ansible_collections.ibm.cloudcollection.plugins.module_utils.ibmcloud import WorkspacePool
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return WorkspacePool(str(tmp_path), max_size=3, max_size_per_key=2)
+
+
+def initialize(path):
+    # What 'terraform init' and a run leave in a workspace
+    os.makedirs(os.path.join(path, '.terraform', 'providers'))
+    for name in ('.terraform.lock.hcl', 'provider.tf', 'resource.tf', 'terraform.tfstate'):
+        open(os.path.join(path, name), 'w').close()
+    os.makedirs(os.path.join(path, 'output'))
+
+
+def age(path, seconds):
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def idle_path(busy_path):
+    key_dir, name = os.path.split(busy_path)
+    return os.path.join(key_dir, WorkspacePool.IDLE_PREFIX + name[len(WorkspacePool.BUSY_PREFIX):])
+
+
+def workspaces(pool, key, prefix):
+    return sorted(name for name in os.listdir(os.path.join(pool.path, key)) if name.startswith(prefix))
+
+
+def test_checkout_of_empty_pool(pool):
+    path, initialized = pool.checkout(pool.key('a'))
+
+    assert not initialized
+    assert os.path.isdir(path)
+    assert os.path.basename(path).startswith(WorkspacePool.BUSY_PREFIX)
+
+
+def test_checkin_keeps_initialized_files(pool):
+    key = pool.key('a')
+    path, _ = pool.checkout(key)
+    initialize(path)
+
+    pool.checkin(path)
+
+    idle = workspaces(pool, key, WorkspacePool.IDLE_PREFIX)
+    assert len(idle) == 1
+    assert sorted(os.listdir(os.path.join(pool.path, key, idle[0]))) == [
+        '.terraform', '.terraform.lock.hcl', 'provider.tf']
+    assert workspaces(pool, key, WorkspacePool.BUSY_PREFIX) == []
+
+
+def test_checkin_discards_uninitialized(pool):
+    key = pool.key('a')
+    path, _ = pool.checkout(key)
+
+    pool.checkin(path)
+
+    assert os.listdir(os.path.join(pool.path, key)) == []
+
+
+def test_checkout_reuses_most_recently_used(pool):
+    key = pool.key('a')
+    first, _ = pool.checkout(key)
+    second, _ = pool.checkout(key)
+    initialize(first)
+    initialize(second)
+    pool.checkin(first)
+    pool.checkin(second)
+    age(idle_path(first), 60)
+
+    path, initialized = pool.checkout(key)
+
+    assert initialized
+    assert os.path.basename(path) == os.path.basename(second)
+    assert os.path.isdir(os.path.join(path, '.terraform'))
+
+
+def test_keys_do_not_share_workspaces(pool):
+    path, _ = pool.checkout(pool.key('a'))
+    initialize(path)
+    pool.checkin(path)
+
+    assert not pool.checkout(pool.key('b'))[1]
+
+
+def test_old_idle_workspace_is_not_stale_after_checkout(pool):
+    key = pool.key('a')
+    path, _ = pool.checkout(key)
+    initialize(path)
+    pool.checkin(path)
+    idle = os.path.join(pool.path, key, workspaces(pool, key, WorkspacePool.IDLE_PREFIX)[0])
+    age(idle, 2 * DAY)
+
+    path, initialized = pool.checkout(key)
+    pool.evict()
+
+    assert initialized
+    assert os.path.isdir(os.path.join(path, '.terraform'))
+
+
+def test_evict_stale_busy_workspaces(pool):
+    key = pool.key('a')
+    stale, _ = pool.checkout(key)
+    busy, _ = pool.checkout(key)
+    age(stale, 2 * DAY)
+
+    pool.evict()
+
+    assert not os.path.exists(stale)
+    assert os.path.isdir(busy)
+
+
+def test_evict_least_recently_used(pool):
+    # Two idle workspaces per key at most, three in the pool
+    paths = {}
+    for number, key in enumerate(('a', 'a', 'a', 'b', 'b')):
+        path, _ = pool.checkout(pool.key(key))
+        initialize(path)
+        paths[number] = path
+    for number in range(5):
+        pool.checkin(paths[number])
+        if os.path.exists(idle_path(paths[number])):
+            age(idle_path(paths[number]), 100 - number)
+
+    pool.evict()
+
+    remaining = dict((key, workspaces(pool, pool.key(key), WorkspacePool.IDLE_PREFIX)) for key in ('a', 'b'))
+    # The oldest workspace of 'a' exceeded the limit per key, the next
+    # oldest the limit of the pool
+    assert remaining['a'] == [os.path.basename(idle_path(paths[2]))]
+    assert len(remaining['b']) == 2
+
+
+def test_concurrent_checkout(pool):
+    key = pool.key('a')
+    paths = [pool.checkout(key)[0] for _ in range(2)]
+    for path in paths:
+        initialize(path)
+        pool.checkin(path)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def checkout():
+        barrier.wait()
+        results.append(pool.checkout(key))
+
+    threads = [threading.Thread(target=checkout) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each workspace is owned by one checkout only
+    assert len(set(path for path, _ in results)) == 8
+    assert sorted(initialized for _, initialized in results) == [False] * 6 + [True] * 2
+    assert workspaces(pool, key, WorkspacePool.IDLE_PREFIX) == []